@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Attribute Registry Module
+========================
+
+Persistent SQLite registry of option → ``attrN`` mappings confirmed by the
+computePrice endpoint.
+
+Whenever a computePrice call returns a real quote, every option that
+filled the payload is recorded twice: its normalized name (``Paper Type`` →
+``paper type``) and the option value ID it sent, each with the ``attrN``
+it was sent as. Products analyzed later look their options up here before
+falling back to keyword guesses, so known attributes are right on the first
+call instead of being learned through 412 responses. Value IDs are the
+stronger evidence and are consulted before names.
+
+A wrong payload is not always rejected: the calculator may answer 200 with
+its default quote ($20.00, quantity 0). Such responses confirm nothing.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+from loguru import logger
+
+from config import config
+
+# Keys per IN (...) query, under SQLite's bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+# Price of the calculator's default quote for payloads it did not understand
+DEFAULT_QUOTE_PRICE = 20.0
+
+def _number(value) -> Optional[float]:
+    """Numeric value of a computePrice field such as '1,250.00' or '$20.00'"""
+
+    try:
+        return float(str(value).replace(',', '').replace('$', ''))
+    except (TypeError, ValueError):
+        return None
+
+def is_default_quote(response: Dict[str, Any]) -> bool:
+    """Whether a 200 computePrice response is the default quote rather than a price for the payload"""
+
+    price = _number(response.get('price'))
+    quantity = _number(response.get('qty'))
+    return price is None or price == DEFAULT_QUOTE_PRICE or not quantity or quantity <= 0
+
+def normalize_option_name(option_name: str) -> str:
+    """Registry key of an option name: lower case, no colons, single spaces"""
+
+    return ' '.join(option_name.replace(':', ' ').lower().split())
+
+class AttributeRegistry:
+    """SQLite store of option names and value IDs confirmed per ``attrN``"""
+
+    def __init__(self, db_path: Path, enabled: bool = True):
+        self.db_path = Path(db_path)
+        self.enabled = enabled
+
+        # (kind, key, attr) already written by this process
+        self._confirmed = set()
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'AttributeRegistry':
+        """Create a registry from the framework configuration"""
+
+        return cls(db_path=config.attribute_registry_path, enabled=config.attribute_registry_enabled)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily, once per process (caller holds the lock)"""
+
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS mappings (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    attr TEXT NOT NULL,
+                    confirmations INTEGER NOT NULL,
+                    first_confirmed REAL NOT NULL,
+                    last_confirmed REAL NOT NULL,
+                    PRIMARY KEY (kind, key, attr)
+                ) WITHOUT ROWID
+            """)
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+            self._confirmed = set()
+        return self._connection
+
+    def _select(self, kind: str, keys: List[str]) -> List[Tuple[str, str, int, float]]:
+        """``(key, attr, confirmations, last_confirmed)`` rows of some keys (caller holds the lock)"""
+
+        connection = self._connect()
+        rows = []
+        for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[i:i + LOOKUP_BATCH_SIZE]
+            rows.extend(connection.execute(
+                f"SELECT key, attr, confirmations, last_confirmed FROM mappings WHERE kind = ? AND key IN ({','.join('?' * len(batch))})",
+                [kind, *batch]
+            ).fetchall())
+        return rows
+
+    def lookup(self, option_names: List[str], options: Optional[Dict[str, List[Dict[str, str]]]] = None) -> Dict[str, str]:
+        """Confirmed ``attrN`` of the options the registry knows
+
+        With ``options`` (name → ``[{'id', 'text'}, ...]``) an option maps to
+        the attribute its value IDs were confirmed as most often; options
+        without known IDs fall back to their name.
+        """
+
+        if not self.enabled or not option_names:
+            return {}
+
+        option_ids = {name: [value['id'] for value in (options or {}).get(name, []) if value.get('id')] for name in option_names}
+        name_keys = {name: normalize_option_name(name) for name in option_names}
+
+        try:
+            with self._lock:
+                id_rows = self._select('id', sorted({option_id for ids in option_ids.values() for option_id in ids}))
+                name_rows = self._select('name', sorted(set(name_keys.values())))
+
+        except sqlite3.Error as e:
+            logger.warning(f"Attribute registry read failed: {e}")
+            return {}
+
+        id_votes = defaultdict(dict)
+        for key, attr, confirmations, _ in id_rows:
+            id_votes[key][attr] = confirmations
+
+        name_votes = defaultdict(dict)
+        for key, attr, confirmations, last_confirmed in name_rows:
+            name_votes[key][attr] = (confirmations, last_confirmed)
+
+        learned = {}
+        for name in option_names:
+            votes = defaultdict(int)
+            for option_id in option_ids[name]:
+                for attr, confirmations in id_votes.get(option_id, {}).items():
+                    votes[attr] += confirmations
+            if votes:
+                learned[name] = max(votes, key=votes.get)
+            elif name_votes.get(name_keys[name]):
+                candidates = name_votes[name_keys[name]]
+                learned[name] = max(candidates, key=candidates.get)
+
+        if learned:
+            logger.debug(f"Attribute registry mappings: {learned}")
+        return learned
+
+    def confirm(self, slots: Iterable[Tuple[str, str]], option_ids: Dict[str, str], response: Dict[str, Any]):
+        """Record the ``(option name, attrN)`` pairs and value IDs of a payload that returned 200
+
+        ``response`` holds at least ``price`` and ``qty``; a default quote
+        (see ``is_default_quote``) records nothing. Each pair is written once
+        per process, so calling this for every successful request only costs
+        set lookups after the first.
+        """
+
+        if not self.enabled or is_default_quote(response):
+            return
+
+        pending = []
+        for name, attr in slots:
+            for entry in (('name', name, attr), ('id', option_ids.get(name), attr)):
+                if entry[1] and entry not in self._confirmed:
+                    pending.append(entry)
+        if not pending:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.executemany("""
+                    INSERT INTO mappings (kind, key, attr, confirmations, first_confirmed, last_confirmed)
+                    VALUES (?, ?, ?, 1, ?, ?)
+                    ON CONFLICT (kind, key, attr) DO UPDATE SET
+                        confirmations = mappings.confirmations + 1,
+                        last_confirmed = excluded.last_confirmed
+                """, [
+                    (kind, normalize_option_name(key) if kind == 'name' else str(key), attr, now, now)
+                    for kind, key, attr in pending
+                ])
+                connection.commit()
+                self._confirmed.update(pending)
+
+        except sqlite3.Error as e:
+            logger.warning(f"Attribute registry write failed: {e}")
+
+    def clear(self):
+        """Forget every learned mapping"""
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute('DELETE FROM mappings')
+            connection.commit()
+            self._confirmed = set()
+
+# Global attribute registry shared by the analyzer and extractor
+attribute_registry = AttributeRegistry.from_config()
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Batch Runner Module
+==================
+
+Headless analysis and price extraction across the product catalog.
+
+Products from the catalog CSV are spread over a pool of worker processes.
+Each worker analyzes one product, saves the analysis, extracts every
+combination and returns a summary row. All workers draw computePrice
+requests from one shared request budget, so adding workers uses more cores
+without raising the request rate against the site.
+
+``analyze_catalog`` only analyzes: pages are downloaded by a bounded thread
+pool at a limited page rate and parsed in a process pool, and the saved
+analyses are ranked in a catalog index by combination count.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import urlparse, urlunparse
+from loguru import logger
+
+from config import config, OUTPUT_DIR
+from rate_limiter import AdaptiveRateLimiter, SharedRequestBudget
+from combination_index import CombinationIndex
+
+# Columns of the run summary CSV
+SUMMARY_FIELDS = [
+    'product_name', 'product_url', 'status', 'product_id', 'total_combinations', 'total_extracted',
+    'error_count', 'success_rate', 'analysis_seconds', 'extraction_seconds',
+    'analysis_path', 'raw_csv_path', 'formatted_csv_path', 'error'
+]
+
+# Columns of the catalog index CSV
+CATALOG_INDEX_FIELDS = [
+    'rank', 'product_name', 'product_url', 'status', 'product_id', 'option_count', 'option_values',
+    'total_combinations', 'estimated_requests', 'estimated_hours', 'page_cache', 'analysis_seconds',
+    'analysis_path', 'error'
+]
+
+def load_catalog(products_csv: Path, match: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """Read the catalog CSV, dropping duplicate URLs and optionally filtering by name"""
+
+    products = []
+    seen_urls = set()
+
+    with open(products_csv, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name, url = row.get('Product Name', '').strip(), row.get('URL', '').strip()
+            if not name or not url or url in seen_urls:
+                continue
+            if match and match.lower() not in name.lower():
+                continue
+            seen_urls.add(url)
+            products.append({'name': name, 'url': url})
+
+    if limit:
+        products = products[:limit]
+    return products
+
+def _rebase_url(url: str, site_url: Optional[str]) -> str:
+    """Point a catalog URL at another host (e.g. the offline mock calculator)"""
+
+    if not site_url:
+        return url
+    site = urlparse(site_url)
+    return urlunparse(urlparse(url)._replace(scheme=site.scheme, netloc=site.netloc))
+
+def _init_worker(request_budget: Optional[SharedRequestBudget], log_level: str):
+    """Pool initializer: quiet logging and attach the shared request budget"""
+
+    logger.remove()
+    logger.add(sys.stderr, level=log_level, format="{time:HH:mm:ss} | {level: <8} | pid {process} | {message}")
+
+    from rate_limiter import rate_limiter
+    rate_limiter.shared_budget = request_budget
+
+def analyze_for_batch(product: Dict[str, str], extraction_options: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Analyze one product and save the analysis; the analysis is None if it should not be extracted"""
+
+    from product_analyzer import ProductAnalyzer
+
+    summary = {'product_name': product['name'], 'product_url': product['url'], 'status': 'failed'}
+
+    analysis_start = time.perf_counter()
+    analyzer = ProductAnalyzer()
+    analysis = analyzer.analyze_product(product['url'], product['name'])
+    summary['analysis_seconds'] = round(time.perf_counter() - analysis_start, 2)
+
+    if analysis.get('status') != 'success':
+        summary['error'] = analysis.get('error', 'Analysis failed')
+        return summary, None
+
+    summary['product_id'] = analysis.get('product_id')
+    summary['total_combinations'] = analysis.get('total_combinations', 0)
+    summary['analysis_path'] = analyzer.save_analysis(analysis, OUTPUT_DIR).name
+
+    if not analysis['options'] or not analysis.get('product_id'):
+        summary['status'] = 'skipped'
+        summary['error'] = 'No options or product ID found'
+        return summary, None
+
+    max_combinations = extraction_options.get('max_combinations')
+    if max_combinations and summary['total_combinations'] > max_combinations:
+        summary['status'] = 'skipped'
+        summary['error'] = f"{summary['total_combinations']:,} combinations exceed the limit of {max_combinations:,}"
+        return summary, None
+
+    return summary, analysis
+
+def process_product(product: Dict[str, str], extraction_options: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze and extract one product (runs in a worker process)"""
+
+    from price_extractor import PriceExtractor
+
+    summary = {'product_name': product['name'], 'product_url': product['url'], 'status': 'failed'}
+
+    try:
+        summary, analysis = analyze_for_batch(product, extraction_options)
+        if analysis is None:
+            return summary
+
+        extraction_start = time.perf_counter()
+        result = PriceExtractor().extract_all_prices(
+            analysis,
+            mode=extraction_options.get('mode'),
+            resume=extraction_options.get('resume', False),
+            start=extraction_options.get('start'),
+            end=extraction_options.get('end'),
+            refresh=extraction_options.get('refresh', False)
+        )
+        summary['extraction_seconds'] = round(time.perf_counter() - extraction_start, 2)
+
+        summary.update({
+            'status': 'success' if result['total_extracted'] else 'failed',
+            'total_combinations': result['total_combinations'],
+            'total_extracted': result['total_extracted'],
+            'error_count': result['error_count'],
+            'success_rate': round(result['success_rate'], 1),
+            'raw_csv_path': result['raw_csv_path'],
+            'formatted_csv_path': result['formatted_csv_path']
+        })
+        return summary
+
+    except Exception as e:
+        logger.error(f"Batch processing failed for {product['name']}: {e}")
+        summary['error'] = str(e)
+        return summary
+
+def extract_shard(analysis: Dict[str, Any], start: int, end: int, extraction_options: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract combinations ``[start, end)`` of an analyzed product (runs in a worker process)"""
+
+    from price_extractor import PriceExtractor
+
+    return PriceExtractor().extract_all_prices(
+        analysis,
+        mode=extraction_options.get('mode'),
+        resume=extraction_options.get('resume', False),
+        start=start,
+        end=end
+    )
+
+def _process_product_sharded(pool: ProcessPoolExecutor,
+                             product: Dict[str, str],
+                             extraction_options: Dict[str, Any],
+                             shard_count: int) -> Dict[str, Any]:
+    """Analyze one product here, extract its combination ranges across the pool and merge them"""
+
+    from price_extractor import PriceExtractor
+
+    summary = {'product_name': product['name'], 'product_url': product['url'], 'status': 'failed'}
+
+    try:
+        summary, analysis = analyze_for_batch(product, extraction_options)
+        if analysis is None:
+            return summary
+
+        shard_ranges = CombinationIndex(list(analysis['options'].values())).shard_ranges(shard_count)
+
+        extraction_start = time.perf_counter()
+        futures = [pool.submit(extract_shard, analysis, start, end, extraction_options) for start, end in shard_ranges]
+        shard_results = [future.result() for future in futures]
+        merged = PriceExtractor().merge_shards(analysis, remove_parts=True)
+        summary['extraction_seconds'] = round(time.perf_counter() - extraction_start, 2)
+
+        summary.update({
+            'status': 'success' if merged['total_extracted'] else 'failed',
+            'total_extracted': merged['total_extracted'],
+            'error_count': sum(result['error_count'] for result in shard_results),
+            'success_rate': round(merged['success_rate'], 1),
+            'raw_csv_path': merged['raw_csv_path'],
+            'formatted_csv_path': merged['formatted_csv_path']
+        })
+        return summary
+
+    except Exception as e:
+        logger.error(f"Sharded extraction failed for {product['name']}: {e}")
+        summary['error'] = str(e)
+        return summary
+
+def merge_product_shards(product: Dict[str, str]) -> Dict[str, Any]:
+    """Merge Raw CSV parts of a product extracted range by range (e.g. on several machines)"""
+
+    from price_extractor import PriceExtractor
+
+    summary = {'product_name': product['name'], 'product_url': product['url'], 'status': 'failed'}
+
+    try:
+        summary, analysis = analyze_for_batch(product, {})
+        if analysis is None:
+            return summary
+
+        merged = PriceExtractor().merge_shards(analysis)
+        summary.update({
+            'status': 'success' if merged['total_extracted'] and not merged['missing_ranges'] else 'failed',
+            'total_extracted': merged['total_extracted'],
+            'success_rate': round(merged['success_rate'], 1),
+            'raw_csv_path': merged['raw_csv_path'],
+            'formatted_csv_path': merged['formatted_csv_path'],
+            'error': f"Missing combination ranges {merged['missing_ranges']}" if merged['missing_ranges'] else None
+        })
+        return summary
+
+    except Exception as e:
+        logger.error(f"Merging shards failed for {product['name']}: {e}")
+        summary['error'] = str(e)
+        return summary
+
+def run_batch(products: List[Dict[str, str]],
+              workers: Optional[int] = None,
+              request_budget_rps: Optional[float] = None,
+              mode: Optional[str] = None,
+              resume: bool = False,
+              max_combinations: Optional[int] = None,
+              site_url: Optional[str] = None,
+              shards: int = 1,
+              combination_range: Optional[Tuple[int, int]] = None,
+              merge: bool = False,
+              refresh: bool = False,
+              log_level: str = 'WARNING') -> Dict[str, Any]:
+    """Process products across a worker pool and write the run summary
+
+    ``workers`` defaults to ``config.batch_workers`` (0 = one per CPU core)
+    and ``request_budget_rps`` to ``config.batch_request_budget_rps``, the
+    combined computePrice rate of all workers.
+
+    By default each worker handles whole products. With ``shards`` > 1
+    products are processed one after another, each split into that many
+    combination ranges extracted across the pool and merged. For runs spread
+    over several machines, ``combination_range`` extracts only that range of
+    every product and ``merge`` combines parts already in the output
+    directory. ``refresh`` re-extracts only what changed since each
+    product's previous Raw CSV (see ``PriceExtractor.extract_all_prices``).
+    """
+
+    if workers is None:
+        workers = config.batch_workers
+    if not workers:
+        workers = os.cpu_count() or 1
+    if shards <= 1:
+        workers = min(workers, len(products) or 1)
+    workers = max(1, workers)
+    if request_budget_rps is None:
+        request_budget_rps = config.batch_request_budget_rps
+
+    request_budget = SharedRequestBudget(request_budget_rps) if request_budget_rps > 0 else None
+    extraction_options = {'mode': mode, 'resume': resume, 'max_combinations': max_combinations, 'refresh': refresh}
+    if combination_range:
+        extraction_options['start'], extraction_options['end'] = combination_range
+    products = [{**product, 'url': _rebase_url(product['url'], site_url)} for product in products]
+
+    logger.info(f"Batch run: {len(products)} products, {workers} workers, request budget {request_budget_rps or 'unlimited'} req/s")
+
+    started_at = datetime.now()
+    run_start = time.perf_counter()
+    summaries = []
+
+    def log_summary(completed: int, summary: Dict[str, Any]):
+        summaries.append(summary)
+        status_icon = {'success': '✅', 'skipped': '⏭️'}.get(summary['status'], '❌')
+        logger.info(
+            f"{status_icon} [{completed}/{len(products)}] {summary['product_name']}: "
+            f"{summary.get('total_extracted') or 0:,}/{summary.get('total_combinations') or 0:,} prices"
+            + (f" ({summary['error']})" if summary.get('error') else '')
+        )
+
+    if merge:
+        for completed, product in enumerate(products, start=1):
+            log_summary(completed, merge_product_shards(product))
+
+    elif shards > 1:
+        # Products are analyzed here, so this process shares the budget too
+        from rate_limiter import rate_limiter
+        rate_limiter.shared_budget = request_budget
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(request_budget, log_level)) as pool:
+            for completed, product in enumerate(products, start=1):
+                log_summary(completed, _process_product_sharded(pool, product, extraction_options, shards))
+
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(request_budget, log_level)) as pool:
+            futures = {pool.submit(process_product, product, extraction_options): product for product in products}
+
+            for completed, future in enumerate(as_completed(futures), start=1):
+                product = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. out of memory)
+                    summary = {'product_name': product['name'], 'product_url': product['url'], 'status': 'failed', 'error': str(e)}
+                log_summary(completed, summary)
+
+    # Keep catalog order in the summary
+    order = {product['name']: i for i, product in enumerate(products)}
+    summaries.sort(key=lambda summary: order.get(summary['product_name'], len(order)))
+
+    run_summary = {
+        'started_at': started_at.isoformat(),
+        'finished_at': datetime.now().isoformat(),
+        'elapsed_seconds': round(time.perf_counter() - run_start, 1),
+        'workers': workers,
+        'request_budget_rps': request_budget_rps,
+        'extraction_mode': mode or config.extraction_mode,
+        'products': len(products),
+        'succeeded': sum(1 for summary in summaries if summary['status'] == 'success'),
+        'skipped': sum(1 for summary in summaries if summary['status'] == 'skipped'),
+        'failed': sum(1 for summary in summaries if summary['status'] == 'failed'),
+        'total_combinations': sum(summary.get('total_combinations') or 0 for summary in summaries),
+        'total_extracted': sum(summary.get('total_extracted') or 0 for summary in summaries),
+        'results': summaries
+    }
+
+    run_summary['summary_path'] = str(save_run_summary(run_summary, OUTPUT_DIR, started_at))
+    logger.success(
+        f"Batch run finished in {run_summary['elapsed_seconds']}s: {run_summary['succeeded']} succeeded, "
+        f"{run_summary['skipped']} skipped, {run_summary['failed']} failed, {run_summary['total_extracted']:,} prices"
+    )
+    return run_summary
+
+def save_run_summary(run_summary: Dict[str, Any], output_dir: Path, started_at: datetime) -> Path:
+    """Write the run summary as JSON plus a per-product CSV; returns the JSON path"""
+
+    stamp = started_at.strftime('%Y%m%d_%H%M%S')
+    json_path = output_dir / f"batch_summary_{stamp}.json"
+    csv_path = output_dir / f"batch_summary_{stamp}.csv"
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(run_summary, f, indent=2, ensure_ascii=False)
+
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(run_summary['results'])
+
+    logger.info(f"Saved batch summary to: {json_path}")
+    return json_path
+
+def _analyze_catalog_product(product: Dict[str, str],
+                             parse_pool: ProcessPoolExecutor,
+                             page_limiter: AdaptiveRateLimiter) -> Dict[str, Any]:
+    """Analyze one product for the catalog index (runs in a fetch thread) and save the analysis"""
+
+    from product_analyzer import ProductAnalyzer
+
+    entry = {'product_name': product['name'], 'product_url': product['url'], 'status': 'failed'}
+
+    try:
+        analysis_start = time.perf_counter()
+        analyzer = ProductAnalyzer(page_limiter=page_limiter)
+        analysis = analyzer.analyze_product(product['url'], product['name'], parse_pool=parse_pool)
+        entry['analysis_seconds'] = round(time.perf_counter() - analysis_start, 2)
+        entry['page_cache'] = analysis.get('page_cache')
+
+        if analysis.get('status') != 'success':
+            entry['error'] = analysis.get('error', 'Analysis failed')
+            return entry
+
+        options = analysis.get('options') or {}
+        entry.update({
+            'status': 'success',
+            'product_id': analysis.get('product_id'),
+            'option_count': len(options),
+            'option_values': ' x '.join(f"{name}:{len(values)}" for name, values in options.items()),
+            'total_combinations': analysis.get('total_combinations', 0),
+            'analysis_path': analyzer.save_analysis(analysis, OUTPUT_DIR).name
+        })
+        return entry
+
+    except Exception as e:
+        logger.error(f"Catalog analysis failed for {product['name']}: {e}")
+        entry['error'] = str(e)
+        return entry
+
+def analyze_catalog(products: List[Dict[str, str]],
+                    workers: Optional[int] = None,
+                    fetch_workers: Optional[int] = None,
+                    page_rate: Optional[float] = None,
+                    request_budget_rps: Optional[float] = None,
+                    site_url: Optional[str] = None,
+                    log_level: str = 'WARNING') -> Dict[str, Any]:
+    """Analyze every product without extracting and write a catalog index
+
+    Product pages are downloaded by ``fetch_workers`` threads (default
+    ``config.catalog_fetch_workers``) at no more than ``page_rate`` pages
+    per second (``config.catalog_page_rps``, backing off on 429 and 5xx),
+    and parsed by ``workers`` processes (``config.batch_workers``, 0 = one
+    per CPU core). The API test of each product is a computePrice call
+    paced by ``rate_limiter`` and ``request_budget_rps``.
+
+    Each analysis is saved with ``ProductAnalyzer.save_analysis``. The index
+    ranks products by combination count, with the estimated extraction cost
+    (one computePrice request per combination) at the request budget.
+    """
+
+    if workers is None:
+        workers = config.batch_workers
+    if not workers:
+        workers = os.cpu_count() or 1
+    if fetch_workers is None:
+        fetch_workers = config.catalog_fetch_workers
+    fetch_workers = max(1, min(fetch_workers, len(products) or 1))
+    workers = max(1, min(workers, fetch_workers))
+    if page_rate is None:
+        page_rate = config.catalog_page_rps
+    if request_budget_rps is None:
+        request_budget_rps = config.batch_request_budget_rps
+
+    # API tests run in the fetch threads of this process
+    from rate_limiter import rate_limiter
+    rate_limiter.shared_budget = SharedRequestBudget(request_budget_rps) if request_budget_rps > 0 else None
+
+    page_limiter = AdaptiveRateLimiter(
+        initial_rate=page_rate,
+        min_rate=min(config.rate_limit_min_rps, page_rate),
+        max_rate=page_rate,
+        burst=fetch_workers,
+        additive_increase=config.rate_limit_increase_rps,
+        decrease_factor=config.rate_limit_decrease_factor,
+        target_p95_latency=config.rate_limit_target_p95_seconds,
+        target_error_rate=config.rate_limit_target_error_rate
+    )
+    products = [{**product, 'url': _rebase_url(product['url'], site_url)} for product in products]
+
+    logger.info(
+        f"Catalog analysis: {len(products)} products, {fetch_workers} fetch threads at {page_rate} pages/s, "
+        f"{workers} parse workers"
+    )
+
+    started_at = datetime.now()
+    run_start = time.perf_counter()
+    entries = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(None, log_level)) as parse_pool, \
+            ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+        futures = {fetch_pool.submit(_analyze_catalog_product, product, parse_pool, page_limiter): product for product in products}
+
+        for completed, future in enumerate(as_completed(futures), start=1):
+            entry = future.result()
+            entries.append(entry)
+            status_icon = '✅' if entry['status'] == 'success' else '❌'
+            logger.info(
+                f"{status_icon} [{completed}/{len(products)}] {entry['product_name']}: "
+                f"{entry.get('total_combinations') or 0:,} combinations"
+                + (f" ({entry['error']})" if entry.get('error') else '')
+            )
+
+    # Estimated extraction cost at the request budget (or the rate limiter ceiling without one)
+    request_rate = request_budget_rps if request_budget_rps > 0 else config.rate_limit_max_rps
+    for entry in entries:
+        if entry['status'] == 'success':
+            entry['estimated_requests'] = entry['total_combinations']
+            entry['estimated_hours'] = round(entry['total_combinations'] / request_rate / 3600, 2)
+
+    # Most expensive products first, failed analyses last in catalog order
+    order = {product['name']: i for i, product in enumerate(products)}
+    entries.sort(key=lambda entry: (
+        entry['status'] != 'success',
+        -(entry.get('total_combinations') or 0),
+        order.get(entry['product_name'], len(order))
+    ))
+    for rank, entry in enumerate(entries, start=1):
+        entry['rank'] = rank
+
+    catalog_index = {
+        'started_at': started_at.isoformat(),
+        'finished_at': datetime.now().isoformat(),
+        'elapsed_seconds': round(time.perf_counter() - run_start, 1),
+        'workers': workers,
+        'fetch_workers': fetch_workers,
+        'page_rate': page_rate,
+        'request_budget_rps': request_budget_rps,
+        'products': len(products),
+        'analyzed': sum(1 for entry in entries if entry['status'] == 'success'),
+        'failed': sum(1 for entry in entries if entry['status'] == 'failed'),
+        'page_cache_hits': sum(1 for entry in entries if entry.get('page_cache') in ('not_modified', 'unchanged')),
+        'total_combinations': sum(entry.get('total_combinations') or 0 for entry in entries),
+        'estimated_hours': round(sum(entry.get('estimated_hours') or 0 for entry in entries), 2),
+        'results': entries
+    }
+
+    catalog_index['index_path'] = str(save_catalog_index(catalog_index, OUTPUT_DIR, started_at))
+    logger.success(
+        f"Catalog analysis finished in {catalog_index['elapsed_seconds']}s: {catalog_index['analyzed']} analyzed, "
+        f"{catalog_index['failed']} failed, {catalog_index['total_combinations']:,} combinations "
+        f"(~{catalog_index['estimated_hours']:,} h to extract at {request_rate} req/s)"
+    )
+    return catalog_index
+
+def save_catalog_index(catalog_index: Dict[str, Any], output_dir: Path, started_at: datetime) -> Path:
+    """Write the catalog index as JSON plus a ranked CSV; returns the JSON path"""
+
+    stamp = started_at.strftime('%Y%m%d_%H%M%S')
+    json_path = output_dir / f"catalog_index_{stamp}.json"
+    csv_path = output_dir / f"catalog_index_{stamp}.csv"
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog_index, f, indent=2, ensure_ascii=False)
+
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CATALOG_INDEX_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(catalog_index['results'])
+
+    logger.info(f"Saved catalog index to: {json_path}")
+    return json_path
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Extraction Benchmark Module
+==========================
+
+Benchmarks product analysis and price extraction against the offline mock
+calculator (``mock_calculator.py``).
+
+The mock is started once; every extraction mode then runs in its own worker
+process so peak RSS is measured per mode. Each worker analyzes the mock
+product page, extracts every combination and reports combinations/sec,
+computePrice p50/p99 latency, peak RSS and how many prices differ from the
+Raw CSV the mock serves.
+
+Usage:
+  python benchmark.py --product "Flat Greeting Cards" --modes sequential,async
+  python benchmark.py --latency-ms 120 --error-429 0.02 --report output/benchmark.json
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import argparse
+import csv
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import requests
+from loguru import logger
+
+BASE_DIR = Path(__file__).parent
+
+# Forwarded unchanged to mock_calculator.py
+MOCK_OPTIONS = ['latency', 'latency_ms', 'latency_spread', 'error_412', 'error_429', 'error_5xx', 'seed']
+
+def _free_port() -> int:
+    """Pick an unused local TCP port"""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB"""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+def _price_mismatches(expected_csv: Path, actual_csv: Path) -> int:
+    """Rows whose price differs from the source Raw CSV (matched by option IDs)"""
+
+    def load(path):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            id_columns = sorted(column for column in reader.fieldnames if column.endswith('_id') and column != 'combination_id')
+            return {tuple((column, row[column]) for column in id_columns): row['price'] for row in reader}
+
+    expected, actual = load(expected_csv), load(actual_csv)
+    return sum(1 for key, price in actual.items() if expected.get(key) != price)
+
+def run_worker(args):
+    """Analyze and extract one product against the mock; prints one JSON line of metrics"""
+
+    from loguru import logger as worker_logger
+    worker_logger.remove()
+    worker_logger.add(sys.stderr, level=args.log_level)
+
+    from config import OUTPUT_DIR
+    from product_analyzer import ProductAnalyzer
+    from price_extractor import PriceExtractor
+    from rate_limiter import rate_limiter
+
+    # Client-side computePrice latencies, as seen by the rate limiter
+    latencies = []
+    record = rate_limiter.record
+
+    def timed_record(latency, *record_args, **record_kwargs):
+        latencies.append(latency)
+        return record(latency, *record_args, **record_kwargs)
+
+    rate_limiter.record = timed_record
+
+    analysis_start = time.perf_counter()
+    analysis = ProductAnalyzer().analyze_product(args.product_url, args.product)
+    analysis_seconds = time.perf_counter() - analysis_start
+    if analysis.get('status') != 'success':
+        print(json.dumps({'mode': args.mode, 'error': analysis.get('error', 'analysis failed')}))
+        return
+
+    analysis_latencies = len(latencies)
+    extraction_start = time.perf_counter()
+    result = PriceExtractor().extract_all_prices(
+        analysis,
+        mode=args.mode,
+        sparse_quantity=args.sparse_quantity,
+        probe_invariance=args.probe_invariance
+    )
+    extraction_seconds = time.perf_counter() - extraction_start
+    extraction_latencies = latencies[analysis_latencies:]
+
+    print(json.dumps({
+        'mode': args.mode,
+        'combinations': result['total_combinations'],
+        'extracted': result['total_extracted'],
+        'errors': result['error_count'],
+        'requests': len(extraction_latencies),
+        'analysis_seconds': round(analysis_seconds, 3),
+        'extraction_seconds': round(extraction_seconds, 3),
+        'combinations_per_second': round(result['total_combinations'] / extraction_seconds, 1) if extraction_seconds else 0.0,
+        'latency_p50_ms': round(_percentile(extraction_latencies, 50) * 1000, 1),
+        'latency_p99_ms': round(_percentile(extraction_latencies, 99) * 1000, 1),
+        'peak_rss_mb': _peak_rss_mb(),
+        'price_mismatches': _price_mismatches(Path(args.expected_csv), OUTPUT_DIR / result['raw_csv_path'])
+    }))
+
+def _start_mock(args, port: int) -> subprocess.Popen:
+    """Start the mock calculator and wait until it answers"""
+
+    command = [sys.executable, str(BASE_DIR / 'mock_calculator.py'), '--port', str(port), '--output-dir', str(args.output_dir)]
+    for option in MOCK_OPTIONS:
+        value = getattr(args, option)
+        if value is not None:
+            command += [f"--{option.replace('_', '-')}", str(value)]
+
+    process = subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Mock calculator exited: {process.stderr.read().decode(errors='replace')[-500:]}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/__stats", timeout=1)
+            return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError('Mock calculator did not start within 30 seconds')
+
+def run_benchmark(args) -> List[Dict[str, Any]]:
+    """Run every requested mode against a fresh mock server"""
+
+    sys.path.insert(0, str(BASE_DIR))
+    from config import config
+    from mock_calculator import MockCatalog
+
+    # Same page paths as the mock server, which takes them from the catalog CSV
+    catalog = MockCatalog.from_output_dir(args.output_dir, Path(config.products_csv_path))
+    product = catalog.by_name.get(args.product)
+    if product is None:
+        raise SystemExit(f"Product '{args.product}' not found; available: {', '.join(sorted(catalog.by_name))}")
+
+    port = _free_port()
+    mock = _start_mock(args, port)
+    results = []
+
+    try:
+        for mode in args.modes.split(','):
+            for repeat in range(args.repeat):
+                with tempfile.TemporaryDirectory(prefix='benchmark_') as work_dir:
+                    # Fresh output, cache and checkpoints for every run; never overwrite the mock's CSVs
+                    env = dict(os.environ)
+                    env.update({
+                        'UPRINTING_API_BASE_URL': f"http://127.0.0.1:{port}/v1",
+                        'OUTPUT_DIRECTORY': str(Path(work_dir) / 'output'),
+                        'TEMP_DIRECTORY': str(Path(work_dir) / 'temp'),
+                        'LOGS_DIRECTORY': str(Path(work_dir) / 'logs'),
+                        'RESPONSE_CACHE_ENABLED': 'false',
+                        'CHECKPOINT_ENABLED': 'false'
+                    })
+
+                    command = [
+                        sys.executable, str(BASE_DIR / 'benchmark.py'), '--worker',
+                        '--mode', mode,
+                        '--product', product.name,
+                        '--product-url', f"http://127.0.0.1:{port}{product.path}",
+                        '--expected-csv', str(product.source_csv.resolve()),
+                        '--log-level', args.log_level
+                    ]
+                    if args.sparse_quantity:
+                        command.append('--sparse-quantity')
+                    if args.probe_invariance:
+                        command.append('--probe-invariance')
+
+                    completed = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+                    lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+                    if completed.returncode != 0 or not lines:
+                        logger.error(f"Benchmark worker for {mode} failed: {completed.stderr[-1000:]}")
+                        results.append({'mode': mode, 'error': f"exit code {completed.returncode}"})
+                        continue
+
+                    result = json.loads(lines[-1])
+                    result['repeat'] = repeat + 1
+                    results.append(result)
+                    logger.info(f"{mode} run {repeat + 1}: {result.get('combinations_per_second')} combinations/sec")
+
+        server_stats = requests.get(f"http://127.0.0.1:{port}/__stats", timeout=5).json()
+        logger.info(f"Mock server: {server_stats['requests']:,} computePrice calls, statuses {server_stats['status_counts']}, max {server_stats['max_in_flight']} in flight")
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+    return results
+
+def print_report(results: List[Dict[str, Any]]):
+    """Print a results table"""
+
+    columns = [
+        ('mode', 'Mode'), ('combinations', 'Combos'), ('requests', 'Requests'), ('errors', 'Errors'),
+        ('combinations_per_second', 'Combos/s'), ('latency_p50_ms', 'p50 ms'), ('latency_p99_ms', 'p99 ms'),
+        ('peak_rss_mb', 'Peak RSS MB'), ('price_mismatches', 'Mismatches')
+    ]
+    rows = [[str(result.get(key, result.get('error', '-') if key == 'combinations' else '-')) for key, _ in columns] for result in results]
+    widths = [max(len(title), *(len(row[i]) for row in rows)) for i, (_, title) in enumerate(columns)]
+
+    print('  '.join(title.ljust(width) for (_, title), width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+def main():
+    """Benchmark entry point"""
+
+    parser = argparse.ArgumentParser(description="Benchmark extraction modes against the offline mock calculator")
+    parser.add_argument('--product', default='Flat Greeting Cards', help='Product name as stored in its Raw CSV')
+    parser.add_argument('--modes', default='sequential,async', help='Comma-separated extraction modes')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per mode')
+    parser.add_argument('--output-dir', type=Path, default=BASE_DIR / 'output', help='Raw CSVs served by the mock')
+    parser.add_argument('--sparse-quantity', action='store_true', help='Interpolate the quantity ladder')
+    parser.add_argument('--probe-invariance', action='store_true', help='Probe for price-invariant options first')
+    parser.add_argument('--report', type=Path, help='Write results as JSON to this file')
+    parser.add_argument('--log-level', default='WARNING')
+
+    # Mock server behaviour
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'lognormal'])
+    parser.add_argument('--latency-ms', type=float)
+    parser.add_argument('--latency-spread', type=float)
+    parser.add_argument('--error-412', type=float)
+    parser.add_argument('--error-429', type=float)
+    parser.add_argument('--error-5xx', type=float)
+    parser.add_argument('--seed', type=int)
+
+    # Internal: one extraction run in a separate process
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--product-url', help=argparse.SUPPRESS)
+    parser.add_argument('--expected-csv', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    logger.remove()
+    logger.add(sys.stderr, level='INFO')
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'arguments': {key: str(value) for key, value in vars(args).items()}, 'results': results}, f, indent=2)
+        logger.info(f"Saved benchmark report to: {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Combination Index Module
+=======================
+
+Mixed-radix addressing of option combinations.
+
+Combination ``i`` (0-based) of the filtered option lists is the mixed-radix
+number whose digits are the value positions of each option, with the last
+option varying fastest. This is exactly ``itertools.product`` order, so
+``combination_id`` in the Raw CSV is always ``index + 1`` and any range of
+combinations can be extracted, sharded or resumed without walking the
+product from the start.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+from typing import Dict, Iterator, List, Tuple
+
+class CombinationIndex:
+    """Mixed-radix index over a list of option value lists"""
+
+    def __init__(self, option_values: List[List[Dict[str, str]]]):
+        self.option_values = option_values
+        self.radices = [len(values) for values in option_values]
+
+        # Stride of each digit: product of the radices after it
+        self.strides = [1] * len(self.radices)
+        for i in range(len(self.radices) - 2, -1, -1):
+            self.strides[i] = self.strides[i + 1] * self.radices[i + 1]
+
+        self.total = self.strides[0] * self.radices[0] if self.radices else 0
+        if any(radix == 0 for radix in self.radices):
+            self.total = 0
+
+    def decode(self, index: int) -> List[int]:
+        """Value positions of combination ``index``"""
+
+        if not 0 <= index < self.total:
+            raise IndexError(f"Combination index {index} out of range [0, {self.total})")
+        return [(index // stride) % radix for stride, radix in zip(self.strides, self.radices)]
+
+    def encode(self, positions: List[int]) -> int:
+        """Combination index of a list of value positions"""
+
+        return sum(position * stride for position, stride in zip(positions, self.strides))
+
+    def combination(self, index: int) -> Tuple[Dict[str, str], ...]:
+        """Option values of combination ``index``"""
+
+        return tuple(values[position] for values, position in zip(self.option_values, self.decode(index)))
+
+    def iter_range(self, start: int = 0, end: int = None) -> Iterator[Tuple[int, Tuple[Dict[str, str], ...]]]:
+        """Yield ``(combination_id, combination)`` for indices in ``[start, end)``
+
+        Decodes ``start`` once and then counts like an odometer, so walking a
+        range costs the same as ``itertools.product``.
+        """
+
+        end = self.total if end is None else min(end, self.total)
+        if start >= end:
+            return
+
+        positions = self.decode(start)
+        combination = [values[position] for values, position in zip(self.option_values, positions)]
+
+        for index in range(start, end):
+            yield index + 1, tuple(combination)
+
+            # Increment the last digit, carrying into earlier ones
+            for digit in range(len(positions) - 1, -1, -1):
+                positions[digit] += 1
+                if positions[digit] < self.radices[digit]:
+                    combination[digit] = self.option_values[digit][positions[digit]]
+                    break
+                positions[digit] = 0
+                combination[digit] = self.option_values[digit][0]
+
+    def shard_ranges(self, shard_count: int) -> List[Tuple[int, int]]:
+        """Split ``[0, total)`` into ``shard_count`` contiguous, near-equal ranges"""
+
+        shard_count = max(1, min(shard_count, self.total or 1))
+        bounds = [self.total * i // shard_count for i in range(shard_count + 1)]
+        return [(bounds[i], bounds[i + 1]) for i in range(shard_count) if bounds[i] < bounds[i + 1]]
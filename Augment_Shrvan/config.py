@@ -51,11 +51,76 @@ class Config:
         self.request_delay_seconds = float(os.getenv('REQUEST_DELAY_SECONDS', '0.02'))
         self.batch_size = int(os.getenv('BATCH_SIZE', '100'))
         self.max_retries = int(os.getenv('MAX_RETRIES', '3'))
+        self.extraction_mode = os.getenv('EXTRACTION_MODE', 'sequential').lower()  # sequential | async
+        self.payload_memo_max_entries = int(os.getenv('PAYLOAD_MEMO_MAX_ENTRIES', '100000'))  # responses shared by duplicate payloads
+        self.price_tensor_max_combinations = int(os.getenv('PRICE_TENSOR_MAX_COMBINATIONS', '50000000'))  # 4 bytes each
+        self.parquet_output_enabled = os.getenv('PARQUET_OUTPUT_ENABLED', 'false').lower() == 'true'  # needs pyarrow
+        
+        # Profiling
+        self.phase_timing_enabled = os.getenv('PHASE_TIMING_ENABLED', 'false').lower() == 'true'
+        self.profiler = os.getenv('PROFILER', 'none').lower()  # none | cprofile | pyinstrument
+        
+        # Product Analysis
+        self.targeted_page_parsing = os.getenv('TARGETED_PAGE_PARSING', 'true').lower() == 'true'  # lxml + calculator form only
+        self.page_cache_enabled = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'  # conditional GETs + cached analyses
+        
+        # Adaptive Rate Limiting (AIMD)
+        self.adaptive_rate_limit = os.getenv('ADAPTIVE_RATE_LIMIT', 'true').lower() == 'true'
+        self.rate_limit_min_rps = float(os.getenv('RATE_LIMIT_MIN_RPS', '1'))
+        self.rate_limit_max_rps = float(os.getenv('RATE_LIMIT_MAX_RPS', '100'))
+        self.rate_limit_increase_rps = float(os.getenv('RATE_LIMIT_INCREASE_RPS', '1'))
+        self.rate_limit_decrease_factor = float(os.getenv('RATE_LIMIT_DECREASE_FACTOR', '0.5'))
+        self.rate_limit_target_p95_seconds = float(os.getenv('RATE_LIMIT_TARGET_P95_SECONDS', '1.5'))
+        self.rate_limit_target_error_rate = float(os.getenv('RATE_LIMIT_TARGET_ERROR_RATE', '0.05'))
+        
+        # Retries, Circuit Breaker and Dead-Letter Queue (MAX_RETRIES above is the retry count)
+        self.retry_base_delay_seconds = float(os.getenv('RETRY_BASE_DELAY_SECONDS', '0.5'))
+        self.retry_max_delay_seconds = float(os.getenv('RETRY_MAX_DELAY_SECONDS', '30'))
+        self.circuit_breaker_enabled = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+        self.circuit_breaker_failure_rate = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', '0.5'))
+        self.circuit_breaker_min_requests = int(os.getenv('CIRCUIT_BREAKER_MIN_REQUESTS', '20'))
+        self.circuit_breaker_cooldown_seconds = float(os.getenv('CIRCUIT_BREAKER_COOLDOWN_SECONDS', '30'))
+        self.dead_letter_retry = os.getenv('DEAD_LETTER_RETRY', 'true').lower() == 'true'
+        
+        # computePrice Response Cache
+        self.response_cache_enabled = os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'  # serves prices up to TTL old
+        self.response_cache_ttl_hours = float(os.getenv('RESPONSE_CACHE_TTL_HOURS', '24'))
+        self.response_cache_max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '500000'))
+        
+        # Price-Invariance Probing
+        self.invariance_probe_enabled = os.getenv('INVARIANCE_PROBE_ENABLED', 'false').lower() == 'true'
+        self.invariance_probe_samples = int(os.getenv('INVARIANCE_PROBE_SAMPLES', '3'))
+        
+        # Sparse Quantity Ladder
+        self.sparse_quantity_enabled = os.getenv('SPARSE_QUANTITY_ENABLED', 'false').lower() == 'true'
+        self.sparse_quantity_anchors = int(os.getenv('SPARSE_QUANTITY_ANCHORS', '6'))
+        self.sparse_quantity_verify_points = int(os.getenv('SPARSE_QUANTITY_VERIFY_POINTS', '2'))
+        self.sparse_quantity_tolerance = float(os.getenv('SPARSE_QUANTITY_TOLERANCE', '0.01'))
+        
+        # Delta Refresh
+        self.refresh_samples_per_slice = int(os.getenv('REFRESH_SAMPLES_PER_SLICE', '1'))
+        
+        # Price History (changed prices only, across runs)
+        self.price_history_enabled = os.getenv('PRICE_HISTORY_ENABLED', 'true').lower() == 'true'
+        
+        # Learned option → attrN mappings (confirmed by computePrice 200 responses)
+        self.attribute_registry_enabled = os.getenv('ATTRIBUTE_REGISTRY_ENABLED', 'true').lower() == 'true'
+        
+        # Extraction Checkpoints
+        self.checkpoint_enabled = os.getenv('CHECKPOINT_ENABLED', 'true').lower() == 'true'
+        
+        # Batch CLI
+        self.batch_workers = int(os.getenv('BATCH_WORKERS', '0'))  # 0 = one per CPU core
+        self.batch_request_budget_rps = float(os.getenv('BATCH_REQUEST_BUDGET_RPS', '50'))
+        self.catalog_fetch_workers = int(os.getenv('CATALOG_FETCH_WORKERS', '8'))  # --analyze-only page downloads
+        self.catalog_page_rps = float(os.getenv('CATALOG_PAGE_RPS', '5'))
         
         # Directory Settings
         self.output_directory = Path(os.getenv('OUTPUT_DIRECTORY', './output'))
         self.logs_directory = Path(os.getenv('LOGS_DIRECTORY', './logs'))
         self.temp_directory = Path(os.getenv('TEMP_DIRECTORY', './temp'))
+        self.price_history_path = Path(os.getenv('PRICE_HISTORY_PATH', str(self.output_directory / 'price_history.sqlite')))
+        self.attribute_registry_path = Path(os.getenv('ATTRIBUTE_REGISTRY_PATH', str(self.output_directory / 'attribute_registry.sqlite')))
         
         # Create directories if they don't exist
         for directory in [self.output_directory, self.logs_directory, self.temp_directory]:
@@ -65,6 +130,7 @@ class Config:
         self.web_host = os.getenv('WEB_HOST', 'localhost')
         self.web_port = int(os.getenv('WEB_PORT', '8080'))
         self.debug_mode = os.getenv('DEBUG_MODE', 'true').lower() == 'true'
+        self.metrics_enabled = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'  # /metrics endpoint
         
         # UPrinting Request Headers
         self.uprinting_headers = {
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Extraction Journal Module
+========================
+
+Append-only checkpoint journal for long price extractions.
+
+Every successful combination is appended as one JSON line holding its
+combination index and the price fields of its computePrice response. A
+restarted extraction with ``resume=True`` reads the journal back and only
+calls the API for combinations that are not in it.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from loguru import logger
+
+from config import config
+
+# Response fields needed to rebuild a Raw CSV row
+JOURNAL_FIELDS = ('price', 'total_price', 'qty', 'turnaround', 'unit_price')
+
+class ExtractionJournal:
+    """Append-only JSONL journal of completed combinations for one extraction"""
+
+    def __init__(self, path: Path, fsync_every: int = 100):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self._file = None
+        self._lock = threading.Lock()
+        self._writes_since_sync = 0
+
+    @classmethod
+    def for_run(cls,
+                product_name: str,
+                product_id: str,
+                option_names: List[str],
+                option_values: List[List[Dict[str, str]]],
+                excluded_option_defaults: Dict[str, Dict[str, str]],
+                attr_mappings: Dict[str, str],
+                shard: Optional[Tuple[int, int]] = None) -> 'ExtractionJournal':
+        """Journal for one product and option set, or one combination range of it
+
+        The file name carries a fingerprint of everything that decides which
+        combination an index refers to, so changing exclusions or mappings
+        never resumes from an incompatible journal. Shards of one product
+        running in parallel each get their own journal.
+        """
+
+        fingerprint_fields = {
+            'product_id': product_id,
+            'options': [[name, [value['id'] for value in values]] for name, values in zip(option_names, option_values)],
+            'defaults': {name: value['id'] for name, value in sorted(excluded_option_defaults.items())},
+            'mappings': dict(sorted(attr_mappings.items()))
+        }
+        if shard:
+            fingerprint_fields['shard'] = list(shard)
+        fingerprint_source = json.dumps(fingerprint_fields, sort_keys=True)
+        fingerprint = hashlib.sha1(fingerprint_source.encode('utf-8')).hexdigest()[:12]
+
+        safe_name = re.sub(r'[^\w\s-]', '', product_name).strip()
+        safe_name = re.sub(r'[-\s]+', '_', safe_name)[:50]
+
+        return cls(config.temp_directory / 'checkpoints' / f"{safe_name}_{fingerprint}.jsonl")
+
+    def exists(self) -> bool:
+        """Whether a journal from a previous run is on disk"""
+        return self.path.exists()
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Read journaled combinations, ignoring a torn final line from a crash"""
+
+        entries = {}
+        if not self.path.exists():
+            return entries
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    entry = json.loads(line)
+                    entries[int(entry['index'])] = entry['response']
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    logger.warning(f"Skipping unreadable journal line {line_number} in {self.path.name}")
+
+        logger.info(f"Loaded {len(entries):,} journaled combinations from {self.path.name}")
+        return entries
+
+    def open(self, resume: bool):
+        """Open the journal for appending, truncating it unless resuming"""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def append(self, index: int, api_result: Dict[str, Any]):
+        """Record one completed combination"""
+
+        if self._file is None:
+            return
+
+        line = json.dumps({
+            'index': index,
+            'response': {field: api_result.get(field) for field in JOURNAL_FIELDS}
+        })
+
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._writes_since_sync += 1
+            if self._writes_since_sync >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._writes_since_sync = 0
+
+    def close(self):
+        """Flush and close the journal file"""
+
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """Close and delete the journal once the extraction has completed"""
+
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+            logger.debug(f"Removed extraction journal {self.path.name}")
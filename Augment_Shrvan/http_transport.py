@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport Module
+====================
+
+Shared HTTP sessions for product page fetches and computePrice calls.
+
+One ``requests`` session per process carries a keep-alive connection pool
+sized to ``config.max_concurrent_requests``, so the analyzer, the extractor
+and every job started from the web interface reuse connections to the same
+host instead of opening new ones. aiohttp sessions are bound to the event
+loop of a run and are created here with the same headers and pool size.
+
+computePrice bodies are decoded with ``orjson`` when it is installed and
+trimmed to the fields the extractor reads; ``br`` is negotiated only when a
+brotli decoder is available.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Any, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from loguru import logger
+
+from config import config, UPRINTING_HEADERS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# computePrice response fields used by the extractor, cache and CSVs
+PRICE_FIELDS = ('price', 'total_price', 'qty', 'turnaround', 'unit_price')
+
+def _brotli_available() -> bool:
+    """Whether responses compressed with br can be decoded"""
+
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if _brotli_available() else 'gzip, deflate'
+
+def loads(body: Union[bytes, str]) -> Any:
+    """Decode a JSON body, with orjson when available
+
+    ``orjson.JSONDecodeError`` subclasses ``json.JSONDecodeError``, so
+    callers handle both decoders the same way.
+    """
+
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def decode_price_response(body: Union[bytes, str]) -> Dict[str, Any]:
+    """Decode a computePrice response, keeping only ``PRICE_FIELDS``"""
+
+    data = loads(body)
+    if not isinstance(data, dict):
+        return data
+    return {field: data[field] for field in PRICE_FIELDS if field in data}
+
+class HttpTransport:
+    """Process-wide keep-alive sessions sized for the extraction concurrency"""
+
+    def __init__(self, pool_size: int, headers: Dict[str, str]):
+        self.pool_size = max(1, pool_size)
+        self.headers = dict(headers, **{'Accept-Encoding': ACCEPT_ENCODING})
+
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'HttpTransport':
+        """Create a transport from the framework configuration"""
+
+        return cls(pool_size=config.max_concurrent_requests, headers=UPRINTING_HEADERS)
+
+    @property
+    def session(self) -> requests.Session:
+        """The shared ``requests`` session, created once per process"""
+
+        with self._lock:
+            # Worker processes must not share the parent's sockets
+            if self._session is None or self._session_pid != os.getpid():
+                self._session = self._create_session()
+                self._session_pid = os.getpid()
+            return self._session
+
+    def _create_session(self) -> requests.Session:
+        """Session with a sized pool; only connection setup is retried here (see RetryPolicy for the rest)"""
+
+        session = requests.Session()
+        session.headers.update(self.headers)
+
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(10, self.pool_size),
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        logger.debug(f"HTTP transport: keep-alive pool of {max(10, self.pool_size)} connections per host")
+        return session
+
+    def create_async_session(self, max_in_flight: Optional[int] = None, timeout: float = 15):
+        """aiohttp session for one run, with a keep-alive pool of ``max_in_flight`` connections"""
+
+        import aiohttp
+
+        limit = max(1, max_in_flight or self.pool_size)
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit, ttl_dns_cache=300, keepalive_timeout=30)
+        return aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=connector
+        )
+
+# Global transport shared by the analyzer and extractor
+http_transport = HttpTransport.from_config()
@@ -20,8 +20,8 @@ sys.path.append(str(Path(__file__).parent))
 
 from config import config
 from web_interface import run_web_interface
-from product_analyzer import ProductAnalyzer
-from price_extractor import PriceExtractor
+from price_extractor import EXTRACTION_MODES
+from batch_runner import load_catalog, run_batch, analyze_catalog
 
 def setup_logging():
     """Setup logging configuration"""
@@ -69,17 +69,58 @@ def validate_environment():
     
     return True
 
-def run_cli_mode():
+def _parse_range(value: str):
+    """Parse a START:END combination range"""
+    
+    try:
+        start, end = (int(part) for part in value.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid combination range '{value}', expected START:END")
+    return start, end
+
+def run_cli_mode(args):
     """Run in CLI mode for batch processing"""
     
     logger.info("Starting CLI mode...")
     
-    # TODO: Implement CLI batch processing
-    # This would allow running the framework without the web interface
-    # for automated batch processing of all products
+    products = load_catalog(Path(config.products_csv_path), match=args.match, limit=args.limit)
+    if not products:
+        logger.error("No products to process")
+        sys.exit(1)
     
-    logger.info("CLI mode not yet implemented. Use web interface instead.")
-    logger.info(f"Run: python main.py --web")
+    if args.analyze_only:
+        catalog_index = analyze_catalog(
+            products,
+            workers=args.workers,
+            fetch_workers=args.fetch_workers,
+            page_rate=args.page_rate,
+            request_budget_rps=args.request_budget,
+            site_url=args.site_url,
+            log_level='DEBUG' if args.debug else 'WARNING'
+        )
+        logger.info(f"📄 Catalog index: {catalog_index['index_path']}")
+        if catalog_index['failed']:
+            sys.exit(2)
+        return
+    
+    run_summary = run_batch(
+        products,
+        workers=args.workers,
+        request_budget_rps=args.request_budget,
+        mode=args.mode,
+        resume=args.resume,
+        max_combinations=args.max_combinations,
+        site_url=args.site_url,
+        shards=args.shards,
+        combination_range=_parse_range(args.range) if args.range else None,
+        merge=args.merge,
+        refresh=args.refresh,
+        log_level='DEBUG' if args.debug else 'WARNING'
+    )
+    
+    logger.info(f"📄 Run summary: {run_summary['summary_path']}")
+    if run_summary['failed']:
+        sys.exit(2)
 
 def run_web_mode():
     """Run web interface mode"""
@@ -105,6 +146,8 @@ def main():
 Examples:
   python main.py --web                 # Start web interface (default)
   python main.py --cli                 # Run in CLI mode (batch processing)
+  python main.py --cli --workers 8 --request-budget 40 --match envelopes
+  python main.py --cli --analyze-only  # Analyze the whole catalog and rank it by combinations
   python main.py --validate           # Validate configuration only
         """
     )
@@ -122,6 +165,23 @@ Examples:
         help='Run in CLI mode for batch processing'
     )
     
+    batch_group = parser.add_argument_group('batch options (with --cli)')
+    batch_group.add_argument('--workers', type=int, default=None, help='Worker processes (default: BATCH_WORKERS, 0 = one per core)')
+    batch_group.add_argument('--request-budget', type=float, default=None, help='computePrice requests/second across all workers (default: BATCH_REQUEST_BUDGET_RPS)')
+    batch_group.add_argument('--mode', choices=EXTRACTION_MODES, default=None, help='Extraction mode per product (default: EXTRACTION_MODE)')
+    batch_group.add_argument('--match', default=None, help='Only products whose name contains this text')
+    batch_group.add_argument('--limit', type=int, default=None, help='Process at most this many products')
+    batch_group.add_argument('--max-combinations', type=int, default=None, help='Skip products with more combinations than this')
+    batch_group.add_argument('--resume', action='store_true', help='Resume products from their extraction checkpoints')
+    batch_group.add_argument('--refresh', action='store_true', help='Re-check a sample per quantity ladder and re-extract only what changed since the previous run')
+    batch_group.add_argument('--shards', type=int, default=1, help='Split each product into this many combination ranges extracted in parallel')
+    batch_group.add_argument('--range', default=None, help='Only extract combinations START:END of each product (multi-machine runs)')
+    batch_group.add_argument('--merge', action='store_true', help='Merge Raw CSV parts from --range runs into the final CSVs')
+    batch_group.add_argument('--analyze-only', action='store_true', help='Only analyze the products and write a catalog index ranked by combinations')
+    batch_group.add_argument('--fetch-workers', type=int, default=None, help='Page download threads with --analyze-only (default: CATALOG_FETCH_WORKERS)')
+    batch_group.add_argument('--page-rate', type=float, default=None, help='Product pages/second with --analyze-only (default: CATALOG_PAGE_RPS)')
+    batch_group.add_argument('--site-url', default=None, help='Fetch product pages from this host instead (e.g. the mock calculator)')
+    
     parser.add_argument(
         '--validate',
         action='store_true',
@@ -159,7 +219,7 @@ Examples:
     
     try:
         if args.cli:
-            run_cli_mode()
+            run_cli_mode(args)
         else:
             run_web_mode()
             
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+=============
+
+In-process counters, gauges and histograms in the Prometheus text format.
+
+The extractor and analyzer record computePrice latency, status codes, cache
+hits, retries, completed combinations and queue depth, labelled by product.
+The web interface serves the registry at ``/metrics``, so a dashboard can
+plot throughput over a long run (``rate(uprinting_compute_price_requests_total[1m])``).
+Values live in the process that records them; batch worker processes are
+not aggregated. With ``METRICS_ENABLED=false`` every recording call returns
+immediately.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import config
+from rate_limiter import rate_limiter
+from retry_policy import circuit_breaker
+
+# Seconds; computePrice calls usually take 50 ms to 2 s
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+ANALYSIS_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    """'{product="Flyers",status="200"}' for a label set"""
+
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    """Prometheus number formatting"""
+
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def clear(self):
+        """Forget every label set"""
+
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[str]:
+        """Exposition lines of every label set"""
+
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """Value that goes up and down; ``function`` gauges are read at scrape time"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, *args, function: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {_format_value(float(self.function()))}"]
+        return super().samples()
+
+class Histogram(_Metric):
+    """Distribution of observations over cumulative buckets"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics of this process, rendered together for ``/metrics``"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics = {}
+
+    @classmethod
+    def from_config(cls) -> 'MetricsRegistry':
+        """Create a registry from the framework configuration"""
+
+        return cls(enabled=config.metrics_enabled)
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames, function=function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+# Global registry and the framework's metrics
+metrics = MetricsRegistry.from_config()
+
+compute_price_requests = metrics.counter(
+    'uprinting_compute_price_requests_total',
+    'computePrice requests sent, by HTTP status (error = no response)',
+    ('product', 'status')
+)
+compute_price_latency = metrics.histogram(
+    'uprinting_compute_price_latency_seconds',
+    'computePrice request latency',
+    ('product',)
+)
+compute_price_in_flight = metrics.gauge(
+    'uprinting_compute_price_in_flight',
+    'computePrice requests currently awaiting a response',
+    ('product',)
+)
+cache_lookups = metrics.counter(
+    'uprinting_response_cache_lookups_total',
+    'Response cache lookups, by result (hit or miss)',
+    ('product', 'result')
+)
+retries = metrics.counter(
+    'uprinting_compute_price_retries_total',
+    'computePrice requests retried after a transient failure',
+    ('product',)
+)
+combinations_completed = metrics.counter(
+    'uprinting_combinations_completed_total',
+    'Combinations finished, by outcome (success, error or recovered)',
+    ('product', 'outcome')
+)
+queue_depth = metrics.gauge(
+    'uprinting_extraction_queue_depth',
+    'Combinations of the running extraction not finished yet',
+    ('product',)
+)
+product_analyses = metrics.counter(
+    'uprinting_product_analyses_total',
+    'Product analyses, by status (success or failed)',
+    ('status',)
+)
+product_analysis_duration = metrics.histogram(
+    'uprinting_product_analysis_seconds',
+    'Time to fetch and analyze one product page',
+    (),
+    buckets=ANALYSIS_BUCKETS
+)
+rate_limit = metrics.gauge(
+    'uprinting_rate_limit_rps',
+    'computePrice requests per second currently allowed by the adaptive rate limiter',
+    function=lambda: rate_limiter.current_rate
+)
+circuit_breaker_open = metrics.gauge(
+    'uprinting_circuit_breaker_open',
+    '1 while the circuit breaker holds computePrice calls (open or half-open)',
+    function=lambda: 0 if circuit_breaker.state == 'closed' else 1
+)
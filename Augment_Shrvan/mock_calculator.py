@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Mock Calculator Module
+=====================
+
+Offline stand-in for the UPrinting product pages and computePrice endpoint.
+
+Products are loaded from ``output/*_Raw_Prices.csv``: every Raw CSV becomes a
+product page with a ``calculator_<id>`` form and one dropdown per option, and
+``/v1/computePrice`` answers from the extracted prices. Latency, 412/429/5xx
+faults and payload validation are configurable, so the analyzer and the
+extraction engines can be exercised without the live site.
+
+Usage:
+  python mock_calculator.py --port 8765 --latency-ms 80 --error-429 0.01
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import argparse
+import asyncio
+import csv
+import html
+import random
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import urlparse
+from loguru import logger
+
+from config import config
+from payload_template import guess_attribute
+
+# Response fields served from the Raw CSV columns
+RESPONSE_COLUMNS = {
+    'price': 'price',
+    'total_price': 'total_price',
+    'unit_price': 'unit_price',
+    'qty': 'qty_pieces',
+    'turnaround': 'turnaround_days'
+}
+
+class MockProduct:
+    """One product served by the mock: options, attribute numbers and prices"""
+
+    def __init__(self, name: str, product_id: str, path: str):
+        self.name = name
+        self.product_id = product_id
+        self.path = path
+        self.source_csv = None
+        self.options = []  # [(option name, attrN, [(id, text), ...])]
+        self.prices = {}   # tuple of option IDs in option order -> response
+
+    @classmethod
+    def from_raw_csv(cls, raw_csv_path: Path, path: Optional[str] = None) -> Optional['MockProduct']:
+        """Build a product from a Raw CSV written by PriceExtractor"""
+
+        with open(raw_csv_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            header = reader.fieldnames or []
+            option_names = [column for column in header if f"{column}_id" in header]
+            rows = list(reader)
+
+        if not rows or not option_names:
+            logger.warning(f"Skipping {raw_csv_path.name}: no option columns or rows")
+            return None
+
+        name = rows[0]['product_name']
+        product_id = str(10000 + zlib.crc32(name.encode('utf-8')) % 90000)
+        product = cls(name, product_id, path or '/' + re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') + '.html')
+        product.source_csv = Path(raw_csv_path)
+
+        # Keyword guess first; unguessable or clashing options get their own attribute number
+        used_attrs = set()
+        extra_attr = 100
+        values = {option_name: {} for option_name in option_names}
+        for row in rows:
+            for option_name in option_names:
+                values[option_name].setdefault(row[f"{option_name}_id"], row[option_name])
+
+        for option_name in option_names:
+            attr = guess_attribute(option_name)
+            if attr is None or attr in used_attrs:
+                extra_attr += 1
+                attr = f"attr{extra_attr}"
+            used_attrs.add(attr)
+            product.options.append((option_name, attr, list(values[option_name].items())))
+
+        for row in rows:
+            key = tuple(row[f"{option_name}_id"] for option_name in option_names)
+            product.prices[key] = {field: row[column].lstrip('$') for field, column in RESPONSE_COLUMNS.items()}
+
+        return product
+
+    def quote(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Answer a computePrice payload; returns (status, body)"""
+
+        known_attrs = {attr for _, attr, _ in self.options}
+        for key, value in payload.items():
+            if not key.startswith('attr'):
+                continue
+            if key not in known_attrs:
+                return 412, {'ErrorMessage': f"Invalid Attribute ID {key}"}
+            if not str(value).isdigit():
+                return 412, {'ErrorMessage': f"Invalid Attribute Value ID {value}"}
+
+        # Attributes missing from the payload take the product default, like the calculator form
+        key = []
+        for _, attr, values in self.options:
+            value = str(payload.get(attr, values[0][0]))
+            if value not in dict(values):
+                return 412, {'ErrorMessage': f"Invalid Attribute Value ID {value}"}
+            key.append(value)
+
+        response = self.prices.get(tuple(key))
+        if response is None:
+            return 412, {'ErrorMessage': 'Price not available for this combination'}
+        return 200, dict(response)
+
+    def render_page(self) -> str:
+        """Product page in the markup ProductAnalyzer parses"""
+
+        parts = [
+            f"<html><head><title>{html.escape(self.name)}</title></head><body>",
+            f"<h1>{html.escape(self.name)}</h1>",
+            f'<form id="calculator_{self.product_id}" method="post">'
+        ]
+        for _, attr, values in self.options:
+            parts.append(f'<input type="hidden" name="{attr}" value="{html.escape(values[0][0])}">')
+
+        for option_name, attr, values in self.options:
+            parts.append(f"<label>{html.escape(option_name)}:</label>")
+            parts.append('<div class="dropdown">')
+            parts.append(
+                f'<button class="btn dropdown-toggle" type="button" data-attr="{attr[4:]}">'
+                f"{html.escape(values[0][1])}</button>"
+            )
+            parts.append('<ul class="dropdown-menu">')
+            for value_id, text in values:
+                parts.append(
+                    f'<li><a href="#" data-value="{html.escape(value_id)}" data-display="{html.escape(text)}">'
+                    f"{html.escape(text)}</a></li>"
+                )
+            parts.append('</ul></div>')
+
+        parts.append('</form></body></html>')
+        return '\n'.join(parts)
+
+class MockCatalog:
+    """All products loaded from a directory of Raw CSVs"""
+
+    def __init__(self, products: List[MockProduct]):
+        self.products = {product.product_id: product for product in products}
+        self.by_path = {product.path: product for product in products}
+        self.by_name = {product.name: product for product in products}
+
+    @classmethod
+    def from_output_dir(cls, output_dir: Path, products_csv: Optional[Path] = None) -> 'MockCatalog':
+        """Load every ``*_Raw_Prices.csv``; catalog URLs give products their live paths"""
+
+        catalog_paths = {}
+        if products_csv and Path(products_csv).exists():
+            with open(products_csv, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    catalog_paths.setdefault(row['Product Name'], urlparse(row['URL']).path)
+
+        products = []
+        for raw_csv_path in sorted(Path(output_dir).glob('*_Raw_Prices.csv')):
+            product = MockProduct.from_raw_csv(raw_csv_path)
+            if product is None:
+                continue
+            if product.name in catalog_paths:
+                product.path = catalog_paths[product.name]
+            products.append(product)
+
+        logger.info(f"Mock catalog: {len(products)} products, {sum(len(p.prices) for p in products):,} prices")
+        return cls(products)
+
+class LatencyModel:
+    """Response delay drawn from a constant, uniform or lognormal distribution"""
+
+    def __init__(self, distribution: str = 'lognormal', median_ms: float = 80, spread: float = 0.5):
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.spread = spread
+
+    def sample(self) -> float:
+        """Delay in seconds"""
+
+        if self.median_ms <= 0:
+            return 0.0
+        if self.distribution == 'constant':
+            delay_ms = self.median_ms
+        elif self.distribution == 'uniform':
+            delay_ms = random.uniform(self.median_ms * (1 - self.spread), self.median_ms * (1 + self.spread))
+        else:
+            delay_ms = random.lognormvariate(0, self.spread) * self.median_ms
+        return max(0.0, delay_ms) / 1000
+
+class FaultInjector:
+    """Random 412/429/5xx responses at configured rates"""
+
+    def __init__(self, error_412: float = 0.0, error_429: float = 0.0, error_5xx: float = 0.0):
+        self.error_412 = error_412
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+
+    def pick(self) -> Optional[int]:
+        """Status code to fail with, or None to answer normally"""
+
+        roll = random.random()
+        if roll < self.error_429:
+            return 429
+        roll -= self.error_429
+        if roll < self.error_5xx:
+            return random.choice([500, 502, 503])
+        roll -= self.error_5xx
+        if roll < self.error_412:
+            return 412
+        return None
+
+def create_app(catalog: MockCatalog, latency: LatencyModel, faults: FaultInjector):
+    """aiohttp application serving product pages and computePrice"""
+
+    from aiohttp import web
+
+    stats = {'requests': 0, 'in_flight': 0, 'max_in_flight': 0, 'status_counts': {}, 'page_requests': 0, 'pages_not_modified': 0, 'started_at': time.time()}
+
+    def count(status: int):
+        stats['status_counts'][str(status)] = stats['status_counts'].get(str(status), 0) + 1
+
+    async def compute_price(request):
+        stats['requests'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        try:
+            await asyncio.sleep(latency.sample())
+
+            fault = faults.pick()
+            if fault == 429:
+                count(429)
+                return web.json_response({'ErrorMessage': 'Too Many Requests'}, status=429, headers={'Retry-After': '1'})
+            if fault == 412:
+                count(412)
+                return web.json_response({'ErrorMessage': 'Precondition Failed (injected)'}, status=412)
+            if fault:
+                count(fault)
+                return web.Response(status=fault, text='Service Unavailable')
+
+            try:
+                payload = await request.json()
+            except ValueError:
+                count(400)
+                return web.json_response({'ErrorMessage': 'Request body is not JSON'}, status=400)
+
+            if not isinstance(payload, dict) or not payload.get('product_id'):
+                count(412)
+                return web.json_response({'ErrorMessage': 'Missing product_id'}, status=412)
+
+            product = catalog.products.get(str(payload['product_id']))
+            if product is None:
+                count(412)
+                return web.json_response({'ErrorMessage': f"Invalid Product ID {payload['product_id']}"}, status=412)
+
+            status, body = product.quote(payload)
+            count(status)
+            return web.json_response(body, status=status)
+        finally:
+            stats['in_flight'] -= 1
+
+    async def product_page(request):
+        product = catalog.by_path.get(request.path)
+        if product is None:
+            raise web.HTTPNotFound()
+        stats['page_requests'] += 1
+        await asyncio.sleep(latency.sample())
+
+        # Pages carry an ETag, so conditional GETs can be answered with 304
+        page = product.render_page()
+        etag = f'"{zlib.crc32(page.encode("utf-8")):08x}"'
+        if request.headers.get('If-None-Match') == etag:
+            stats['pages_not_modified'] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=page, content_type='text/html', headers={'ETag': etag})
+
+    async def index(request):
+        links = ''.join(
+            f'<li><a href="{html.escape(product.path)}">{html.escape(product.name)}</a></li>'
+            for product in catalog.products.values()
+        )
+        return web.Response(text=f"<html><body><ul>{links}</ul></body></html>", content_type='text/html')
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post('/v1/computePrice', compute_price)
+    app.router.add_get('/__stats', get_stats)
+    app.router.add_get('/', index)
+    app.router.add_get('/{path:.+}', product_page)
+    return app
+
+def main():
+    """Run the mock server from the command line"""
+
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description="Offline mock of the UPrinting calculator")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output-dir', type=Path, default=config.output_directory, help='Directory with *_Raw_Prices.csv files')
+    parser.add_argument('--products-csv', type=Path, default=Path(config.products_csv_path), help='Catalog CSV used for product page paths')
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Median response delay')
+    parser.add_argument('--latency-spread', type=float, default=0.5, help='Lognormal sigma, or relative half-width for uniform')
+    parser.add_argument('--error-412', type=float, default=0.0, help='Fraction of computePrice calls answered with 412')
+    parser.add_argument('--error-429', type=float, default=0.0, help='Fraction of computePrice calls answered with 429')
+    parser.add_argument('--error-5xx', type=float, default=0.0, help='Fraction of computePrice calls answered with 500/502/503')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    catalog = MockCatalog.from_output_dir(args.output_dir, args.products_csv)
+    app = create_app(
+        catalog,
+        LatencyModel(args.latency, args.latency_ms, args.latency_spread),
+        FaultInjector(args.error_412, args.error_429, args.error_5xx)
+    )
+
+    logger.info(f"Mock calculator listening on http://{args.host}:{args.port}")
+    for product in catalog.products.values():
+        logger.info(f"  {product.name}: http://{args.host}:{args.port}{product.path} (product_id {product.product_id})")
+
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Page Cache Module
+================
+
+Persistent SQLite cache of product pages for the analyzer.
+
+Each product URL keeps its ``ETag``/``Last-Modified`` validators, the
+calculator markup the analyzer parses (the ``calculator_*`` form, or the
+whole page when no form was found), a fingerprint of that markup and the
+last successful analysis. Pages are revalidated with conditional GETs: a
+``304 Not Modified``, or a 200 whose calculator fingerprint is unchanged,
+returns the stored analysis without parsing, and ``find_option_ids``
+searches the stored markup instead of downloading the page again.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Any
+from loguru import logger
+
+from config import config
+
+def fingerprint(markup: str) -> str:
+    """Fingerprint of calculator markup"""
+
+    return hashlib.sha256(markup.encode('utf-8')).hexdigest()
+
+class PageCache:
+    """SQLite-backed product page cache with conditional-GET validators"""
+
+    def __init__(self, db_path: Path, enabled: bool = True):
+        self.db_path = Path(db_path)
+        self.enabled = enabled
+
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'PageCache':
+        """Create a cache from the framework configuration"""
+
+        return cls(db_path=config.temp_directory / 'page_cache.sqlite', enabled=config.page_cache_enabled)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily, once per process (caller holds the lock)"""
+
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fingerprint TEXT NOT NULL,
+                    markup TEXT NOT NULL,
+                    targeted INTEGER NOT NULL,
+                    analysis TEXT,
+                    fetched_at REAL NOT NULL,
+                    validated_at REAL NOT NULL
+                )
+            """)
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached entry of a page, with ``analysis`` decoded, or None"""
+
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                row = self._connect().execute('SELECT * FROM pages WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+
+            entry = dict(row)
+            entry['targeted'] = bool(entry['targeted'])
+            entry['analysis'] = json.loads(entry['analysis']) if entry['analysis'] else None
+            return entry
+
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.warning(f"Page cache read failed: {e}")
+            return None
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """``If-None-Match``/``If-Modified-Since`` headers for revalidating an entry"""
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self,
+            url: str,
+            markup: str,
+            targeted: bool,
+            markup_fingerprint: str,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        """Store a freshly downloaded page; the stored analysis is kept only if the fingerprint is unchanged"""
+
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute("""
+                    INSERT INTO pages (url, etag, last_modified, fingerprint, markup, targeted, analysis, fetched_at, validated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified,
+                        analysis = CASE WHEN pages.fingerprint = excluded.fingerprint THEN pages.analysis ELSE NULL END,
+                        fingerprint = excluded.fingerprint,
+                        markup = excluded.markup,
+                        targeted = excluded.targeted,
+                        fetched_at = excluded.fetched_at,
+                        validated_at = excluded.validated_at
+                """, (url, etag, last_modified, markup_fingerprint, markup, int(targeted), now, now))
+                connection.commit()
+
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+
+    def touch(self, url: str):
+        """Record a successful revalidation (304 Not Modified)"""
+
+        if not self.enabled:
+            return
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute('UPDATE pages SET validated_at = ? WHERE url = ?', (time.time(), url))
+                connection.commit()
+
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+
+    def put_analysis(self, url: str, markup_fingerprint: str, analysis: Dict[str, Any]):
+        """Store the analysis of a page, if the page still has the fingerprint it was analyzed from"""
+
+        if not self.enabled:
+            return
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    'UPDATE pages SET analysis = ? WHERE url = ? AND fingerprint = ?',
+                    (json.dumps(analysis, default=str), url, markup_fingerprint)
+                )
+                connection.commit()
+
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+
+    def clear(self, url: Optional[str] = None):
+        """Remove cached pages, optionally only one"""
+
+        with self._lock:
+            connection = self._connect()
+            if url is None:
+                connection.execute('DELETE FROM pages')
+            else:
+                connection.execute('DELETE FROM pages WHERE url = ?', (url,))
+            connection.commit()
+
+# Global page cache
+page_cache = PageCache.from_config()
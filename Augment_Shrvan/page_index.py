@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Page Index Module
+================
+
+Single-pass index of the product page elements the analyzer reads.
+
+One walk over the parsed page in document order collects the calculator
+form, labels by ``for``, each dropdown, select and radio button with the
+label that BeautifulSoup's ``find_previous``/``find_next`` lookups would
+have returned, hidden ``attr*`` inputs, ``data-attr`` elements and the
+scripts mentioning ``product_id``. The option and attribute extractors
+then read from the index instead of searching the tree once per element,
+which was O(elements x labels) on option-heavy pages.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+CALCULATOR_FORM_ID = re.compile(r'calculator_\d+')
+
+def _has_class(element: Tag, class_name: str) -> bool:
+    return class_name in (element.get('class') or [])
+
+class PageIndex:
+    """Elements of one product page, found in a single traversal"""
+
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+        self.calculator_form: Optional[Tag] = None
+        self.labels_by_for: Dict[str, Tag] = {}
+        # (container, preceding label) per div.dropdown
+        self.dropdowns: List[Tuple[Tag, Optional[Tag]]] = []
+        # (select, label) per select: preceding label for its id, else the preceding label
+        self.selects: List[Tuple[Tag, Optional[Tag]]] = []
+        # (radio, next label) per radio input
+        self.radios: List[Tuple[Tag, Optional[Tag]]] = []
+        # Hidden inputs inside the calculator form
+        self.hidden_inputs: List[Tag] = []
+        # (button, label of its dropdown) per button.dropdown-toggle
+        self.dropdown_buttons: List[Tuple[Tag, Optional[Tag]]] = []
+        self.data_attr_elements: List[Tag] = []
+        self.product_id_scripts: List[Tag] = []
+
+    @classmethod
+    def build(cls, soup: BeautifulSoup) -> 'PageIndex':
+        """Walk the page once, in document order"""
+
+        index = cls(soup)
+        last_label = None
+        labels_seen_by_for = {}
+        dropdown_labels = {}
+        awaiting_next_label = []
+        hidden_inputs = []
+
+        for element in soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+            name = element.name
+
+            if name == 'label':
+                for radio_position in awaiting_next_label:
+                    index.radios[radio_position] = (index.radios[radio_position][0], element)
+                awaiting_next_label = []
+
+                label_for = element.get('for')
+                if label_for:
+                    # soup.find('label', {'for': ...}) returns the first one in the page
+                    index.labels_by_for.setdefault(label_for, element)
+                    labels_seen_by_for[label_for] = element
+                last_label = element
+
+            elif name == 'div' and _has_class(element, 'dropdown'):
+                label = last_label if last_label is not None else element.find('label')
+                index.dropdowns.append((element, label))
+                dropdown_labels[id(element)] = last_label
+
+            elif name == 'select':
+                label = labels_seen_by_for.get(element.get('id', '')) or last_label
+                index.selects.append((element, label))
+
+            elif name == 'input':
+                input_type = element.get('type')
+                if input_type == 'radio':
+                    awaiting_next_label.append(len(index.radios))
+                    index.radios.append((element, None))
+                elif input_type == 'hidden':
+                    hidden_inputs.append(element)
+
+            elif name == 'button' and _has_class(element, 'dropdown-toggle'):
+                container = next((parent for parent in element.parents
+                                  if parent.name == 'div' and _has_class(parent, 'dropdown')), None)
+                label = dropdown_labels.get(id(container)) if container is not None else None
+                index.dropdown_buttons.append((element, label))
+
+            elif name == 'form' and index.calculator_form is None:
+                if CALCULATOR_FORM_ID.search(element.get('id', '')):
+                    index.calculator_form = element
+
+            elif name == 'script' and element.string and 'product_id' in element.string:
+                index.product_id_scripts.append(element)
+
+            if element.get('data-attr') is not None:
+                index.data_attr_elements.append(element)
+
+        if index.calculator_form is not None:
+            form = index.calculator_form
+            index.hidden_inputs = [element for element in hidden_inputs
+                                   if any(parent is form for parent in element.parents)]
+        return index
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Parquet Output Module
+====================
+
+Columnar copy of the Raw CSV for the mapper and analytics notebooks.
+
+Option label, option ID, turnaround and price source columns are
+dictionary-encoded, prices are stored as integer cents, and the columns
+that repeat the same value on every row (product name, notes, timestamps)
+move into the file metadata together with the product analysis. The Raw
+CSV is converted in chunks, so memory stays bounded for large products.
+
+Requires ``pyarrow``; without it Parquet output is skipped with a warning.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import pandas as pd
+from loguru import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# File metadata key holding the analysis and run details as JSON
+METADATA_KEY = b'uprinting'
+
+# Raw CSV columns stored as cents, as numbers, or dropped into the metadata
+CENT_COLUMNS = ['price', 'total_price']
+NUMERIC_COLUMNS = {'unit_price': 'float64', 'qty_pieces': 'int64'}
+METADATA_COLUMNS = ['product_name', 'timestamp', 'notes']
+
+def parquet_available() -> bool:
+    """Whether pyarrow is installed"""
+
+    return pa is not None
+
+def _to_cents(values: pd.Series) -> pd.Series:
+    """'$1,250.00' -> 125000; unparsable prices become null"""
+
+    dollars = pd.to_numeric(values.str.replace('$', '', regex=False).str.replace(',', '', regex=False), errors='coerce')
+    return (dollars * 100).round().astype('Int64')
+
+def _schema(header: List[str], metadata: Dict[str, Any]) -> 'pa.Schema':
+    """Arrow schema for the Raw CSV columns kept in the Parquet file"""
+
+    fields = []
+    for column in header:
+        if column in METADATA_COLUMNS:
+            continue
+        if column == 'combination_id':
+            fields.append(pa.field(column, pa.int64()))
+        elif column in CENT_COLUMNS:
+            fields.append(pa.field(f"{column}_cents", pa.int64()))
+        elif column in NUMERIC_COLUMNS:
+            fields.append(pa.field(column, pa.from_numpy_dtype(NUMERIC_COLUMNS[column])))
+        else:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+
+    return pa.schema(fields, metadata={METADATA_KEY: json.dumps(metadata, default=str).encode('utf-8')})
+
+def _chunk_table(chunk: pd.DataFrame, schema: 'pa.Schema') -> 'pa.Table':
+    """Convert one chunk of Raw CSV rows (read as strings) to the Parquet schema"""
+
+    columns = []
+    for field in schema:
+        name = field.name
+        if name.endswith('_cents') and name[:-len('_cents')] in CENT_COLUMNS:
+            columns.append(pa.array(_to_cents(chunk[name[:-len('_cents')]]), type=field.type, from_pandas=True))
+        elif name == 'combination_id':
+            columns.append(pa.array(chunk[name].astype('int64'), type=field.type))
+        elif name in NUMERIC_COLUMNS:
+            values = pd.to_numeric(chunk[name], errors='coerce')
+            if NUMERIC_COLUMNS[name] == 'int64':
+                values = values.round().astype('Int64')
+            columns.append(pa.array(values, type=field.type, from_pandas=True))
+        else:
+            columns.append(pa.array(chunk[name], type=pa.string()).dictionary_encode())
+
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def write_prices_parquet(raw_csv_path: Path,
+                         parquet_path: Path,
+                         metadata: Dict[str, Any],
+                         chunk_size: int = 100000) -> Optional[Path]:
+    """Convert a Raw CSV into a Parquet file; returns None if pyarrow is missing or the CSV is empty"""
+
+    if not parquet_available():
+        logger.warning("⚠️ pyarrow is not installed; skipping Parquet output")
+        return None
+
+    raw_csv_path, parquet_path = Path(raw_csv_path), Path(parquet_path)
+    header = list(pd.read_csv(raw_csv_path, nrows=0).columns)
+
+    chunks = pd.read_csv(raw_csv_path, dtype=str, keep_default_na=False, chunksize=max(1, chunk_size))
+    first_chunk = next(chunks, None)
+    if first_chunk is None or first_chunk.empty:
+        return None
+
+    # Values that are the same on every row are stored once
+    metadata = dict(metadata)
+    metadata.setdefault('product_name', first_chunk['product_name'].iloc[0] if 'product_name' in first_chunk else None)
+    if 'notes' in first_chunk:
+        metadata.setdefault('notes', first_chunk['notes'].iloc[0])
+
+    schema = _schema(header, metadata)
+    rows = 0
+    first_timestamp = last_timestamp = None
+
+    with pq.ParquetWriter(parquet_path, schema, compression='zstd') as writer:
+        chunk = first_chunk
+        while chunk is not None:
+            writer.write_table(_chunk_table(chunk, schema))
+            rows += len(chunk)
+            if 'timestamp' in chunk:
+                first_timestamp = first_timestamp or chunk['timestamp'].min()
+                last_timestamp = max(last_timestamp or '', chunk['timestamp'].max())
+            chunk = next(chunks, None)
+
+        if first_timestamp:
+            writer.add_key_value_metadata({'extracted_from': first_timestamp, 'extracted_until': last_timestamp})
+
+    logger.info(
+        f"Created Parquet file: {parquet_path} ({rows:,} rows, "
+        f"{parquet_path.stat().st_size / 1024:,.0f} KB vs {raw_csv_path.stat().st_size / 1024:,.0f} KB CSV)"
+    )
+    return parquet_path
+
+def read_prices_parquet(parquet_path: Path, categorical: bool = True) -> pd.DataFrame:
+    """Load a prices Parquet file as a DataFrame in the Raw CSV layout
+
+    Cent columns are turned back into ``price``/``total_price`` in dollars.
+    Option columns stay categorical unless ``categorical`` is False.
+    """
+
+    if not parquet_available():
+        raise ImportError("pyarrow is required to read Parquet price files")
+
+    df = pq.read_table(parquet_path).to_pandas()
+    for column in CENT_COLUMNS:
+        if f"{column}_cents" in df:
+            df[column] = df.pop(f"{column}_cents").astype('float64') / 100
+
+    if not categorical:
+        category_columns = df.select_dtypes('category').columns
+        df[category_columns] = df[category_columns].astype(object)
+
+    return df
+
+def read_parquet_metadata(parquet_path: Path) -> Dict[str, Any]:
+    """Analysis and run details stored in a prices Parquet file"""
+
+    if not parquet_available():
+        raise ImportError("pyarrow is required to read Parquet price files")
+
+    metadata = pq.read_metadata(parquet_path).metadata or {}
+    details = json.loads(metadata.get(METADATA_KEY, b'{}'))
+    for key in (b'extracted_from', b'extracted_until'):
+        if key in metadata:
+            details[key.decode()] = metadata[key].decode()
+    return details
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Payload Template Module
+======================
+
+Resolves product options to computePrice ``attrN`` fields once per analysis
+and compiles them into a template that only needs option IDs filled in.
+``PayloadMemo`` holds the responses of a run by canonical payload.
+
+Options without an explicit attribute mapping are looked up in the
+attribute registry, then guessed from keywords; both live here so
+ProductAnalyzer and PriceExtractor map options identically.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+from loguru import logger
+
+from response_cache import canonical_payload_key
+from attribute_registry import attribute_registry
+
+# Log labels for the attributes guessed from option names
+ATTRIBUTE_LABELS = {
+    'attr1': '📄 Paper',
+    'attr3': '📏 Size',
+    'attr4': '🖨️ Printed side',
+    'attr5': '📊 Quantity',
+    'attr6': '🕒 Printing time',
+    'attr400': '📦 Bundling'
+}
+
+def guess_attribute(option_name: str) -> Optional[str]:
+    """Guess the attrN for an option from its name (order matters)"""
+
+    name = option_name.lower()
+
+    if 'time' in name or 'turnaround' in name or 'rush' in name or 'day' in name:
+        return 'attr6'
+    if 'quantity' in name:
+        return 'attr5'
+    if 'size' in name or 'format' in name:
+        return 'attr3'
+    if 'paper' in name or 'material' in name or 'stock' in name:
+        return 'attr1'
+    if 'page' in name or 'side' in name or 'print' in name:
+        return 'attr4'
+    if 'bundling' in name or 'binding' in name or 'finish' in name:
+        return 'attr400'
+    return None
+
+def resolve_attribute_mappings(option_names: List[str],
+                               attr_mappings: Dict[str, str],
+                               options: Optional[Dict[str, List[Dict[str, str]]]] = None) -> Dict[str, Optional[str]]:
+    """Resolve every option to its attrN: explicit mapping, then the attribute registry, then keyword guess
+
+    ``options`` lets the registry match option value IDs as well as names.
+    """
+
+    unmapped = [name for name in option_names if not attr_mappings.get(name)]
+    learned = attribute_registry.lookup(unmapped, options) if unmapped else {}
+    return {name: attr_mappings.get(name) or learned.get(name) or guess_attribute(name) for name in option_names}
+
+def is_printing_time_option(option_name: str) -> bool:
+    """Whether an option holds printing time IDs"""
+
+    name = option_name.lower()
+    return 'time' in name or 'day' in name
+
+def is_printed_side_option(option_name: str) -> bool:
+    """Whether an option holds printed side IDs"""
+
+    name = option_name.lower()
+    return ('side' in name or 'page' in name) and 'time' not in name
+
+def validate_payload(payload: Dict[str, Any], options_dict: Dict[str, str]) -> Dict[str, Any]:
+    """Validate payload to prevent 412 errors during extraction"""
+
+    # Check for common mismatches that cause 412 errors
+    validation_errors = []
+
+    # Check if printing time IDs are being used for wrong attributes
+    printing_time_ids = {option_id for option_name, option_id in options_dict.items() if is_printing_time_option(option_name)}
+
+    # Validate attr4 (printed side) doesn't use printing time IDs
+    if 'attr4' in payload and payload['attr4'] in printing_time_ids:
+        validation_errors.append(f"attr4 (printed side) using printing time ID {payload['attr4']}")
+
+    # Validate attr6 (printing time) doesn't use printed side IDs
+    printed_side_ids = {option_id for option_name, option_id in options_dict.items() if is_printed_side_option(option_name)}
+
+    if 'attr6' in payload and payload['attr6'] in printed_side_ids:
+        validation_errors.append(f"attr6 (printing time) using printed side ID {payload['attr6']}")
+
+    # Check for duplicate IDs across different attributes
+    used_ids = {}
+    for attr, value in payload.items():
+        if attr.startswith('attr'):
+            if value in used_ids:
+                validation_errors.append(f"ID {value} used for both {used_ids[value]} and {attr}")
+            else:
+                used_ids[value] = attr
+
+    if validation_errors:
+        return {
+            'valid': False,
+            'error': '; '.join(validation_errors),
+            'payload': payload
+        }
+
+    return {'valid': True}
+
+class PayloadTemplate:
+    """Prebuilt computePrice payload for one product and option set
+
+    Compiling resolves each option to the ``attrN`` it fills, drops options
+    that map to nothing or are overwritten by a later option with the same
+    ``attrN``, pins excluded options to their defaults, and works out which
+    option IDs could ever fail validation. ``build`` then only copies IDs
+    into the template, and ``validate`` only runs the full check for
+    combinations that contain one of those IDs.
+    """
+
+    def __init__(self,
+                 product_id: str,
+                 options: Dict[str, List[Dict[str, str]]],
+                 attr_mappings: Dict[str, str],
+                 excluded_option_defaults: Optional[Dict[str, Dict[str, str]]] = None,
+                 exclude_options: Optional[List[str]] = None):
+        self.product_id = product_id
+        self.option_names = list(options.keys())
+        excluded_option_defaults = excluded_option_defaults or {}
+        exclude_options = exclude_options or []
+
+        # Options in the order they are written into the payload; later ones win
+        ordered_names = self.option_names + [name for name in excluded_option_defaults if name not in options]
+        option_values = {**{name: [default] for name, default in excluded_option_defaults.items()}, **options}
+        self.resolved = resolve_attribute_mappings(ordered_names, attr_mappings, option_values)
+
+        winners = {}
+        for name in ordered_names:
+            attr = self.resolved[name]
+            if attr:
+                winners[attr] = name
+            elif name in exclude_options:
+                logger.debug(f"Skipping excluded option: {name}")
+            else:
+                logger.warning(f"⚠️ Unmapped option: {name} (skipping)")
+
+        for name in ordered_names:
+            attr = self.resolved[name]
+            if attr and name not in attr_mappings:
+                logger.info(f"{ATTRIBUTE_LABELS.get(attr, attr)} mapped: {name} → {attr}")
+
+        self.base_payload = {'product_id': product_id}
+        self.slots = []
+        for attr, name in winners.items():
+            if name in options:
+                self.slots.append((name, attr))
+            else:
+                self.base_payload[attr] = excluded_option_defaults[name]['id']
+
+        slot_names = {name for name, _ in self.slots}
+        self.inert_options = [name for name in self.option_names if name not in slot_names]
+
+        # Options found by probing to never change the price
+        self.invariant_options = []
+        self.ignored_attrs = set()
+
+        self.time_option = next((name for name in ordered_names if is_printing_time_option(name) or 'turnaround' in name.lower()), None)
+        self.quantity_option = next((name for name in ordered_names
+                                     if name != self.time_option and ('quantity' in name.lower() or any(char.isdigit() for char in name))), None)
+
+        self.suspect_ids = self._find_suspect_ids(options, excluded_option_defaults)
+
+    def _find_suspect_ids(self,
+                          options: Dict[str, List[Dict[str, str]]],
+                          excluded_option_defaults: Dict[str, Dict[str, str]]) -> set:
+        """IDs that could make some combination fail validation"""
+
+        possible_ids = {name: {value['id'] for value in values} for name, values in options.items()}
+        for name, default in excluded_option_defaults.items():
+            possible_ids.setdefault(name, {default['id']})
+
+        payload_sources = [(attr, {value}) for attr, value in self.base_payload.items() if attr.startswith('attr')]
+        payload_sources += [(attr, possible_ids[name]) for name, attr in self.slots]
+
+        time_ids = set().union(*[ids for name, ids in possible_ids.items() if is_printing_time_option(name)])
+        side_ids = set().union(*[ids for name, ids in possible_ids.items() if is_printed_side_option(name)])
+
+        suspect_ids = set()
+        for i, (attr, ids) in enumerate(payload_sources):
+            if attr == 'attr4':
+                suspect_ids |= ids & time_ids
+            if attr == 'attr6':
+                suspect_ids |= ids & side_ids
+            for _, other_ids in payload_sources[i + 1:]:
+                suspect_ids |= ids & other_ids
+
+        if suspect_ids:
+            logger.warning(f"⚠️ {len(suspect_ids)} option IDs are shared between attributes; those combinations will be validated individually")
+        return suspect_ids
+
+    def build(self, options_dict: Dict[str, str]) -> Dict[str, Any]:
+        """Fill option IDs into the template"""
+
+        payload = self.base_payload.copy()
+        for name, attr in self.slots:
+            payload[attr] = options_dict[name]
+        return payload
+
+    def validate(self, payload: Dict[str, Any], options_dict: Dict[str, str]) -> Dict[str, Any]:
+        """Validate a built payload; only combinations with suspect IDs need the full check"""
+
+        if not self.suspect_ids:
+            return {'valid': True}
+        if not any(value in self.suspect_ids for attr, value in payload.items() if attr.startswith('attr')):
+            return {'valid': True}
+        return validate_payload(payload, options_dict)
+
+    def mark_price_invariant(self, option_names: List[str]):
+        """Treat options as not affecting the price when deduplicating payloads"""
+
+        for name, attr in self.slots:
+            if name in option_names:
+                self.invariant_options.append(name)
+                self.ignored_attrs.add(attr)
+
+    def memo_key(self, payload: Dict[str, Any]) -> str:
+        """Canonical payload key, ignoring attributes of price-invariant options"""
+
+        if not self.ignored_attrs:
+            return canonical_payload_key(payload)
+        return canonical_payload_key({key: value for key, value in payload.items() if key not in self.ignored_attrs})
+
+    def combination_key(self, options_dict: Dict[str, str]) -> str:
+        """Short quantity/printing time key used in price logs"""
+
+        quantity_option = f"{self.quantity_option}:{options_dict[self.quantity_option]}" if self.quantity_option in options_dict else None
+        printing_time_option = f"{self.time_option}:{options_dict[self.time_option]}" if self.time_option in options_dict else None
+        return f"Q:{quantity_option}_T:{printing_time_option}"
+
+    def unique_payload_count(self, options: Dict[str, List[Dict[str, str]]]) -> int:
+        """Number of distinct payloads the option set can produce"""
+
+        count = 1
+        for name, _ in self.slots:
+            if name not in self.invariant_options:
+                count *= max(1, len(options[name]))
+        return count
+
+class PayloadMemo:
+    """Bounded per-run memo of computePrice responses by canonical payload
+
+    Holds the price fields of at most ``max_entries`` responses and evicts
+    the least recently used one beyond that, so memory stays flat however
+    many unique payloads a product has; an evicted payload is simply
+    requested again. ``in_flight`` maps payloads whose first request is
+    still running (async engine) to the future its duplicates wait on.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self.in_flight = {}
+        self._responses = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored response fields of a payload, or None"""
+
+        response = self._responses.get(key)
+        if response is not None:
+            self._responses.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store the response fields of a payload, evicting the oldest beyond ``max_entries``"""
+
+        self._responses[key] = response
+        self._responses.move_to_end(key)
+        if len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._responses)
@@ -11,25 +11,60 @@ Date: 2025-08-30
 
 import requests
 import pandas as pd
+import numpy as np
+import asyncio
+import csv
+import random
+import re
+import shutil
 import time
 import json
 from itertools import product
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from pathlib import Path
 from datetime import datetime
 from loguru import logger
 
-from config import config, OUTPUT_DIR, UPRINTING_HEADERS
+from config import config, OUTPUT_DIR
+from rate_limiter import rate_limiter
+from http_transport import http_transport, decode_price_response, PRICE_FIELDS
+from retry_policy import retry_policy, circuit_breaker
+from response_cache import response_cache
+from extraction_journal import ExtractionJournal
+from payload_template import PayloadTemplate, PayloadMemo
+from attribute_registry import attribute_registry
+from result_writer import RawCsvWriter
+from combination_index import CombinationIndex
+from price_tensor import PriceTensor
+from parquet_output import write_prices_parquet
+from price_history import price_history
+import metrics
+from profiling import PhaseTimer, profiled
+from quantity_ladder import parse_quantity, parse_price, choose_anchors, interpolate_price, within_tolerance
+
+# Extraction engines selectable with ``mode``
+EXTRACTION_MODES = ('sequential', 'async')
 
 class PriceExtractor:
     """Extracts prices for all product option combinations"""
 
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(UPRINTING_HEADERS)
+        self.session = http_transport.session
         self.api_base_url = config.uprinting_api_base_url
         self.should_pause = False
         self.is_paused = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.api_calls_saved = 0
+        self.probe_calls = 0
+        self.interpolated_combinations = 0
+        self.full_ladder_rows = 0
+        self.retry_count = 0
+        self.price_tensor = None
+        self.carried_forward_combinations = 0
+        self.refreshed_slices = 0
+        self.metrics_product = ''
+        self.timer = PhaseTimer.from_config()
 
     def pause_extraction(self):
         """Pause the extraction process"""
@@ -42,28 +77,401 @@ class PriceExtractor:
         self.is_paused = False
         logger.info("Extraction resumed")
         
+    @profiled
     def extract_all_prices(self,
                           analysis_result: Dict[str, Any],
                           exclude_options: List[str] = None,
                           suboptions_to_exclude: Dict[str, List[str]] = None,
-                          progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
-        """Extract prices for all combinations of product options"""
+                          progress_callback: Optional[Callable] = None,
+                          mode: Optional[str] = None,
+                          resume: bool = False,
+                          probe_invariance: Optional[bool] = None,
+                          sparse_quantity: Optional[bool] = None,
+                          start: Optional[int] = None,
+                          end: Optional[int] = None,
+                          refresh: bool = False) -> Dict[str, Any]:
+        """Extract prices for all combinations of product options
+
+        ``mode`` selects the extraction engine: ``'sequential'`` issues one
+        blocking request at a time, ``'async'`` keeps up to
+        ``config.max_concurrent_requests`` requests in flight. Defaults to
+        ``config.extraction_mode``.
+
+        Completed combinations are checkpointed to an append-only journal.
+        With ``resume=True`` combinations already in the journal of an
+        interrupted run with the same options are not requested again.
+
+        ``probe_invariance`` (default ``config.invariance_probe_enabled``) runs
+        a pre-pass that finds options whose values never change the price;
+        those are requested once and their price is reused for every value.
+
+        ``sparse_quantity`` (default ``config.sparse_quantity_enabled``) fetches
+        only anchor quantities of each option row, interpolates the rest of the
+        quantity ladder and verifies the fit at random quantities, falling back
+        to the full ladder for rows where verification fails.
+
+        ``start``/``end`` restrict the run to combination indices
+        ``[start, end)`` (0-based, ``itertools.product`` order; see
+        ``CombinationIndex``). A partial range writes a Raw CSV part named
+        after the range and no Formatted CSV; ``merge_shards`` combines the
+        parts of all ranges into the final pair.
+
+        ``refresh=True`` starts from the product's previous Raw CSV: a sample
+        of ``config.refresh_samples_per_slice`` combinations of every
+        quantity ladder (slice) is requested again, and only slices where a
+        sampled price changed are re-extracted. The other rows are carried
+        forward with their original timestamps.
+
+        With ``config.phase_timing_enabled`` the result carries a per-phase
+        breakdown (``phase_timings``); with ``config.profiler`` set, the run is
+        profiled and the report path is returned as ``profile_path``.
+        """
         
         if exclude_options is None:
             exclude_options = []
         if suboptions_to_exclude is None:
             suboptions_to_exclude = {}
+        if mode is None:
+            mode = config.extraction_mode
+        if probe_invariance is None:
+            probe_invariance = config.invariance_probe_enabled
+        if sparse_quantity is None:
+            sparse_quantity = config.sparse_quantity_enabled
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.api_calls_saved = 0
+        self.probe_calls = 0
+        self.interpolated_combinations = 0
+        self.full_ladder_rows = 0
+        self.retry_count = 0
+        self.price_tensor = None
+        self.carried_forward_combinations = 0
+        self.refreshed_slices = 0
+        self.timer.reset()
+        # The breaker is process-wide; a state left open by an earlier run must not hold this one
+        circuit_breaker.reset()
 
+        run_started_at = time.time()
         product_name = analysis_result['product_name']
+        self.metrics_product = product_name
         product_id = analysis_result['product_id']
         options = analysis_result['options']
         attr_mappings = analysis_result['attribute_mappings']
 
-        logger.info(f"Starting price extraction for {product_name}")
+        logger.info(f"Starting price extraction for {product_name} ({mode} mode)")
         logger.info(f"Excluding options: {exclude_options}")
         logger.info(f"Excluding sub-options: {suboptions_to_exclude}")
 
-        # Filter out excluded options and sub-options, but keep track of defaults for excluded options
+        filtered_options, excluded_option_defaults = self._filter_options(
+            options, exclude_options, suboptions_to_exclude
+        )
+        
+        option_names = list(filtered_options.keys())
+        option_values = [filtered_options[name] for name in option_names]
+        combination_index = CombinationIndex(option_values)
+
+        # Calculate total combinations
+        product_combinations = combination_index.total
+        range_start = max(0, start or 0)
+        range_end = product_combinations if end is None else min(end, product_combinations)
+        shard = (range_start, range_end) if (range_start, range_end) != (0, product_combinations) else None
+        total_combinations = max(0, range_end - range_start)
+        
+        if shard:
+            logger.info(f"Combinations to extract: {total_combinations:,} (indices {range_start:,}-{range_end:,} of {product_combinations:,})")
+        else:
+            logger.info(f"Total combinations to extract: {total_combinations:,}")
+        
+        if progress_callback:
+            progress_callback(0, total_combinations, "Starting extraction...")
+        metrics.queue_depth.set(total_combinations, product=product_name)
+
+        quantity_option = self._find_quantity_option(option_names)
+        if sparse_quantity and shard:
+            logger.warning("⚠️ Sparse quantity mode interpolates whole option rows; extracting every combination of this range")
+            sparse_quantity = False
+        if sparse_quantity and not self._supports_sparse_quantity(filtered_options, quantity_option):
+            sparse_quantity = False
+
+        previous_results = None
+        if refresh and shard:
+            logger.warning("⚠️ Refresh compares whole slices with the previous run; extracting every combination of this range")
+        elif refresh:
+            # Read before the Raw CSV is rewritten below
+            previous_results = self._load_previous_results(product_name, option_names, resume)
+            if previous_results is not None and sparse_quantity:
+                logger.info("Refresh replaces sparse quantity interpolation for this run")
+                sparse_quantity = False
+
+        journal = None
+        journaled = {}
+        if config.checkpoint_enabled:
+            journal = ExtractionJournal.for_run(
+                product_name, product_id, option_names, option_values,
+                excluded_option_defaults, attr_mappings, shard=shard
+            )
+            if resume:
+                journaled = journal.load()
+                logger.info(f"Resuming extraction: {len(journaled):,} combinations already completed")
+            journal.open(resume=resume)
+
+        # Rows are streamed to the Raw CSV in batches as they complete
+        raw_writer = RawCsvWriter(
+            self._raw_csv_path(product_name, shard),
+            self._raw_csv_columns(option_names, price_source=sparse_quantity),
+            batch_size=config.batch_size,
+            first_index=range_start + 1
+        )
+
+        # Dense prices for the Formatted CSV; ranges are formatted from the merged Raw CSV instead
+        price_tensor = None
+        if not shard and 0 < product_combinations <= config.price_tensor_max_combinations:
+            price_tensor = PriceTensor(combination_index.radices, track_interpolated=sparse_quantity)
+            self.price_tensor = price_tensor
+
+        run_context = {
+            'product_name': product_name,
+            'product_id': product_id,
+            'attr_mappings': attr_mappings,
+            'exclude_options': exclude_options,
+            'excluded_option_defaults': excluded_option_defaults,
+            'option_names': option_names,
+            'option_values': option_values,
+            'combination_index': combination_index,
+            'range': (range_start, range_end),
+            'total_combinations': total_combinations,
+            'progress_callback': progress_callback,
+            'journal': journal,
+            'journaled': journaled,
+            'raw_writer': raw_writer,
+            'price_tensor': price_tensor,
+            'quantity_option': quantity_option,
+            'refresh': previous_results is not None,
+            'dead_letters': [],
+            # Attribute resolution and validation happen once here, not per combination
+            'template': PayloadTemplate(product_id, filtered_options, attr_mappings, excluded_option_defaults, exclude_options)
+        }
+        if probe_invariance:
+            run_context['template'].mark_price_invariant(self._probe_invariant_options(run_context))
+        run_context['payload_memo'] = self._create_payload_memo(run_context)
+
+        engine_start = time.perf_counter()
+        try:
+            if previous_results is not None:
+                max_in_flight = config.max_concurrent_requests if mode == 'async' else 1
+                error_count = asyncio.run(self._extract_refresh(run_context, max_in_flight, previous_results))
+            elif sparse_quantity:
+                max_in_flight = config.max_concurrent_requests if mode == 'async' else 1
+                error_count = asyncio.run(self._extract_sparse_quantity(run_context, max_in_flight))
+            elif mode == 'async':
+                error_count = asyncio.run(self._extract_concurrent(run_context))
+            else:
+                error_count = self._extract_sequential(run_context)
+
+            recovered_count = 0
+            if run_context['dead_letters'] and config.dead_letter_retry:
+                recovered_count = self._retry_dead_letters(run_context)
+                error_count -= recovered_count
+            self.timer.record('engine', time.perf_counter() - engine_start)
+        finally:
+            # Whatever completed is on disk even if the run was aborted
+            with self.timer.phase('csv_write'):
+                total_extracted = raw_writer.close()
+            metrics.queue_depth.set(0, product=product_name)
+            response_cache.flush()
+            if journal:
+                journal.close()
+
+        raw_csv_path = raw_writer.path
+        
+        # Create formatted CSV from the price tensor, or in a separate pass over the Raw CSV (shards are formatted after merging)
+        formatted_csv_path = None
+        with self.timer.phase('formatted_csv'):
+            if total_extracted and price_tensor is not None:
+                formatted_csv_path = self._create_formatted_csv_from_tensor(price_tensor, raw_csv_path, product_name, filtered_options)
+            elif total_extracted and not shard:
+                formatted_csv_path = self._create_formatted_csv(raw_csv_path, product_name, filtered_options)
+
+        history = None
+        if total_extracted and not shard:
+            with self.timer.phase('price_history'):
+                history = price_history.record_run(product_id, product_name, raw_csv_path, option_names, started_at=run_started_at)
+
+        parquet_path = None
+        if total_extracted and not shard and config.parquet_output_enabled:
+            with self.timer.phase('parquet'):
+                parquet_path = self._create_parquet(raw_csv_path, analysis_result, filtered_options, {
+                    'extraction_mode': mode,
+                    'options_excluded': exclude_options,
+                    'price_invariant_options': run_context['template'].invariant_options,
+                    'sparse_quantity': sparse_quantity
+                })
+        
+        extraction_result = {
+            'product_name': product_name,
+            'total_combinations': total_combinations,
+            'product_combinations': product_combinations,
+            'combination_range': [range_start, range_end],
+            'total_extracted': total_extracted,
+            'error_count': error_count,
+            'success_rate': total_extracted / total_combinations * 100 if total_combinations > 0 else 0,
+            'formatted_csv_path': str(formatted_csv_path.name) if formatted_csv_path else None,
+            'raw_csv_path': str(raw_csv_path.name),
+            'parquet_path': str(parquet_path.name) if parquet_path else None,
+            'price_history': history,
+            'extraction_timestamp': datetime.now().isoformat(),
+            'extraction_mode': mode,
+            'rate_limiter': rate_limiter.get_stats(),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'resumed_combinations': len(journaled),
+            'api_calls_saved': self.api_calls_saved,
+            'price_invariant_options': run_context['template'].invariant_options,
+            'probe_calls': self.probe_calls,
+            'sparse_quantity': sparse_quantity,
+            'interpolated_combinations': self.interpolated_combinations,
+            'full_ladder_rows': self.full_ladder_rows,
+            'refresh': previous_results is not None,
+            'carried_forward_combinations': self.carried_forward_combinations,
+            'refreshed_slices': self.refreshed_slices,
+            'retried_requests': self.retry_count,
+            'dead_letter_combinations': len(run_context['dead_letters']),
+            'recovered_combinations': recovered_count,
+            'circuit_breaker': circuit_breaker.get_stats(),
+            'phase_timings': self.timer.breakdown(),
+            'options_used': list(filtered_options.keys()),
+            'options_excluded': exclude_options
+        }
+        
+        if progress_callback:
+            progress_callback(
+                total_extracted, 
+                total_combinations, 
+                f"Extraction completed: {total_extracted} successful, {error_count} errors"
+            )
+        
+        # Outputs are on disk, so the checkpoint and the previous-run snapshot are no longer needed
+        if journal:
+            journal.discard()
+        if previous_results is not None:
+            self._previous_results_snapshot(product_name).unlink(missing_ok=True)
+
+        logger.success(f"Price extraction completed for {product_name}")
+        logger.info(f"Success rate: {extraction_result['success_rate']:.1f}%")
+        self.timer.log_breakdown(product_name)
+        
+        return extraction_result
+
+    def merge_shards(self,
+                     analysis_result: Dict[str, Any],
+                     exclude_options: List[str] = None,
+                     suboptions_to_exclude: Dict[str, List[str]] = None,
+                     remove_parts: bool = False) -> Dict[str, Any]:
+        """Merge the Raw CSV parts of range extractions into the final Raw/Formatted CSV pair
+
+        Parts are found in the output directory by product name (parts from
+        other nodes only need to be copied there) and concatenated in
+        combination order. Overlapping rows are written once and ranges no
+        part covers are reported as ``missing_ranges``. The options must be
+        filtered the same way as for the extractions.
+        """
+
+        product_name = analysis_result['product_name']
+        filtered_options, _ = self._filter_options(
+            analysis_result['options'], exclude_options or [], suboptions_to_exclude or {}
+        )
+        option_names = list(filtered_options.keys())
+        product_combinations = CombinationIndex([filtered_options[name] for name in option_names]).total
+
+        parts = self._find_shard_parts(product_name)
+        if not parts:
+            raise FileNotFoundError(f"No Raw CSV parts found for {product_name} in {OUTPUT_DIR}")
+
+        missing_ranges = []
+        covered_until = 0
+        for start, end, _ in parts:
+            if start > covered_until:
+                missing_ranges.append([covered_until, start])
+            covered_until = max(covered_until, end)
+        if covered_until < product_combinations:
+            missing_ranges.append([covered_until, product_combinations])
+        if missing_ranges:
+            logger.warning(f"⚠️ Shards of {product_name} do not cover combination ranges {missing_ranges}")
+
+        raw_csv_path = self._raw_csv_path(product_name)
+        header = None
+        last_combination_id = 0
+        total_extracted = 0
+
+        with open(raw_csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+
+            for start, end, part_path in parts:
+                with open(part_path, 'r', newline='', encoding='utf-8') as part:
+                    reader = csv.reader(part)
+                    part_header = next(reader, None)
+                    if header is None:
+                        header = part_header
+                        writer.writerow(header)
+                    elif part_header != header:
+                        raise ValueError(f"Raw CSV part {part_path.name} has different columns than the other parts")
+
+                    for row in reader:
+                        combination_id = int(row[0])
+                        if combination_id <= last_combination_id:
+                            continue  # Overlapping ranges
+                        writer.writerow(row)
+                        last_combination_id = combination_id
+                        total_extracted += 1
+
+        logger.info(f"Merged {len(parts)} Raw CSV parts into {raw_csv_path} ({total_extracted:,} rows)")
+
+        formatted_csv_path = None
+        parquet_path = None
+        history = None
+        if total_extracted:
+            formatted_csv_path = self._create_formatted_csv(raw_csv_path, product_name, filtered_options)
+            history = price_history.record_run(analysis_result['product_id'], product_name, raw_csv_path, option_names)
+            if config.parquet_output_enabled:
+                parquet_path = self._create_parquet(raw_csv_path, analysis_result, filtered_options, {
+                    'options_excluded': exclude_options or [],
+                    'shards': [[start, end] for start, end, _ in parts]
+                })
+
+        if remove_parts:
+            for _, _, part_path in parts:
+                part_path.unlink()
+
+        return {
+            'product_name': product_name,
+            'total_combinations': product_combinations,
+            'total_extracted': total_extracted,
+            'success_rate': total_extracted / product_combinations * 100 if product_combinations > 0 else 0,
+            'formatted_csv_path': str(formatted_csv_path.name) if formatted_csv_path else None,
+            'raw_csv_path': str(raw_csv_path.name),
+            'parquet_path': str(parquet_path.name) if parquet_path else None,
+            'price_history': history,
+            'shards': [[start, end] for start, end, _ in parts],
+            'missing_ranges': missing_ranges
+        }
+
+    def _find_shard_parts(self, product_name: str) -> List[Tuple[int, int, Path]]:
+        """Raw CSV parts of a product as (start, end, path), sorted by range"""
+
+        safe_name = self._safe_filename(product_name)
+        parts = []
+        for path in OUTPUT_DIR.glob(f"{safe_name}_Raw_Prices.part*.csv"):
+            match = re.search(r'\.part(\d+)-(\d+)\.csv$', path.name)
+            if match:
+                parts.append((int(match.group(1)), int(match.group(2)), path))
+        return sorted(parts)
+
+    def _filter_options(self,
+                        options: Dict[str, List[Dict[str, str]]],
+                        exclude_options: List[str],
+                        suboptions_to_exclude: Dict[str, List[str]]) -> Tuple[Dict[str, List], Dict[str, Dict]]:
+        """Filter out excluded options and sub-options, keeping defaults for excluded options"""
+
         filtered_options = {}
         excluded_option_defaults = {}
 
@@ -83,55 +491,140 @@ class PriceExtractor:
                 if values:
                     excluded_option_defaults[name] = values[0]  # Use first option as default
                     logger.info(f"Option '{name}': excluded, using default '{values[0]['text']}' (ID: {values[0]['id']})")
-        
-        # Calculate total combinations
-        total_combinations = 1
-        for option_list in filtered_options.values():
-            if option_list:
-                total_combinations *= len(option_list)
-        
-        logger.info(f"Total combinations to extract: {total_combinations:,}")
-        
+
+        return filtered_options, excluded_option_defaults
+
+    def _prepare_combination(self, run_context: Dict[str, Any], combination: Tuple[Dict[str, str], ...]) -> Tuple[Dict, Dict, Dict]:
+        """Build the option ID/label dictionaries for one combination"""
+
+        options_dict = {}
+        option_labels = {}
+
+        for i, option_name in enumerate(run_context['option_names']):
+            option_id, option_label = combination[i]['id'], combination[i]['text']
+            options_dict[option_name] = option_id
+            option_labels[option_name] = option_label
+
+        # Add excluded option defaults to the options dictionary
+        complete_options_dict = options_dict.copy()
+        for excluded_name, default_option in run_context['excluded_option_defaults'].items():
+            complete_options_dict[excluded_name] = default_option['id']
+
+        return options_dict, option_labels, complete_options_dict
+
+    def _add_result(self,
+                    run_context: Dict[str, Any],
+                    combination_id: int,
+                    options_dict: Dict[str, str],
+                    option_labels: Dict[str, str],
+                    api_result: Dict[str, Any],
+                    late: bool = False):
+        """Stream a successful result to the Raw CSV and record its price in the price tensor"""
+
+        with self.timer.phase('csv_write'):
+            row = self._build_result_row(run_context, combination_id, options_dict, option_labels, api_result)
+            if late:
+                run_context['raw_writer'].add_late(combination_id, row)
+            else:
+                run_context['raw_writer'].add(combination_id, row)
+
+        if late:
+            metrics.combinations_completed.inc(product=self.metrics_product, outcome='recovered')
+        else:
+            metrics.combinations_completed.inc(product=self.metrics_product, outcome='success')
+            metrics.queue_depth.dec(product=self.metrics_product)
+
+        price_tensor = run_context['price_tensor']
+        if price_tensor is not None:
+            price_tensor.set(
+                combination_id - 1,
+                parse_price(api_result['price']),
+                interpolated=api_result.get('price_source') == 'interpolated'
+            )
+
+    def _build_result_row(self,
+                          run_context: Dict[str, Any],
+                          combination_id: int,
+                          options_dict: Dict[str, str],
+                          option_labels: Dict[str, str],
+                          api_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build one Raw CSV row from a successful API result"""
+
+        return {
+            'combination_id': combination_id,
+            'product_name': run_context['product_name'],
+            **option_labels,  # Add all option labels as columns
+            'price': f"${api_result['price']}",
+            'total_price': f"${api_result['total_price']}",
+            'unit_price': api_result['unit_price'],
+            'qty_pieces': api_result['qty'],
+            'turnaround_days': api_result['turnaround'],
+            'price_source': api_result.get('price_source', 'api'),
+            **{f"{name}_id": options_dict[name] for name in run_context['option_names']},  # Add IDs
+            'timestamp': api_result.get('timestamp') or datetime.now().isoformat(),
+            'notes': api_result.get('notes', 'Extracted using real API endpoints')
+        }
+
+    def _wait_if_paused(self, combination_count: int, total_combinations: int, progress_callback: Optional[Callable]):
+        """Block while a pause has been requested"""
+
+        if not self.should_pause:
+            return
+
+        self.is_paused = True
+        logger.info("⏸️ Extraction paused by user")
         if progress_callback:
-            progress_callback(0, total_combinations, "Starting extraction...")
-        
-        # Generate all combinations
-        results = []
+            progress_callback(
+                combination_count,
+                total_combinations,
+                "⏸️ Extraction paused - waiting for resume..."
+            )
+
+        # Wait until resumed
+        while self.should_pause:
+            time.sleep(1)
+
+        self.is_paused = False
+        logger.info("▶️ Extraction resumed")
+
+    async def _wait_if_paused_async(self, combination_count: int, total_combinations: int, progress_callback: Optional[Callable]):
+        """Suspend dispatching new requests while a pause has been requested"""
+
+        if not self.should_pause:
+            return
+
+        self.is_paused = True
+        logger.info("⏸️ Extraction paused by user")
+        if progress_callback:
+            progress_callback(
+                combination_count,
+                total_combinations,
+                "⏸️ Extraction paused - waiting for resume..."
+            )
+
+        while self.should_pause:
+            await asyncio.sleep(1)
+
+        self.is_paused = False
+        logger.info("▶️ Extraction resumed")
+
+    def _extract_sequential(self, run_context: Dict[str, Any]) -> int:
+        """Extract every combination with one blocking request at a time; returns the error count"""
+
+        raw_writer = run_context['raw_writer']
         combination_count = 0
         error_count = 0
-        
-        option_names = list(filtered_options.keys())
-        option_values = [filtered_options[name] for name in option_names]
-        
-        for combination in product(*option_values):
+        total_combinations = run_context['total_combinations']
+        progress_callback = run_context['progress_callback']
+
+        for combination_id, combination in run_context['combination_index'].iter_range(*run_context['range']):
             combination_count += 1
 
             # Check for pause request
-            if self.should_pause:
-                self.is_paused = True
-                logger.info("⏸️ Extraction paused by user")
-                if progress_callback:
-                    progress_callback(
-                        combination_count,
-                        total_combinations,
-                        "⏸️ Extraction paused - waiting for resume..."
-                    )
-
-                # Wait until resumed
-                while self.should_pause:
-                    time.sleep(1)
-
-                self.is_paused = False
-                logger.info("▶️ Extraction resumed")
+            with self.timer.phase('pause_check'):
+                self._wait_if_paused(combination_count, total_combinations, progress_callback)
 
-            # Create options dictionary
-            options_dict = {}
-            option_labels = {}
-
-            for i, option_name in enumerate(option_names):
-                option_id, option_label = combination[i]['id'], combination[i]['text']
-                options_dict[option_name] = option_id
-                option_labels[option_name] = option_label
+            options_dict, option_labels, complete_options_dict = self._prepare_combination(run_context, combination)
 
             # Progress update
             if combination_count % 25 == 0 and progress_callback:
@@ -141,195 +634,708 @@ class PriceExtractor:
                     f"Processing combination {combination_count:,}/{total_combinations:,}"
                 )
 
-            # Add excluded option defaults to the options dictionary
-            complete_options_dict = options_dict.copy()
-            for excluded_name, default_option in excluded_option_defaults.items():
-                complete_options_dict[excluded_name] = default_option['id']
-                logger.debug(f"Using default for excluded option '{excluded_name}': {default_option['text']} (ID: {default_option['id']})")
+            journaled_result = run_context['journaled'].get(combination_id)
+            if journaled_result:
+                # Completed by an interrupted run
+                self._add_result(run_context, combination_id, options_dict, option_labels, journaled_result)
+                continue
 
             # Make API call
-            api_result = self._make_api_call(product_id, complete_options_dict, attr_mappings, exclude_options)
+            api_result = self._make_api_call(
+                run_context['template'], complete_options_dict,
+                payload_memo=run_context['payload_memo']
+            )
             
             if api_result['success']:
-                result = {
-                    'combination_id': combination_count,
-                    'product_name': product_name,
-                    **option_labels,  # Add all option labels as columns
-                    'price': f"${api_result['price']}",
-                    'total_price': f"${api_result['total_price']}",
-                    'unit_price': api_result['unit_price'],
-                    'qty_pieces': api_result['qty'],
-                    'turnaround_days': api_result['turnaround'],
-                    **{f"{name}_id": options_dict[name] for name in option_names},  # Add IDs
-                    'timestamp': datetime.now().isoformat(),
-                    'notes': 'Extracted using real API endpoints'
-                }
-                
-                results.append(result)
+                self._add_result(run_context, combination_id, options_dict, option_labels, api_result)
+                if run_context['journal']:
+                    with self.timer.phase('journal'):
+                        run_context['journal'].append(combination_id, api_result)
             else:
+                raw_writer.add(combination_id, None)
                 error_count += 1
-                logger.debug(f"API error for combination {combination_count}: {api_result.get('error')}")
-            
-            # Small delay to be respectful to the API
-            time.sleep(config.request_delay_seconds)
-        
-        # Create formatted CSV
-        formatted_csv_path = self._create_formatted_csv(results, product_name, filtered_options)
-        
-        # Create raw CSV
-        raw_csv_path = self._create_raw_csv(results, product_name)
-        
-        extraction_result = {
-            'product_name': product_name,
-            'total_combinations': total_combinations,
-            'total_extracted': len(results),
-            'error_count': error_count,
-            'success_rate': len(results) / total_combinations * 100 if total_combinations > 0 else 0,
-            'formatted_csv_path': str(formatted_csv_path.name),
-            'raw_csv_path': str(raw_csv_path.name),
-            'extraction_timestamp': datetime.now().isoformat(),
-            'options_used': list(filtered_options.keys()),
-            'options_excluded': exclude_options
-        }
-        
+                self._dead_letter(run_context, combination_id, api_result)
+                logger.debug(f"API error for combination {combination_id}: {api_result.get('error')}")
+
+        return error_count
+
+    async def _extract_concurrent(self, run_context: Dict[str, Any]) -> int:
+        """Extract every combination with up to max_concurrent_requests calls in flight; returns the error count
+
+        Request starts are paced by the shared adaptive rate limiter, so the
+        request rate is global across all workers rather than a per-call sleep.
+        """
+
+        raw_writer = run_context['raw_writer']
+        error_count = 0
+        completed_count = 0
+        total_combinations = run_context['total_combinations']
+        progress_callback = run_context['progress_callback']
+
+        max_in_flight = max(1, config.max_concurrent_requests)
+        semaphore = asyncio.Semaphore(max_in_flight)
+        failures = []
+
+        async def run_one(http_session, combination_id, combination):
+            nonlocal error_count, completed_count
+            try:
+                options_dict, option_labels, complete_options_dict = self._prepare_combination(run_context, combination)
+                api_result = await self._make_api_call_async(
+                    http_session, run_context['template'], complete_options_dict,
+                    payload_memo=run_context['payload_memo']
+                )
+
+                if api_result['success']:
+                    self._add_result(run_context, combination_id, options_dict, option_labels, api_result)
+                    if run_context['journal']:
+                        with self.timer.phase('journal'):
+                            run_context['journal'].append(combination_id, api_result)
+                else:
+                    raw_writer.add(combination_id, None)
+                    error_count += 1
+                    self._dead_letter(run_context, combination_id, api_result)
+                    logger.debug(f"API error for combination {combination_id}: {api_result.get('error')}")
+
+                completed_count += 1
+                if completed_count % 25 == 0 and progress_callback:
+                    progress_callback(
+                        completed_count,
+                        total_combinations,
+                        f"Processing combination {completed_count:,}/{total_combinations:,}"
+                    )
+            except Exception as e:
+                # Stop dispatching; the run is aborted like the sequential engine would be
+                failures.append(e)
+            finally:
+                semaphore.release()
+
+        async with http_transport.create_async_session(max_in_flight) as http_session:
+            tasks = set()
+            for combination_id, combination in run_context['combination_index'].iter_range(*run_context['range']):
+                if failures:
+                    break
+
+                journaled_result = run_context['journaled'].get(combination_id)
+                if journaled_result:
+                    # Completed by an interrupted run
+                    options_dict, option_labels, _ = self._prepare_combination(run_context, combination)
+                    self._add_result(run_context, combination_id, options_dict, option_labels, journaled_result)
+                    completed_count += 1
+                    continue
+
+                with self.timer.phase('pause_check'):
+                    await self._wait_if_paused_async(completed_count, total_combinations, progress_callback)
+                await semaphore.acquire()
+                task = asyncio.create_task(run_one(http_session, combination_id, combination))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        if failures:
+            raise failures[0]
+
+        return error_count
+    
+    async def _extract_sparse_quantity(self, run_context: Dict[str, Any], max_in_flight: int) -> int:
+        """Extract each option row from anchor quantities plus verified interpolation; returns the error count
+
+        A row is one setting of every option except the quantity. Its anchor
+        quantities are fetched and the rest of the ladder is interpolated
+        piecewise-linearly between them. ``config.sparse_quantity_verify_points``
+        random interpolated quantities are then fetched; if any misses
+        ``config.sparse_quantity_tolerance`` (or an anchor fails) the whole
+        ladder of that row is fetched instead. Up to ``max_in_flight`` rows
+        and requests run at once.
+        """
+
+        raw_writer = run_context['raw_writer']
+        option_names = run_context['option_names']
+        option_values = run_context['option_values']
+        total_combinations = run_context['total_combinations']
+        progress_callback = run_context['progress_callback']
+
+        quantity_position = option_names.index(run_context['quantity_option'])
+        quantities = {position: parse_quantity(value['text']) for position, value in enumerate(option_values[quantity_position])}
+        anchors = choose_anchors(quantities, max(2, config.sparse_quantity_anchors))
+        verify_points = max(1, config.sparse_quantity_verify_points)
+        tolerance = config.sparse_quantity_tolerance
+        rng = random.Random()
+
+        combination_index = run_context['combination_index']
+        error_count = 0
+        completed_count = 0
+        row_semaphore = asyncio.Semaphore(max_in_flight)
+        request_semaphore = asyncio.Semaphore(max_in_flight)
+        failures = []
+
+        def locate(row_positions, quantity):
+            positions = list(row_positions)
+            positions.insert(quantity_position, quantity)
+            combination_id = combination_index.encode(positions) + 1
+            combination = tuple(values[position] for values, position in zip(option_values, positions))
+            return combination_id, self._prepare_combination(run_context, combination)
+
+        async def fetch(http_session, row_positions, quantity):
+            combination_id, (options_dict, option_labels, complete_options_dict) = locate(row_positions, quantity)
+
+            journaled_result = run_context['journaled'].get(combination_id)
+            if journaled_result:
+                # Completed by an interrupted run
+                return dict(journaled_result, success=True)
+
+            async with request_semaphore:
+                api_result = await self._make_api_call_async(
+                    http_session, run_context['template'], complete_options_dict,
+                    payload_memo=run_context['payload_memo']
+                )
+            if api_result['success'] and run_context['journal']:
+                with self.timer.phase('journal'):
+                    run_context['journal'].append(combination_id, api_result)
+            return api_result
+
+        async def run_row(http_session, row_positions):
+            nonlocal error_count, completed_count
+            try:
+                fetched = {}
+
+                async def fetch_quantities(positions):
+                    results = await asyncio.gather(*(fetch(http_session, row_positions, quantity) for quantity in positions))
+                    fetched.update(zip(positions, results))
+
+                def fetched_price(quantity, field='price'):
+                    api_result = fetched[quantity]
+                    return parse_price(api_result[field]) if api_result['success'] else None
+
+                await fetch_quantities(anchors)
+                fitted = all(fetched_price(quantity) is not None and fetched_price(quantity, 'total_price') is not None for quantity in anchors)
+                remaining = [quantity for quantity in quantities if quantity not in fetched]
+
+                if fitted and remaining:
+                    price_points = [(quantities[quantity], fetched_price(quantity)) for quantity in anchors]
+                    checks = rng.sample(remaining, min(verify_points, len(remaining)))
+                    await fetch_quantities(checks)
+                    for quantity in checks:
+                        actual = fetched_price(quantity)
+                        if actual is None or not within_tolerance(interpolate_price(price_points, quantities[quantity]), actual, tolerance):
+                            fitted = False
+                            break
+                    remaining = [quantity for quantity in remaining if quantity not in fetched]
+
+                if not fitted and remaining:
+                    self.full_ladder_rows += 1
+                    await fetch_quantities(remaining)
+                    remaining = []
+
+                if remaining:
+                    price_points = [(quantities[quantity], fetched_price(quantity)) for quantity in anchors]
+                    total_points = [(quantities[quantity], fetched_price(quantity, 'total_price')) for quantity in anchors]
+
+                for quantity in quantities:
+                    combination_id, (options_dict, option_labels, _) = locate(row_positions, quantity)
+
+                    if quantity in fetched:
+                        api_result = fetched[quantity]
+                        if api_result['success']:
+                            self._add_result(run_context, combination_id, options_dict, option_labels, api_result)
+                        else:
+                            raw_writer.add(combination_id, None)
+                            error_count += 1
+                            self._dead_letter(run_context, combination_id, api_result)
+                            logger.debug(f"API error for combination {combination_id}: {api_result.get('error')}")
+                        continue
+
+                    qty = quantities[quantity]
+                    price = interpolate_price(price_points, qty)
+                    nearest_anchor = min(anchors, key=lambda anchor: abs(quantities[anchor] - qty))
+                    interpolated_result = {
+                        'price': f"{price:.2f}",
+                        'total_price': f"{interpolate_price(total_points, qty):.2f}",
+                        'unit_price': f"{price / qty:.5f}",
+                        'qty': qty,
+                        'turnaround': fetched[nearest_anchor]['turnaround'],
+                        'price_source': 'interpolated'
+                    }
+                    self._add_result(run_context, combination_id, options_dict, option_labels, interpolated_result)
+                    self.interpolated_combinations += 1
+
+                completed_count += len(quantities)
+                if progress_callback:
+                    progress_callback(
+                        completed_count,
+                        total_combinations,
+                        f"Processing combination {completed_count:,}/{total_combinations:,}"
+                    )
+            except Exception as e:
+                # Stop dispatching; the run is aborted like the sequential engine would be
+                failures.append(e)
+            finally:
+                row_semaphore.release()
+
+        row_ranges = [range(len(values)) for i, values in enumerate(option_values) if i != quantity_position]
+
+        async with http_transport.create_async_session(max_in_flight) as http_session:
+            tasks = set()
+            for row_positions in product(*row_ranges):
+                if failures:
+                    break
+
+                with self.timer.phase('pause_check'):
+                    await self._wait_if_paused_async(completed_count, total_combinations, progress_callback)
+                await row_semaphore.acquire()
+                task = asyncio.create_task(run_row(http_session, row_positions))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        if failures:
+            raise failures[0]
+
+        logger.info(
+            f"📈 Sparse quantity ladder: {self.interpolated_combinations:,} combinations interpolated, "
+            f"{self.full_ladder_rows:,} rows fell back to the full ladder"
+        )
+        return error_count
+    
+    async def _extract_refresh(self, run_context: Dict[str, Any], max_in_flight: int, previous_results: Dict[Tuple[str, ...], Tuple[str, ...]]) -> int:
+        """Re-check a sample of every slice against the previous run, re-extracting only changed slices; returns the error count
+
+        A slice is one quantity ladder: every combination that differs only in
+        the quantity (the last option if there is none). Combinations missing
+        from the previous run are always requested. If any sampled price
+        differs from the previous one, or its request fails, the whole slice
+        is requested again; otherwise the previous rows are carried forward.
+        Requests bypass the response cache. Up to ``max_in_flight`` slices and
+        requests run at once.
+        """
+
+        raw_writer = run_context['raw_writer']
+        option_names = run_context['option_names']
+        option_values = run_context['option_values']
+        total_combinations = run_context['total_combinations']
+        progress_callback = run_context['progress_callback']
+
+        quantity_option = run_context['quantity_option']
+        slice_axis = option_names.index(quantity_option) if quantity_option else len(option_names) - 1
+        ladder = range(len(option_values[slice_axis]))
+        samples = max(1, config.refresh_samples_per_slice)
+        rng = random.Random()
+
+        combination_index = run_context['combination_index']
+        error_count = 0
+        completed_count = 0
+        slice_semaphore = asyncio.Semaphore(max_in_flight)
+        request_semaphore = asyncio.Semaphore(max_in_flight)
+        failures = []
+
+        def locate(slice_positions, position):
+            positions = list(slice_positions)
+            positions.insert(slice_axis, position)
+            combination_id = combination_index.encode(positions) + 1
+            combination = tuple(values[position] for values, position in zip(option_values, positions))
+            return combination_id, self._prepare_combination(run_context, combination)
+
+        async def fetch(http_session, slice_positions, position):
+            combination_id, (options_dict, option_labels, complete_options_dict) = locate(slice_positions, position)
+
+            journaled_result = run_context['journaled'].get(combination_id)
+            if journaled_result:
+                # Completed by an interrupted run
+                return dict(journaled_result, success=True)
+
+            async with request_semaphore:
+                # Cached responses would hide the very changes a refresh looks for
+                api_result = await self._make_api_call_async(
+                    http_session, run_context['template'], complete_options_dict,
+                    payload_memo=run_context['payload_memo'], use_cache=False
+                )
+            if api_result['success'] and run_context['journal']:
+                with self.timer.phase('journal'):
+                    run_context['journal'].append(combination_id, api_result)
+            return api_result
+
+        async def run_slice(http_session, slice_positions):
+            nonlocal error_count, completed_count
+            try:
+                previous = {}
+                for position in ladder:
+                    _, (options_dict, _, _) = locate(slice_positions, position)
+                    previous[position] = previous_results.get(tuple(str(options_dict[name]) for name in option_names))
+
+                fetched = {}
+
+                async def fetch_positions(positions):
+                    results = await asyncio.gather(*(fetch(http_session, slice_positions, position) for position in positions))
+                    fetched.update(zip(positions, results))
+
+                known = [position for position in ladder if previous[position] is not None]
+                checks = rng.sample(known, min(samples, len(known)))
+                await fetch_positions(checks + [position for position in ladder if previous[position] is None])
+
+                changed = any(
+                    not fetched[position]['success']
+                    or parse_price(fetched[position]['price']) != parse_price(previous[position][0])
+                    or parse_price(fetched[position]['total_price']) != parse_price(previous[position][1])
+                    for position in checks
+                )
+                if changed:
+                    self.refreshed_slices += 1
+                    await fetch_positions([position for position in known if position not in fetched])
+
+                for position in ladder:
+                    combination_id, (options_dict, option_labels, _) = locate(slice_positions, position)
+
+                    if position in fetched:
+                        api_result = fetched[position]
+                        if api_result['success']:
+                            self._add_result(run_context, combination_id, options_dict, option_labels, api_result)
+                        else:
+                            raw_writer.add(combination_id, None)
+                            error_count += 1
+                            self._dead_letter(run_context, combination_id, api_result)
+                            logger.debug(f"API error for combination {combination_id}: {api_result.get('error')}")
+                        continue
+
+                    price, total_price, unit_price, qty, turnaround, timestamp = previous[position]
+                    carried_result = {
+                        'price': price.lstrip('$'),
+                        'total_price': total_price.lstrip('$'),
+                        'unit_price': unit_price,
+                        'qty': qty,
+                        'turnaround': turnaround,
+                        'timestamp': timestamp,
+                        'notes': 'Carried forward from previous run'
+                    }
+                    self._add_result(run_context, combination_id, options_dict, option_labels, carried_result)
+                    self.carried_forward_combinations += 1
+
+                completed_count += len(ladder)
+                if progress_callback:
+                    progress_callback(
+                        completed_count,
+                        total_combinations,
+                        f"Processing combination {completed_count:,}/{total_combinations:,}"
+                    )
+            except Exception as e:
+                # Stop dispatching; the run is aborted like the sequential engine would be
+                failures.append(e)
+            finally:
+                slice_semaphore.release()
+
+        slice_ranges = [range(len(values)) for i, values in enumerate(option_values) if i != slice_axis]
+
+        async with http_transport.create_async_session(max_in_flight) as http_session:
+            tasks = set()
+            for slice_positions in product(*slice_ranges):
+                if failures:
+                    break
+
+                with self.timer.phase('pause_check'):
+                    await self._wait_if_paused_async(completed_count, total_combinations, progress_callback)
+                await slice_semaphore.acquire()
+                task = asyncio.create_task(run_slice(http_session, slice_positions))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        if failures:
+            raise failures[0]
+
+        logger.info(
+            f"🔄 Refresh: {self.refreshed_slices:,} slices re-extracted, "
+            f"{self.carried_forward_combinations:,} combinations carried forward"
+        )
+        return error_count
+
+    def _previous_results_snapshot(self, product_name: str) -> Path:
+        """Copy of the previous Raw CSV kept for the duration of a refresh run"""
+
+        return config.temp_directory / 'refresh' / f"{self._safe_filename(product_name)}_Raw_Prices.previous.csv"
+
+    def _load_previous_results(self, product_name: str, option_names: List[str], resume: bool) -> Optional[Dict[Tuple[str, ...], Tuple[str, ...]]]:
+        """Prices of the previous run by option-ID tuple, or None if there is nothing to refresh from
+
+        The previous Raw CSV is snapshotted first because this run rewrites
+        it; a resumed refresh reads the snapshot of the interrupted run.
+        Interpolated rows are left out so their combinations are requested.
+        """
+
+        raw_csv_path = self._raw_csv_path(product_name)
+        snapshot = self._previous_results_snapshot(product_name)
+
+        if not (resume and snapshot.exists()):
+            if not raw_csv_path.exists():
+                logger.warning(f"⚠️ No previous Raw CSV for {product_name}; extracting every combination")
+                return None
+            snapshot.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(raw_csv_path, snapshot)
+
+        id_columns = [f"{name}_id" for name in option_names]
+        previous_results = {}
+
+        with open(snapshot, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            missing_columns = [column for column in id_columns if column not in (reader.fieldnames or [])]
+            if missing_columns:
+                logger.warning(f"⚠️ Previous Raw CSV has no {missing_columns} columns; extracting every combination")
+                return None
+
+            for row in reader:
+                if row.get('price_source') == 'interpolated':
+                    continue
+                previous_results[tuple(row[column] for column in id_columns)] = (
+                    row['price'], row['total_price'], row['unit_price'],
+                    row['qty_pieces'], row['turnaround_days'], row['timestamp']
+                )
+
+        logger.info(f"🔄 Refreshing from {len(previous_results):,} previous prices")
+        return previous_results
+
+    def _dead_letter(self, run_context: Dict[str, Any], combination_id: int, api_result: Dict[str, Any]):
+        """Queue a combination that failed transiently, or got an undecodable response, for the retry pass at the end of the run"""
+
+        metrics.combinations_completed.inc(product=self.metrics_product, outcome='error')
+        metrics.queue_depth.dec(product=self.metrics_product)
+        if retry_policy.is_dead_letter(api_result):
+            run_context['dead_letters'].append(combination_id)
+
+    def _retry_dead_letters(self, run_context: Dict[str, Any]) -> int:
+        """Request dead-lettered combinations once more, one at a time; returns how many succeeded
+
+        Runs after the engine has finished, when a burst of 429/5xx has usually
+        passed. Recovered rows are merged into place when the Raw CSV is closed.
+        """
+
+        dead_letters = sorted(run_context['dead_letters'])
+        combination_index = run_context['combination_index']
+        progress_callback = run_context['progress_callback']
+        payload_memo = self._create_payload_memo(run_context)
+        recovered_count = 0
+
+        logger.info(f"📬 Retrying {len(dead_letters):,} dead-lettered combinations")
         if progress_callback:
             progress_callback(
-                len(results), 
-                total_combinations, 
-                f"Extraction completed: {len(results)} successful, {error_count} errors"
+                run_context['total_combinations'] - len(dead_letters),
+                run_context['total_combinations'],
+                f"Retrying {len(dead_letters):,} failed combinations..."
             )
-        
-        logger.success(f"Price extraction completed for {product_name}")
-        logger.info(f"Success rate: {extraction_result['success_rate']:.1f}%")
-        
-        return extraction_result
-    
-    def _make_api_call(self, product_id: str, options_dict: Dict[str, str], attr_mappings: Dict[str, str], exclude_options: List[str] = None) -> Dict[str, Any]:
-        """Make API call to get price for specific combination"""
 
-        # Build payload with correct attribute mappings
-        payload = {'product_id': product_id}
+        for combination_id in dead_letters:
+            combination = combination_index.combination(combination_id - 1)
+            options_dict, option_labels, complete_options_dict = self._prepare_combination(run_context, combination)
 
-        for option_name, option_id in options_dict.items():
-            attr_name = attr_mappings.get(option_name)
-            if attr_name:
-                payload[attr_name] = option_id
-            else:
-                # Enhanced attribute mapping with strict order and validation
-                if ('time' in option_name.lower() or 'turnaround' in option_name.lower() or
-                    'rush' in option_name.lower() or 'day' in option_name.lower() or
-                    ('business' in option_name.lower() and 'day' in option_name.lower())):
-                    payload['attr6'] = option_id
-                    logger.info(f"🕒 Printing time mapped: {option_name} = {option_id} → attr6")
-                elif 'quantity' in option_name.lower():
-                    payload['attr5'] = option_id
-                    logger.info(f"📊 Quantity mapped: {option_name} = {option_id} → attr5")
-                elif 'size' in option_name.lower() or 'format' in option_name.lower():
-                    payload['attr3'] = option_id
-                    logger.info(f"📏 Size mapped: {option_name} = {option_id} → attr3")
-                elif 'paper' in option_name.lower() or 'material' in option_name.lower() or 'stock' in option_name.lower():
-                    payload['attr1'] = option_id
-                    logger.info(f"📄 Paper mapped: {option_name} = {option_id} → attr1")
-                elif ('page' in option_name.lower() or 'side' in option_name.lower() or
-                      'print' in option_name.lower()) and 'time' not in option_name.lower():
-                    payload['attr4'] = option_id
-                    logger.info(f"🖨️ Printed side mapped: {option_name} = {option_id} → attr4")
-                elif 'bundling' in option_name.lower() or 'binding' in option_name.lower():
-                    payload['attr400'] = option_id
-                    logger.info(f"📦 Bundling mapped: {option_name} = {option_id} → attr400")
-                else:
-                    # Only warn if this option is not excluded
-                    if exclude_options and option_name not in exclude_options:
-                        logger.warning(f"⚠️ Unmapped option: {option_name} = {option_id} (skipping)")
-                    elif exclude_options and option_name in exclude_options:
-                        logger.debug(f"Skipping excluded option: {option_name} = {option_id}")
-                    else:
-                        logger.warning(f"⚠️ Unmapped option: {option_name} = {option_id} (skipping)")
+            api_result = self._make_api_call(
+                run_context['template'], complete_options_dict,
+                payload_memo=payload_memo, use_cache=not run_context['refresh']
+            )
+            if not api_result['success']:
+                logger.debug(f"Dead-lettered combination {combination_id} failed again: {api_result.get('error')}")
+                continue
 
-        # Validate payload before sending to prevent 412 errors
-        validation_result = self._validate_extraction_payload(payload, options_dict)
-        if not validation_result['valid']:
-            logger.error(f"❌ Invalid payload detected: {validation_result['error']}")
-            return {
-                'success': False,
-                'error': f"Payload validation failed: {validation_result['error']}",
-                'payload': payload
-            }
+            self._add_result(run_context, combination_id, options_dict, option_labels, api_result, late=True)
+            if run_context['journal']:
+                with self.timer.phase('journal'):
+                    run_context['journal'].append(combination_id, api_result)
+            recovered_count += 1
 
-        logger.debug(f"API Call Payload: {payload}")
+        logger.info(f"📬 Recovered {recovered_count:,}/{len(dead_letters):,} dead-lettered combinations")
+        return recovered_count
 
-        try:
-            # Call computePrice endpoint
-            price_url = f"{self.api_base_url}/computePrice?website_code=UP"
-            response = self.session.post(
-                price_url,
-                json=payload,
-                timeout=15
-            )
+    def _create_payload_memo(self, run_context: Dict[str, Any]) -> Optional[PayloadMemo]:
+        """Return a per-run payload memo if distinct combinations can share a payload
 
-            logger.debug(f"API Response Status: {response.status_code}")
-            logger.debug(f"API Response: {response.text[:200]}")
+        Options that map to no ``attrN`` are dropped from the payload, and an
+        option mapped to the same ``attrN`` as a later one is overwritten, so
+        varying such an option does not change what is sent. The compiled
+        template knows these options; if there are none no memo is needed.
+        The memo keeps at most ``config.payload_memo_max_entries`` responses.
+        """
 
-            if response.status_code == 200:
-                data = response.json()
-                price = data.get('price', 'N/A')
-                turnaround = data.get('turnaround', 'N/A')
+        template = run_context['template']
+        if not template.inert_options and not template.invariant_options:
+            return None
 
-                # Create a unique combination key for price validation with printing time focus
-                printing_time_option = None
-                quantity_option = None
+        filtered_options = dict(zip(run_context['option_names'], run_context['option_values']))
+        logger.info(
+            f"♻️ Options {template.inert_options + template.invariant_options} do not change the price: "
+            f"{template.unique_payload_count(filtered_options):,} unique payloads for {run_context['total_combinations']:,} combinations"
+        )
+        return PayloadMemo(config.payload_memo_max_entries)
 
-                for option_name, option_id in options_dict.items():
-                    if 'time' in option_name.lower() or 'day' in option_name.lower() or 'turnaround' in option_name.lower():
-                        printing_time_option = f"{option_name}:{option_id}"
-                    elif 'quantity' in option_name.lower() or any(char.isdigit() for char in option_name):
-                        quantity_option = f"{option_name}:{option_id}"
+    def _probe_invariant_options(self, run_context: Dict[str, Any]) -> List[str]:
+        """Find options whose values all return the same price
 
-                combo_key = f"Q:{quantity_option}_T:{printing_time_option}"
+        For each option, ``config.invariance_probe_samples`` random settings of
+        the other options are drawn and the option is varied across all of its
+        values. It is price-invariant only if every value returns an identical
+        response (price, total, unit price, quantity and turnaround) in every
+        sample. Probing stops at the first difference, and
+        options where probing would cost more than it could save are skipped.
+        """
 
-                if price != 'N/A' and price != '20':  # Check for the $20 default issue
-                    logger.info(f"✅ API Success: ${price} (turnaround: {turnaround}) for {combo_key}")
+        template = run_context['template']
+        option_names = run_context['option_names']
+        option_values = run_context['option_values']
+        total_combinations = run_context['total_combinations']
+        samples = max(1, config.invariance_probe_samples)
+        rng = random.Random()
 
-                    # Special logging for printing time validation
-                    if printing_time_option:
-                        logger.info(f"🕒 Printing time price: {printing_time_option} → ${price}")
-                else:
-                    logger.warning(f"⚠️ Suspicious price: ${price} for {combo_key}")
-
-                # Enhanced logging for printing time debugging
-                logger.debug(f"Full combination: {options_dict}")
-                logger.debug(f"API payload: {payload}")
-                logger.debug(f"Price: ${price}, Turnaround: {turnaround}")
-
-                # Validate printing time is actually affecting price
-                if printing_time_option and 'attr6' in payload:
-                    logger.info(f"🔍 Printing time validation: attr6={payload['attr6']} → ${price}")
-
-                return {
-                    'success': True,
-                    'price': price,
-                    'total_price': data.get('total_price', 'N/A'),
-                    'qty': data.get('qty', 'N/A'),
-                    'turnaround': turnaround,
-                    'unit_price': data.get('unit_price', 'N/A'),
-                    'payload': payload,
-                    'full_response': data,
-                    'combination_key': combo_key
-                }
-            else:
-                error_msg = f'HTTP {response.status_code}: {response.text[:200]}'
-                logger.error(f"❌ API Error: {error_msg}")
-                return {
-                    'success': False,
-                    'error': error_msg,
-                    'payload': payload
-                }
+        invariant_options = []
+        for i, name in enumerate(option_names):
+            values = option_values[i]
+            if len(values) < 2 or name in template.inert_options:
+                continue
+
+            # Calls saved if invariant versus the worst-case probe cost
+            if samples * len(values) >= total_combinations - total_combinations // len(values):
+                continue
+
+            invariant = True
+            for _ in range(samples):
+                combination = [rng.choice(other_values) for other_values in option_values]
+                reference_response = None
+
+                for value in values:
+                    combination[i] = value
+                    _, _, complete_options_dict = self._prepare_combination(run_context, tuple(combination))
+                    api_result = self._make_api_call(template, complete_options_dict)
+                    self.probe_calls += 1
+
+                    if not api_result['success']:
+                        invariant = False
+                        break
+                    # The memo reuses the whole response, so every field written to the CSVs must match
+                    response_fields = tuple(api_result.get(field) for field in PRICE_FIELDS)
+                    if reference_response is None:
+                        reference_response = response_fields
+                    elif response_fields != reference_response:
+                        invariant = False
+                        break
+
+                if not invariant:
+                    break
+
+            if invariant:
+                invariant_options.append(name)
+                logger.info(f"🔎 Option '{name}' does not affect the price ({len(values)} values, {samples} samples)")
+
+        logger.info(f"Invariance probe used {self.probe_calls} API calls; price-invariant options: {invariant_options or 'none'}")
+        return invariant_options
+
+    def _make_api_call(self,
+                       template: PayloadTemplate,
+                       options_dict: Dict[str, str],
+                       payload_memo: Optional[PayloadMemo] = None,
+                       use_cache: bool = True) -> Dict[str, Any]:
+        """Make API call to get price for specific combination
+
+        With a ``payload_memo`` a canonical payload is sent once while its
+        response is memoized, and shared by every combination that produces it.
+        With ``use_cache=False`` the response cache is not read (responses are
+        still stored). Real quotes confirm their mappings in the attribute
+        registry.
+        """
+
+        with self.timer.phase('payload'):
+            payload, error_result = self._prepare_payload(template, options_dict)
+        if error_result:
+            return error_result
+
+        combo_key = template.combination_key(options_dict)
+
+        if payload_memo is None:
+            api_result = self._fetch_price(payload, combo_key, use_cache=use_cache)
+        else:
+            key = template.memo_key(payload)
+            shared_response = payload_memo.get(key)
+            if shared_response is not None:
+                return self._shared_result(shared_response, combo_key, payload)
+
+            api_result = self._fetch_price(payload, combo_key, use_cache=use_cache)
+            if api_result['success']:
+                payload_memo.put(key, self._memo_response(api_result))
+
+        if api_result['success']:
+            attribute_registry.confirm(template.slots, options_dict, api_result)
+        return api_result
+
+    def _fetch_price(self, payload: Dict[str, Any], combo_key: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Get the price for a payload from the response cache or the computePrice endpoint
+
+        Transient failures are retried with jittered exponential backoff (see
+        ``RetryPolicy``), and every call waits while the circuit breaker is open.
+        ``use_cache=False`` always calls the endpoint.
+        """
+
+        if use_cache:
+            with self.timer.phase('cache'):
+                cached_result = self._cached_result(payload, combo_key)
+            if cached_result:
+                return cached_result
+
+        attempt = 0
+        while True:
+            # Wait for the circuit breaker and the shared rate limiter before calling the API
+            with self.timer.phase('rate_limit'):
+                circuit_breaker.before_call()
+                rate_limiter.acquire()
+
+            api_result = self._post_price(payload, combo_key)
+            retryable = retry_policy.is_retryable(api_result)
+            circuit_breaker.record(not retryable)
+            if not retryable or attempt >= retry_policy.max_retries:
+                return api_result
 
+            attempt += 1
+            self.retry_count += 1
+            metrics.retries.inc(product=self.metrics_product)
+            delay = retry_policy.delay(attempt, api_result.get('retry_after'))
+            logger.warning(f"🔁 Retrying {combo_key} in {delay:.1f}s (attempt {attempt}/{retry_policy.max_retries}): {api_result.get('error', '')[:80]}")
+            with self.timer.phase('retry_backoff'):
+                time.sleep(delay)
+
+    def _post_price(self, payload: Dict[str, Any], combo_key: str) -> Dict[str, Any]:
+        """Send one computePrice request"""
+
+        request_start = time.monotonic()
+        metrics.compute_price_in_flight.inc(product=self.metrics_product)
+        try:
+            # Call computePrice endpoint
+            with self.timer.phase('http'):
+                response = self.session.post(
+                    self._compute_price_url(),
+                    json=payload,
+                    timeout=15
+                )
+            latency = time.monotonic() - request_start
+            rate_limiter.record(latency, response.status_code)
+            self._record_request_metrics(latency, response.status_code)
+
+            # Lazy, so the body is only decoded to text when debug logging is on
+            with self.timer.phase('logging'):
+                logger.opt(lazy=True).debug("API Response {}: {}", lambda: response.status_code, lambda: response.text[:200])
+
+            if response.status_code == 200:
+                with self.timer.phase('decode'):
+                    data = decode_price_response(response.content)
+                with self.timer.phase('cache'):
+                    response_cache.put(payload, data)
+                return self._parse_price_response(data, payload, combo_key)
+            else:
+                return self._http_error_result(response.status_code, response.text, payload, response.headers.get('Retry-After'))
         except requests.exceptions.RequestException as e:
+            rate_limiter.record(time.monotonic() - request_start, None, timed_out=isinstance(e, requests.exceptions.Timeout))
+            self._record_request_metrics(time.monotonic() - request_start, None)
             logger.error(f"❌ Network Error: {e}")
             return {
                 'success': False,
                 'error': str(e),
+                'transient': True,
                 'payload': payload
             }
         except json.JSONDecodeError as e:
@@ -337,114 +1343,440 @@ class PriceExtractor:
             return {
                 'success': False,
                 'error': f'JSON decode error: {e}',
+                'decode_error': True,
                 'payload': payload
             }
+        finally:
+            metrics.compute_price_in_flight.dec(product=self.metrics_product)
 
-    def _validate_extraction_payload(self, payload: Dict[str, Any], options_dict: Dict[str, str]) -> Dict[str, Any]:
-        """Validate payload to prevent 412 errors during extraction"""
-
-        # Check for common mismatches that cause 412 errors
-        validation_errors = []
-
-        # Check if printing time IDs are being used for wrong attributes
-        printing_time_ids = set()
-        for option_name, option_id in options_dict.items():
-            if 'time' in option_name.lower() or 'day' in option_name.lower():
-                printing_time_ids.add(option_id)
-
-        # Validate attr4 (printed side) doesn't use printing time IDs
-        if 'attr4' in payload and payload['attr4'] in printing_time_ids:
-            validation_errors.append(f"attr4 (printed side) using printing time ID {payload['attr4']}")
-
-        # Validate attr6 (printing time) doesn't use printed side IDs
-        printed_side_ids = set()
-        for option_name, option_id in options_dict.items():
-            if ('side' in option_name.lower() or 'page' in option_name.lower()) and 'time' not in option_name.lower():
-                printed_side_ids.add(option_id)
-
-        if 'attr6' in payload and payload['attr6'] in printed_side_ids:
-            validation_errors.append(f"attr6 (printing time) using printed side ID {payload['attr6']}")
-
-        # Check for duplicate IDs across different attributes
-        used_ids = {}
-        for attr, value in payload.items():
-            if attr.startswith('attr') and attr != 'product_id':
-                if value in used_ids:
-                    validation_errors.append(f"ID {value} used for both {used_ids[value]} and {attr}")
-                else:
-                    used_ids[value] = attr
+    async def _make_api_call_async(self,
+                                   http_session,
+                                   template: PayloadTemplate,
+                                   options_dict: Dict[str, str],
+                                   payload_memo: Optional[PayloadMemo] = None,
+                                   use_cache: bool = True) -> Dict[str, Any]:
+        """Make API call to get price for specific combination using an aiohttp session
+
+        Combinations sharing a canonical payload reuse its memoized response,
+        or wait for the request already in flight (``PayloadMemo.in_flight``).
+        With ``use_cache=False`` the response cache is not read (responses are
+        still stored). Real quotes confirm their mappings in the attribute
+        registry.
+        """
+
+        with self.timer.phase('payload'):
+            payload, error_result = self._prepare_payload(template, options_dict)
+        if error_result:
+            return error_result
+
+        combo_key = template.combination_key(options_dict)
+
+        if payload_memo is None:
+            api_result = await self._fetch_price_async(http_session, payload, combo_key, use_cache=use_cache)
+            if api_result['success']:
+                attribute_registry.confirm(template.slots, options_dict, api_result)
+            return api_result
+
+        key = template.memo_key(payload)
+        shared_response = payload_memo.get(key)
+        if shared_response is not None:
+            return self._shared_result(shared_response, combo_key, payload)
+
+        pending = payload_memo.in_flight.get(key)
+        if pending is not None:
+            shared_result = await pending
+            if not shared_result['success']:
+                return dict(shared_result)
+            return self._shared_result(self._memo_response(shared_result), combo_key, payload)
+
+        future = asyncio.get_running_loop().create_future()
+        payload_memo.in_flight[key] = future
+        api_result = {'success': False, 'error': 'Request aborted', 'transient': True, 'payload': payload}
+        try:
+            api_result = await self._fetch_price_async(http_session, payload, combo_key, use_cache=use_cache)
+        finally:
+            # Only the resolved response fields are kept; failed payloads are requested again later
+            del payload_memo.in_flight[key]
+            if api_result['success']:
+                payload_memo.put(key, self._memo_response(api_result))
+            future.set_result(api_result)
+        if api_result['success']:
+            attribute_registry.confirm(template.slots, options_dict, api_result)
+        return api_result
+
+    async def _fetch_price_async(self, http_session, payload: Dict[str, Any], combo_key: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Get the price for a payload from the response cache or the computePrice endpoint via aiohttp
+
+        Retries and circuit breaking match ``_fetch_price``; waits never block
+        the event loop. ``use_cache=False`` always calls the endpoint.
+        """
+
+        if use_cache:
+            with self.timer.phase('cache'):
+                cached_result = self._cached_result(payload, combo_key)
+            if cached_result:
+                return cached_result
+
+        attempt = 0
+        while True:
+            with self.timer.phase('rate_limit'):
+                await circuit_breaker.before_call_async()
+                await rate_limiter.acquire_async()
+
+            api_result = await self._post_price_async(http_session, payload, combo_key)
+            retryable = retry_policy.is_retryable(api_result)
+            circuit_breaker.record(not retryable)
+            if not retryable or attempt >= retry_policy.max_retries:
+                return api_result
+
+            attempt += 1
+            self.retry_count += 1
+            metrics.retries.inc(product=self.metrics_product)
+            delay = retry_policy.delay(attempt, api_result.get('retry_after'))
+            logger.warning(f"🔁 Retrying {combo_key} in {delay:.1f}s (attempt {attempt}/{retry_policy.max_retries}): {api_result.get('error', '')[:80]}")
+            with self.timer.phase('retry_backoff'):
+                await asyncio.sleep(delay)
 
-        if validation_errors:
+    async def _post_price_async(self, http_session, payload: Dict[str, Any], combo_key: str) -> Dict[str, Any]:
+        """Send one computePrice request via aiohttp"""
+
+        import aiohttp
+
+        request_start = time.monotonic()
+        metrics.compute_price_in_flight.inc(product=self.metrics_product)
+        try:
+            with self.timer.phase('http'):
+                async with http_session.post(self._compute_price_url(), json=payload) as response:
+                    body = await response.read()
+            latency = time.monotonic() - request_start
+            rate_limiter.record(latency, response.status)
+            self._record_request_metrics(latency, response.status)
+
+            with self.timer.phase('logging'):
+                logger.opt(lazy=True).debug("API Response {}: {}", lambda: response.status, lambda: body[:200])
+
+            if response.status == 200:
+                with self.timer.phase('decode'):
+                    data = decode_price_response(body)
+                with self.timer.phase('cache'):
+                    response_cache.put(payload, data)
+                return self._parse_price_response(data, payload, combo_key)
+            else:
+                return self._http_error_result(response.status, body.decode('utf-8', errors='replace'), payload, response.headers.get('Retry-After'))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            rate_limiter.record(time.monotonic() - request_start, None, timed_out=isinstance(e, asyncio.TimeoutError))
+            self._record_request_metrics(time.monotonic() - request_start, None)
+            logger.error(f"❌ Network Error: {e!r}")
+            return {
+                'success': False,
+                'error': repr(e),
+                'transient': True,
+                'payload': payload
+            }
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ JSON Error: {e}")
             return {
-                'valid': False,
-                'error': '; '.join(validation_errors),
+                'success': False,
+                'error': f'JSON decode error: {e}',
+                'decode_error': True,
                 'payload': payload
             }
+        finally:
+            metrics.compute_price_in_flight.dec(product=self.metrics_product)
 
-        return {'valid': True}
-    
-    def _create_formatted_csv(self, results: List[Dict], product_name: str, options: Dict[str, List]) -> Path:
-        """Create formatted CSV with options as columns and quantities as rows"""
-        
-        if not results:
+    def _record_request_metrics(self, latency: float, status_code: Optional[int]):
+        """Count a computePrice request by status and record its latency"""
+
+        metrics.compute_price_requests.inc(product=self.metrics_product, status=status_code or 'error')
+        metrics.compute_price_latency.observe(latency, product=self.metrics_product)
+
+    def _memo_response(self, api_result: Dict[str, Any]) -> Dict[str, Any]:
+        """The response fields of a successful result that the payload memo keeps"""
+
+        response = api_result['full_response']
+        return {field: response[field] for field in PRICE_FIELDS if field in response}
+
+    def _shared_result(self, shared_response: Dict[str, Any], combo_key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Reuse the response of an identical payload for another combination"""
+
+        self.api_calls_saved += 1
+        result = self._parse_price_response(shared_response, payload, combo_key)
+        result['deduplicated'] = True
+        return result
+
+    def _cached_result(self, payload: Dict[str, Any], combo_key: str) -> Optional[Dict[str, Any]]:
+        """Serve a combination from the persistent response cache if possible"""
+
+        data = response_cache.get(payload)
+        if data is None:
+            self.cache_misses += 1
+            metrics.cache_lookups.inc(product=self.metrics_product, result='miss')
             return None
-        
-        # Create DataFrame
-        df = pd.DataFrame(results)
-        
-        # Find quantity column (usually contains numbers)
-        quantity_col = None
-        for col in df.columns:
-            if col.lower() in ['quantity', 'qty'] or 'quantity' in col.lower():
-                quantity_col = col
-                break
-        
-        if quantity_col:
-            # Pivot table with quantities as rows and other options as columns
-            option_cols = [col for col in df.columns if col not in [
-                'combination_id', 'product_name', 'price', 'total_price', 
-                'unit_price', 'qty_pieces', 'turnaround_days', 'timestamp', 'notes'
-            ] and not col.endswith('_id') and col != quantity_col]
-            
-            # Create multi-level columns
-            if len(option_cols) > 0:
-                # Group by non-quantity options and create pivot
-                grouped = df.groupby(option_cols + [quantity_col])['price'].first().unstack(quantity_col)
-                
-                # Clean up the result
-                formatted_df = grouped.fillna('N/A')
-                
-                # Save formatted CSV
-                safe_name = self._safe_filename(product_name)
-                filename = f"{safe_name}_Formatted_Prices.csv"
-                filepath = OUTPUT_DIR / filename
-                
-                formatted_df.to_csv(filepath)
-                logger.info(f"Created formatted CSV: {filepath}")
-                
-                return filepath
-        
-        # Fallback: create simple formatted version
-        return self._create_raw_csv(results, product_name)
+
+        self.cache_hits += 1
+        metrics.cache_lookups.inc(product=self.metrics_product, result='hit')
+        result = self._parse_price_response(data, payload, combo_key)
+        result['cached'] = True
+        return result
+
+    def _compute_price_url(self) -> str:
+        """URL of the computePrice endpoint"""
+        return f"{self.api_base_url}/computePrice?website_code=UP"
+
+    def _prepare_payload(self, template: PayloadTemplate, options_dict: Dict[str, str]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Fill the compiled template and validate it, returning an error result if invalid"""
+
+        payload = template.build(options_dict)
+
+        # Validate payload before sending to prevent 412 errors
+        validation_result = template.validate(payload, options_dict)
+        if not validation_result['valid']:
+            logger.error(f"❌ Invalid payload detected: {validation_result['error']}")
+            return payload, {
+                'success': False,
+                'error': f"Payload validation failed: {validation_result['error']}",
+                'validation_error': True,
+                'payload': payload
+            }
+
+        return payload, None
+
+    def _http_error_result(self, status_code: int, body: str, payload: Dict[str, Any], retry_after: Optional[str] = None) -> Dict[str, Any]:
+        """Build the error result for a non-200 computePrice response"""
+
+        error_msg = f'HTTP {status_code}: {body[:200]}'
+        logger.error(f"❌ API Error: {error_msg}")
+        result = {
+            'success': False,
+            'error': error_msg,
+            'status_code': status_code,
+            'payload': payload
+        }
+        try:
+            # Retry-After in seconds; the HTTP-date form is left to the backoff
+            result['retry_after'] = float(retry_after) if retry_after else None
+        except ValueError:
+            result['retry_after'] = None
+        return result
+
+    def _parse_price_response(self, data: Dict[str, Any], payload: Dict[str, Any], combo_key: str) -> Dict[str, Any]:
+        """Turn a successful computePrice response into an extraction result"""
+
+        price = data.get('price', 'N/A')
+        turnaround = data.get('turnaround', 'N/A')
+
+        with self.timer.phase('logging'):
+            if price != 'N/A' and price != '20':  # Check for the $20 default issue
+                logger.debug(f"✅ API Success: ${price} (turnaround: {turnaround}) for {combo_key}")
+            else:
+                logger.warning(f"⚠️ Suspicious price: ${price} for {combo_key}")
+
+            logger.debug(f"API payload: {payload}")
+
+        return {
+            'success': True,
+            'price': price,
+            'total_price': data.get('total_price', 'N/A'),
+            'qty': data.get('qty', 'N/A'),
+            'turnaround': turnaround,
+            'unit_price': data.get('unit_price', 'N/A'),
+            'payload': payload,
+            'full_response': data,
+            'combination_key': combo_key
+        }
     
-    def _create_raw_csv(self, results: List[Dict], product_name: str) -> Path:
-        """Create raw CSV with all data"""
-        
-        if not results:
-            return None
-        
-        df = pd.DataFrame(results)
-        
-        # Save raw CSV
+    def _find_quantity_option(self, option_names: List[str]) -> Optional[str]:
+        """Name of the quantity option, if any"""
+
+        for name in option_names:
+            if name.lower() in ['quantity', 'qty'] or 'quantity' in name.lower():
+                return name
+        return None
+
+    def _supports_sparse_quantity(self, options: Dict[str, List[Dict[str, str]]], quantity_option: Optional[str]) -> bool:
+        """Whether the quantity ladder is long and numeric enough to interpolate"""
+
+        if not quantity_option:
+            logger.warning("⚠️ Sparse quantity mode needs a quantity option; extracting every combination")
+            return False
+
+        quantities = [parse_quantity(value['text']) for value in options[quantity_option]]
+        if any(not quantity for quantity in quantities) or len(set(quantities)) != len(quantities):
+            logger.warning(f"⚠️ Quantities of '{quantity_option}' are not distinct numbers; extracting every combination")
+            return False
+
+        if len(quantities) <= max(2, config.sparse_quantity_anchors):
+            logger.info(f"Quantity ladder of {len(quantities)} values is too short to interpolate; extracting every combination")
+            return False
+
+        return True
+
+    def _raw_csv_columns(self, option_names: List[str], price_source: bool = False) -> List[str]:
+        """Column order of the Raw CSV; sparse quantity runs add ``price_source``"""
+
+        return (
+            ['combination_id', 'product_name'] + option_names +
+            ['price', 'total_price', 'unit_price', 'qty_pieces', 'turnaround_days'] +
+            (['price_source'] if price_source else []) +
+            [f"{name}_id" for name in option_names] +
+            ['timestamp', 'notes']
+        )
+
+    def _raw_csv_path(self, product_name: str, shard: Optional[Tuple[int, int]] = None) -> Path:
+        """Path of the Raw CSV for a product, or of one combination range of it"""
+
         safe_name = self._safe_filename(product_name)
-        filename = f"{safe_name}_Raw_Prices.csv"
-        filepath = OUTPUT_DIR / filename
+        if shard:
+            return OUTPUT_DIR / f"{safe_name}_Raw_Prices.part{shard[0]:09d}-{shard[1]:09d}.csv"
+        return OUTPUT_DIR / f"{safe_name}_Raw_Prices.csv"
+
+    def _create_formatted_csv(self, raw_csv_path: Path, product_name: str, options: Dict[str, List]) -> Path:
+        """Create formatted CSV with options as columns and quantities as rows
+
+        The Raw CSV is read back in ``config.batch_size`` chunks. Raw rows are in
+        combination order, so every formatted row is complete once the options
+        before the quantity option change value; each such block is written and
+        released, keeping memory bounded by the size of one block.
+        """
         
-        df.to_csv(filepath, index=False)
-        logger.info(f"Created raw CSV: {filepath}")
+        option_names = list(options.keys())
+        quantity_col = self._find_quantity_option(option_names)
         
+        option_cols = [col for col in option_names if col != quantity_col]
+
+        if not quantity_col or not option_cols:
+            # Fallback: the raw CSV is the formatted version
+            return raw_csv_path
+
+        quantity_position = option_names.index(quantity_col)
+        outer_cols = option_names[:quantity_position]
+        quantity_labels = list(dict.fromkeys(value['text'] for value in options[quantity_col]))
+
+        safe_name = self._safe_filename(product_name)
+        filepath = OUTPUT_DIR / f"{safe_name}_Formatted_Prices.csv"
+
+        # Interpolated prices from sparse quantity runs are marked with '~'
+        with open(raw_csv_path, 'r', newline='', encoding='utf-8') as f:
+            has_price_source = 'price_source' in next(csv.reader(f))
+
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(option_cols + quantity_labels)
+
+            block_key = None
+            block_rows = {}
+
+            def write_block():
+                for row_key, prices in block_rows.items():
+                    writer.writerow(list(row_key) + [prices.get(label, 'N/A') for label in quantity_labels])
+
+            chunks = pd.read_csv(
+                raw_csv_path,
+                usecols=option_names + ['price'] + (['price_source'] if has_price_source else []),
+                dtype=str,
+                keep_default_na=False,
+                chunksize=max(1, config.batch_size)
+            )
+            for chunk in chunks:
+                for record in chunk.itertuples(index=False, name=None):
+                    labels = dict(zip(chunk.columns, record))
+
+                    current_block = tuple(labels[col] for col in outer_cols)
+                    if current_block != block_key:
+                        write_block()
+                        block_key = current_block
+                        block_rows = {}
+
+                    price = labels['price']
+                    if has_price_source and labels['price_source'] == 'interpolated':
+                        price = f"~{price}"
+
+                    row_key = tuple(labels[col] for col in option_cols)
+                    block_rows.setdefault(row_key, {}).setdefault(labels[quantity_col], price)
+
+            write_block()
+
+        logger.info(f"Created formatted CSV: {filepath}")
         return filepath
     
+    def _create_formatted_csv_from_tensor(self, price_tensor: PriceTensor, raw_csv_path: Path, product_name: str, options: Dict[str, List]) -> Path:
+        """Create the formatted CSV by pivoting the price tensor on the quantity axis
+
+        Same layout as ``_create_formatted_csv``: one row per setting of the
+        other options (rows without any price are left out), one column per
+        quantity label, first extracted price where labels repeat.
+        """
+
+        option_names = list(options.keys())
+        quantity_col = self._find_quantity_option(option_names)
+
+        option_cols = [col for col in option_names if col != quantity_col]
+
+        if not quantity_col or not option_cols:
+            # Fallback: the raw CSV is the formatted version
+            return raw_csv_path
+
+        quantity_position = option_names.index(quantity_col)
+        column_positions = {}
+        for position, value in enumerate(options[quantity_col]):
+            column_positions.setdefault(value['text'], []).append(position)
+
+        prices, interpolated = price_tensor.pivot(quantity_position)
+        prices, interpolated = price_tensor.merge_columns(prices, interpolated, column_positions)
+        has_price = ~np.isnan(prices)
+        row_labels = product(*([value['text'] for value in options[col]] for col in option_cols))
+
+        safe_name = self._safe_filename(product_name)
+        filepath = OUTPUT_DIR / f"{safe_name}_Formatted_Prices.csv"
+
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(option_cols + list(column_positions))
+
+            for row, labels in enumerate(row_labels):
+                if not has_price[row].any():
+                    continue
+
+                cells = []
+                for column, price in enumerate(prices[row].tolist()):
+                    if not has_price[row, column]:
+                        cells.append('N/A')
+                    elif interpolated is not None and interpolated[row, column]:
+                        # Interpolated prices from sparse quantity runs are marked with '~'
+                        cells.append(f"~${price:.2f}")
+                    else:
+                        cells.append(f"${price:.2f}")
+                writer.writerow(list(labels) + cells)
+
+        logger.info(f"Created formatted CSV: {filepath} (price tensor: {price_tensor.nbytes / 1024:,.0f} KB)")
+        return filepath
+
+    def _create_parquet(self,
+                        raw_csv_path: Path,
+                        analysis_result: Dict[str, Any],
+                        options: Dict[str, List],
+                        run_details: Dict[str, Any]) -> Optional[Path]:
+        """Write the Parquet copy of the Raw CSV, carrying the analysis in its metadata"""
+
+        metadata = {
+            'product_name': analysis_result['product_name'],
+            'product_id': analysis_result['product_id'],
+            'product_url': analysis_result.get('product_url'),
+            'options': options,
+            'attribute_mappings': analysis_result.get('attribute_mappings', {}),
+            'total_combinations': CombinationIndex(list(options.values())).total,
+            'extraction_timestamp': datetime.now().isoformat(),
+            **run_details
+        }
+        parquet_path = OUTPUT_DIR / f"{self._safe_filename(analysis_result['product_name'])}_Prices.parquet"
+
+        try:
+            return write_prices_parquet(raw_csv_path, parquet_path, metadata)
+        except Exception as e:
+            # The CSVs are the primary output; a failed Parquet copy does not fail the run
+            logger.error(f"❌ Failed to write Parquet output: {e}")
+            return None
+
     def _safe_filename(self, name: str) -> str:
         """Create safe filename from product name"""
         import re
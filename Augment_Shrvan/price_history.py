@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Price History Module
+===================
+
+Persistent SQLite history of extracted prices across runs.
+
+Prices are keyed by ``product_id`` and the combination's option-ID tuple
+(``Option=ID`` pairs sorted by option name). Each run writes a row only for
+combinations whose price changed or that were never seen before, run-length
+style, so a product re-extracted daily costs storage only for the prices
+that moved. A ``latest`` table holds the current price of every combination
+for change detection, and ``prices`` holds every change with its timestamp
+for "price at time T" queries.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Union
+from loguru import logger
+
+from config import config
+
+# Rows per executemany call while staging a run
+STAGE_BATCH_SIZE = 10000
+
+def combination_key(option_ids: Dict[str, str]) -> str:
+    """Canonical option-ID tuple of a combination: ``Option=ID`` pairs sorted by option name"""
+
+    return '&'.join(f"{name}={value}" for name, value in sorted(option_ids.items()))
+
+def _cents(price: str) -> Optional[int]:
+    """'$1,250.00' -> 125000"""
+
+    try:
+        return int(round(float(str(price).replace('$', '').replace(',', '')) * 100))
+    except (TypeError, ValueError):
+        return None
+
+def _timestamp(when: Union[float, datetime, str]) -> float:
+    """Epoch seconds from a timestamp, datetime or ISO string"""
+
+    if isinstance(when, datetime):
+        return when.timestamp()
+    if isinstance(when, str):
+        return datetime.fromisoformat(when).timestamp()
+    return float(when)
+
+class PriceHistory:
+    """SQLite store of price changes per product and combination"""
+
+    def __init__(self, db_path: Path, enabled: bool = True):
+        self.db_path = Path(db_path)
+        self.enabled = enabled
+
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'PriceHistory':
+        """Create a store from the framework configuration"""
+
+        return cls(db_path=config.price_history_path, enabled=config.price_history_enabled)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily, once per process (caller holds the lock)"""
+
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_id TEXT NOT NULL,
+                    product_name TEXT,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    combinations INTEGER,
+                    changed INTEGER,
+                    new INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_runs_product ON runs(product_id, run_id);
+
+                CREATE TABLE IF NOT EXISTS prices (
+                    product_id TEXT NOT NULL,
+                    combination_key TEXT NOT NULL,
+                    valid_from REAL NOT NULL,
+                    run_id INTEGER NOT NULL,
+                    price_cents INTEGER,
+                    total_price_cents INTEGER,
+                    PRIMARY KEY (product_id, combination_key, valid_from)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_prices_run ON prices(product_id, run_id);
+
+                CREATE TABLE IF NOT EXISTS latest (
+                    product_id TEXT NOT NULL,
+                    combination_key TEXT NOT NULL,
+                    price_cents INTEGER,
+                    total_price_cents INTEGER,
+                    valid_from REAL NOT NULL,
+                    run_id INTEGER NOT NULL,
+                    labels TEXT,
+                    PRIMARY KEY (product_id, combination_key)
+                ) WITHOUT ROWID;
+            """)
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def record_run(self,
+                   product_id: str,
+                   product_name: str,
+                   raw_csv_path: Path,
+                   option_names: List[str],
+                   started_at: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Store the prices of a Raw CSV that differ from the latest known ones, in one transaction
+
+        Interpolated prices (sparse quantity runs) are estimates and are not
+        recorded. Returns ``{'run_id', 'combinations', 'changed', 'new'}``,
+        or None if the store is disabled or the write failed.
+        """
+
+        if not self.enabled:
+            return None
+
+        product_id = str(product_id)
+        valid_from = started_at or time.time()
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    run_id = connection.execute(
+                        'INSERT INTO runs (product_id, product_name, started_at) VALUES (?, ?, ?)',
+                        (product_id, product_name, valid_from)
+                    ).lastrowid
+
+                    connection.execute("""
+                        CREATE TEMP TABLE IF NOT EXISTS staged (
+                            combination_key TEXT PRIMARY KEY,
+                            price_cents INTEGER,
+                            total_price_cents INTEGER,
+                            labels TEXT
+                        )
+                    """)
+                    connection.execute('DELETE FROM staged')
+                    combinations = self._stage(connection, raw_csv_path, option_names)
+
+                    new = connection.execute("""
+                        SELECT COUNT(*) FROM staged s
+                        WHERE NOT EXISTS (SELECT 1 FROM latest l WHERE l.product_id = ? AND l.combination_key = s.combination_key)
+                    """, (product_id,)).fetchone()[0]
+
+                    # Run-length: only prices that differ from the latest known ones get a row
+                    changed = connection.execute("""
+                        INSERT INTO prices (product_id, combination_key, valid_from, run_id, price_cents, total_price_cents)
+                        SELECT ?, s.combination_key, ?, ?, s.price_cents, s.total_price_cents
+                        FROM staged s
+                        LEFT JOIN latest l ON l.product_id = ? AND l.combination_key = s.combination_key
+                        WHERE l.combination_key IS NULL
+                           OR l.price_cents IS NOT s.price_cents
+                           OR l.total_price_cents IS NOT s.total_price_cents
+                    """, (product_id, valid_from, run_id, product_id)).rowcount
+
+                    connection.execute("""
+                        INSERT INTO latest (product_id, combination_key, price_cents, total_price_cents, valid_from, run_id, labels)
+                        SELECT p.product_id, p.combination_key, p.price_cents, p.total_price_cents, p.valid_from, p.run_id, s.labels
+                        FROM prices p JOIN staged s ON s.combination_key = p.combination_key
+                        WHERE p.product_id = ? AND p.run_id = ?
+                        ON CONFLICT (product_id, combination_key) DO UPDATE SET
+                            price_cents = excluded.price_cents,
+                            total_price_cents = excluded.total_price_cents,
+                            valid_from = excluded.valid_from,
+                            run_id = excluded.run_id,
+                            labels = excluded.labels
+                    """, (product_id, run_id))
+
+                    connection.execute(
+                        'UPDATE runs SET finished_at = ?, combinations = ?, changed = ?, new = ? WHERE run_id = ?',
+                        (time.time(), combinations, changed - new, new, run_id)
+                    )
+                    connection.execute('DELETE FROM staged')
+
+            logger.info(f"🗄️ Price history: {combinations:,} prices, {changed - new:,} changed, {new:,} new (run {run_id})")
+            return {'run_id': run_id, 'combinations': combinations, 'changed': changed - new, 'new': new}
+
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Price history write failed: {e}")
+            return None
+
+    def _stage(self, connection: sqlite3.Connection, raw_csv_path: Path, option_names: List[str]) -> int:
+        """Copy the API prices of a Raw CSV into the staging table in batches; returns the row count"""
+
+        staged = 0
+        batch = []
+
+        with open(raw_csv_path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('price_source') == 'interpolated':
+                    continue
+
+                option_ids = {name: row[f"{name}_id"] for name in option_names}
+                labels = json.dumps({name: row[name] for name in option_names}, ensure_ascii=False)
+                batch.append((combination_key(option_ids), _cents(row['price']), _cents(row['total_price']), labels))
+
+                if len(batch) >= STAGE_BATCH_SIZE:
+                    connection.executemany('INSERT OR REPLACE INTO staged VALUES (?, ?, ?, ?)', batch)
+                    staged += len(batch)
+                    batch = []
+
+        if batch:
+            connection.executemany('INSERT OR REPLACE INTO staged VALUES (?, ?, ?, ?)', batch)
+            staged += len(batch)
+        return staged
+
+    def last_run(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """The most recent completed run of a product"""
+
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT * FROM runs WHERE product_id = ? AND finished_at IS NOT NULL ORDER BY run_id DESC LIMIT 1',
+                (str(product_id),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def runs(self, product_id: str) -> List[Dict[str, Any]]:
+        """Every completed run of a product, oldest first"""
+
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT * FROM runs WHERE product_id = ? AND finished_at IS NOT NULL ORDER BY run_id',
+                (str(product_id),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def price_at(self, product_id: str, when: Union[float, datetime, str], key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Price of every combination (or of ``key``) as it was at ``when``
+
+        One index seek per combination on ``(product_id, combination_key, valid_from)``.
+        """
+
+        product_id = str(product_id)
+        query = """
+            SELECT l.combination_key, l.labels, p.price_cents, p.total_price_cents, p.valid_from
+            FROM latest l
+            JOIN prices p ON p.product_id = l.product_id AND p.combination_key = l.combination_key
+            WHERE l.product_id = ?
+              AND p.valid_from = (
+                  SELECT MAX(q.valid_from) FROM prices q
+                  WHERE q.product_id = l.product_id AND q.combination_key = l.combination_key AND q.valid_from <= ?
+              )
+        """
+        params = [product_id, _timestamp(when)]
+        if key is not None:
+            query += ' AND l.combination_key = ?'
+            params.append(key)
+
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [self._price_row(row) for row in rows]
+
+    def changed_since_last_run(self, product_id: str, include_new: bool = False) -> List[Dict[str, Any]]:
+        """Combinations whose price changed in the most recent run, with the previous price"""
+
+        last_run = self.last_run(product_id)
+        if last_run is None:
+            return []
+
+        query = """
+            SELECT p.combination_key, l.labels, p.price_cents, p.total_price_cents, p.valid_from,
+                   (SELECT q.price_cents FROM prices q
+                    WHERE q.product_id = p.product_id AND q.combination_key = p.combination_key AND q.valid_from < p.valid_from
+                    ORDER BY q.valid_from DESC LIMIT 1) AS previous_price_cents
+            FROM prices p
+            JOIN latest l ON l.product_id = p.product_id AND l.combination_key = p.combination_key
+            WHERE p.product_id = ? AND p.run_id = ?
+        """
+        with self._lock:
+            rows = self._connect().execute(query, (str(product_id), last_run['run_id'])).fetchall()
+
+        changes = []
+        for row in rows:
+            change = self._price_row(row)
+            previous = row['previous_price_cents']
+            change['previous_price'] = previous / 100 if previous is not None else None
+            if previous is None and not include_new:
+                continue
+            changes.append(change)
+        return changes
+
+    def _price_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Query row as a dict with prices in dollars"""
+
+        return {
+            'combination_key': row['combination_key'],
+            'options': json.loads(row['labels']) if row['labels'] else {},
+            'price': row['price_cents'] / 100 if row['price_cents'] is not None else None,
+            'total_price': row['total_price_cents'] / 100 if row['total_price_cents'] is not None else None,
+            'valid_from': datetime.fromtimestamp(row['valid_from']).isoformat()
+        }
+
+# Global price history store
+price_history = PriceHistory.from_config()
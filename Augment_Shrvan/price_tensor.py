@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Price Tensor Module
+==================
+
+Dense in-memory prices of one extraction run.
+
+Prices are held in a flat ``float32`` array indexed by combination index
+(see ``CombinationIndex``), so ``reshape(radices)`` gives one axis per
+option, indexed by value position. Failed or missing combinations are NaN,
+and interpolated prices from sparse quantity runs are flagged in a parallel
+boolean array. The Formatted CSV is a transpose and reshape of this array
+instead of a pass over the Raw CSV.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# float32 keeps cents exact below 2**17; larger prices switch the tensor to float64
+FLOAT32_EXACT_LIMIT = 2 ** 17
+
+class PriceTensor:
+    """Prices of every combination, NaN where none was extracted"""
+
+    def __init__(self, radices: List[int], track_interpolated: bool = False):
+        self.radices = list(radices)
+        self.size = int(np.prod(self.radices, dtype=np.int64)) if self.radices else 0
+        self.prices = np.full(self.size, np.nan, dtype=np.float32)
+        self.interpolated = np.zeros(self.size, dtype=bool) if track_interpolated else None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays"""
+
+        return self.prices.nbytes + (self.interpolated.nbytes if self.interpolated is not None else 0)
+
+    @property
+    def missing(self) -> np.ndarray:
+        """NaN mask of combinations without a price"""
+
+        return np.isnan(self.prices)
+
+    def set(self, index: int, price: Optional[float], interpolated: bool = False):
+        """Store the price of combination ``index`` (0-based); ``None`` leaves it missing"""
+
+        if price is None:
+            return
+        if self.prices.dtype == np.float32 and abs(price) >= FLOAT32_EXACT_LIMIT:
+            self.prices = self.prices.astype(np.float64)
+
+        self.prices[index] = price
+        if interpolated and self.interpolated is not None:
+            self.interpolated[index] = True
+
+    def array(self) -> np.ndarray:
+        """Prices as an array with one axis per option (a view, not a copy)"""
+
+        return self.prices.reshape(self.radices)
+
+    def pivot(self, axis: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Move option ``axis`` last and flatten the rest
+
+        Returns a ``(rows, radices[axis])`` price matrix and the matching
+        interpolated mask. Rows follow combination order of the other options.
+        """
+
+        width = self.radices[axis]
+        prices = np.moveaxis(self.array(), axis, -1).reshape(-1, width)
+        interpolated = None
+        if self.interpolated is not None:
+            interpolated = np.moveaxis(self.interpolated.reshape(self.radices), axis, -1).reshape(-1, width)
+        return prices, interpolated
+
+    def merge_columns(self,
+                      prices: np.ndarray,
+                      interpolated: Optional[np.ndarray],
+                      column_positions: Dict[str, List[int]]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Collapse pivot columns sharing a label, taking the first position with a price"""
+
+        merged = np.empty((prices.shape[0], len(column_positions)), dtype=prices.dtype)
+        merged_interpolated = None if interpolated is None else np.zeros(merged.shape, dtype=bool)
+
+        for column, positions in enumerate(column_positions.values()):
+            merged[:, column] = prices[:, positions[0]]
+            if merged_interpolated is not None:
+                merged_interpolated[:, column] = interpolated[:, positions[0]]
+
+            for position in positions[1:]:
+                fill = np.isnan(merged[:, column])
+                merged[fill, column] = prices[fill, position]
+                if merged_interpolated is not None:
+                    merged_interpolated[fill, column] = interpolated[fill, position]
+
+        return merged, merged_interpolated
@@ -13,54 +13,96 @@ import requests
 import re
 import json
 import time
-from bs4 import BeautifulSoup
+from concurrent.futures import Executor
+from bs4 import BeautifulSoup, UnicodeDammit
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 from loguru import logger
 
-from config import config, UPRINTING_HEADERS
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+from config import config
 from ai_integration import ai_manager
+from rate_limiter import AdaptiveRateLimiter, rate_limiter
+from http_transport import http_transport
+import metrics
+from profiling import PhaseTimer
+from payload_template import ATTRIBUTE_LABELS, resolve_attribute_mappings
+from page_index import PageIndex
+from page_cache import page_cache, fingerprint
+from attribute_registry import attribute_registry
+
+# Calculator form and the scripts that may carry the product ID
+CALCULATOR_FORM_XPATH = "//form[starts-with(@id, 'calculator_')]"
+PRODUCT_ID_SCRIPT_XPATH = "//script[contains(., 'product_id')]"
+VOLATILE_INPUTS_XPATH = ".//input[@type='hidden'][not(starts-with(@name, 'attr'))]"
+OPTION_CONTROLS_XPATH = ".//ul[contains(concat(' ', normalize-space(@class), ' '), ' dropdown-menu ')] | .//select | .//input[@type='radio']"
 
 class ProductAnalyzer:
     """Analyzes UPrinting products to extract options and pricing structure"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(UPRINTING_HEADERS)
+    def __init__(self, page_limiter: Optional[AdaptiveRateLimiter] = None):
+        self.session = http_transport.session
+        self.timer = PhaseTimer.from_config()
+        # Paces product page downloads (catalog analysis); computePrice calls always use ``rate_limiter``
+        self.page_limiter = page_limiter
         
-    def analyze_product(self, product_url: str, product_name: str) -> Dict[str, Any]:
-        """Analyze a single product to extract all options and structure"""
+    def analyze_product(self, product_url: str, product_name: str, parse_pool: Optional[Executor] = None) -> Dict[str, Any]:
+        """Analyze a single product to extract all options and structure
+
+        With ``parse_pool`` (e.g. a process pool for catalog-wide analysis)
+        the page is parsed there, while the download and the API test stay
+        in the calling thread.
+        """
         
         logger.info(f"Analyzing product: {product_name}")
         logger.info(f"URL: {product_url}")
+        analysis_start = time.monotonic()
+        self.timer.reset()
         
         try:
-            # Fetch product page
-            response = self.session.get(product_url, timeout=30)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract basic product info
-            product_info = self._extract_basic_info(soup, product_url)
+            # Fetch product page (revalidated against the page cache)
+            with self.timer.phase('fetch_page'):
+                fetched = self._fetch_calculator(product_url)
+
+            cached_analysis = fetched['analysis']
+            if cached_analysis and cached_analysis.get('status') == 'success':
+                logger.success(f"♻️ Calculator of {product_name} unchanged ({fetched['cache_status']}), reusing the cached analysis")
+                metrics.product_analyses.inc(status='success')
+                metrics.product_analysis_duration.observe(time.monotonic() - analysis_start)
+                return dict(
+                    cached_analysis,
+                    product_name=product_name,
+                    page_cache=fetched['cache_status'],
+                    phase_timings=self.timer.breakdown()
+                )
             
-            # Extract options using multiple methods
-            options = self._extract_options_comprehensive(soup)
-            
-            # Extract attribute mappings
-            attr_mappings = self._extract_attribute_mappings(soup)
+            # Parse the page and extract product info, options and attribute mappings
+            if parse_pool is None:
+                parsed = self._parse_calculator(fetched['markup'], fetched['targeted'])
+            else:
+                with self.timer.phase('parse_pool'):
+                    parsed = parse_pool.submit(parse_calculator, fetched['markup'], fetched['targeted']).result()
+
+            product_info = parsed['product_info']
+            options = parsed['options']
+            attr_mappings = parsed['attribute_mappings']
             
             # Use AI for additional analysis if needed
             if not options or len(options) < 3:
                 logger.info("Using AI for additional option analysis")
-                ai_analysis = ai_manager.analyze_product_options(str(soup), product_url)
+                ai_analysis = ai_manager.analyze_product_options(fetched['markup'], product_url)
                 if ai_analysis:
                     options.update(ai_analysis.get('options', {}))
                     attr_mappings.update(ai_analysis.get('attribute_mappings', {}))
             
             # Test API endpoint
-            api_test_result = self._test_api_endpoint(product_info['product_id'], options, attr_mappings, soup)
+            with self.timer.phase('api_test'):
+                api_test_result = self._test_api_endpoint(product_info['product_id'], options, attr_mappings, parsed['default_values'])
             
             result = {
                 'product_name': product_name,
@@ -69,17 +111,25 @@ class ProductAnalyzer:
                 'form_id': product_info['form_id'],
                 'options': options,
                 'attribute_mappings': attr_mappings,
+                'resolved_attribute_mappings': resolve_attribute_mappings(list(options.keys()), attr_mappings, options),
                 'api_test': api_test_result,
                 'analysis_timestamp': time.time(),
                 'total_combinations': self._calculate_combinations(options),
+                'phase_timings': self.timer.breakdown(),
+                'page_cache': fetched['cache_status'],
                 'status': 'success'
             }
+            page_cache.put_analysis(product_url, fetched['fingerprint'], result)
             
             logger.success(f"Successfully analyzed {product_name}")
+            self.timer.log_breakdown(product_name)
+            metrics.product_analyses.inc(status='success')
+            metrics.product_analysis_duration.observe(time.monotonic() - analysis_start)
             return result
             
         except Exception as e:
             logger.error(f"Failed to analyze {product_name}: {e}")
+            metrics.product_analyses.inc(status='failed')
             return {
                 'product_name': product_name,
                 'product_url': product_url,
@@ -87,12 +137,142 @@ class ProductAnalyzer:
                 'status': 'failed',
                 'analysis_timestamp': time.time()
             }
+
+    def _parse_calculator(self, markup: str, targeted: bool) -> Dict[str, Any]:
+        """Parse calculator markup into ``product_info``, ``options``, ``attribute_mappings`` and ``default_values``
+
+        CPU-bound and free of network calls, so it can run in another process
+        (see ``parse_calculator``).
+        """
+
+        # Parse HTML
+        with self.timer.phase('parse_html'):
+            soup = self._parse_markup(markup, targeted)
+
+        # Index labels, option controls and attribute inputs in one pass
+        with self.timer.phase('index_page'):
+            page = PageIndex.build(soup)
+        
+        # Extract basic product info
+        with self.timer.phase('extract_info'):
+            product_info = self._extract_basic_info(page)
+        
+        # Extract options using multiple methods
+        with self.timer.phase('extract_options'):
+            options = self._extract_options_comprehensive(page)
+        
+        # Extract attribute mappings and the form's default attribute values
+        with self.timer.phase('extract_mappings'):
+            attr_mappings = self._extract_attribute_mappings(page, options)
+            default_values = self._extract_default_attribute_values(page)
+
+        return {
+            'product_info': product_info,
+            'options': options,
+            'attribute_mappings': attr_mappings,
+            'default_values': default_values
+        }
     
-    def _extract_basic_info(self, soup: BeautifulSoup, product_url: str) -> Dict[str, str]:
+    def _fetch_calculator(self, product_url: str) -> Dict[str, Any]:
+        """Download a product page, or revalidate the cached copy with a conditional GET
+
+        Returns the calculator ``markup`` (see ``_calculator_markup``), whether
+        it is ``targeted``, its ``fingerprint``, the ``cache_status``
+        (``disabled``, ``miss``, ``not_modified``, ``unchanged`` or ``changed``)
+        and the cached ``analysis`` when the calculator has not changed.
+        """
+
+        cached = page_cache.get(product_url)
+        if self.page_limiter is None:
+            response = self.session.get(product_url, headers=page_cache.conditional_headers(cached), timeout=30)
+        else:
+            self.page_limiter.acquire()
+            request_start = time.monotonic()
+            try:
+                response = self.session.get(product_url, headers=page_cache.conditional_headers(cached), timeout=30)
+            except requests.exceptions.RequestException as e:
+                self.page_limiter.record(time.monotonic() - request_start, None, timed_out=isinstance(e, requests.exceptions.Timeout))
+                raise
+            self.page_limiter.record(time.monotonic() - request_start, response.status_code)
+
+        if response.status_code == 304 and cached:
+            page_cache.touch(product_url)
+            return {
+                'markup': cached['markup'],
+                'targeted': cached['targeted'],
+                'fingerprint': cached['fingerprint'],
+                'cache_status': 'not_modified',
+                'analysis': cached['analysis']
+            }
+
+        response.raise_for_status()
+        markup, targeted = self._calculator_markup(response.content)
+        markup_fingerprint = fingerprint(markup)
+
+        if not page_cache.enabled:
+            cache_status = 'disabled'
+        elif cached is None:
+            cache_status = 'miss'
+        elif cached['fingerprint'] == markup_fingerprint:
+            cache_status = 'unchanged'
+        else:
+            cache_status = 'changed'
+
+        page_cache.put(
+            product_url, markup, targeted, markup_fingerprint,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+        return {
+            'markup': markup,
+            'targeted': targeted,
+            'fingerprint': markup_fingerprint,
+            'cache_status': cache_status,
+            'analysis': cached['analysis'] if cache_status == 'unchanged' else None
+        }
+
+    def _calculator_markup(self, content: bytes) -> Tuple[str, bool]:
+        """The part of a product page the extractors read, and whether it was narrowed to the calculator
+
+        lxml builds the page tree in C, then only the ``calculator_*`` form and
+        the scripts mentioning ``product_id`` are kept. Values of hidden inputs
+        other than ``attr*`` (tokens and the like) are dropped so the markup
+        fingerprint only changes with the calculator. Without lxml, with
+        ``config.targeted_page_parsing`` off, or when the form holds no option
+        controls, the whole page is returned.
+        """
+
+        # Decode the way BeautifulSoup would; lxml alone assumes latin-1 without a charset meta tag
+        markup = UnicodeDammit(content, is_html=True).unicode_markup or ''
+
+        if lxml_html is not None and config.targeted_page_parsing and markup:
+            try:
+                tree = lxml_html.fromstring(markup)
+            except (etree.ParserError, ValueError) as e:
+                logger.debug(f"lxml could not parse the page, falling back to html.parser: {e}")
+                tree = None
+
+            if tree is not None:
+                forms = [form for form in tree.xpath(CALCULATOR_FORM_XPATH) if re.search(r'calculator_\d+', form.get('id', ''))]
+                if forms and forms[0].xpath(OPTION_CONTROLS_XPATH):
+                    for hidden_input in forms[0].xpath(VOLATILE_INPUTS_XPATH):
+                        hidden_input.attrib.pop('value', None)
+                    fragments = [lxml_html.tostring(forms[0], encoding='unicode')]
+                    fragments.extend(lxml_html.tostring(script, encoding='unicode') for script in tree.xpath(PRODUCT_ID_SCRIPT_XPATH))
+                    return ''.join(fragments), True
+
+        return markup, False
+
+    def _parse_markup(self, markup: str, targeted: bool) -> BeautifulSoup:
+        """BeautifulSoup tree of calculator markup (lxml for the small calculator fragment, html.parser for whole pages)"""
+
+        return BeautifulSoup(markup, 'lxml' if targeted else 'html.parser')
+
+    def _extract_basic_info(self, page: PageIndex) -> Dict[str, str]:
         """Extract basic product information"""
         
         # Find calculator form
-        calculator_form = soup.find('form', {'id': re.compile(r'calculator_\d+')})
+        calculator_form = page.calculator_form
         
         if calculator_form:
             form_id = calculator_form.get('id', '')
@@ -103,58 +283,48 @@ class ProductAnalyzer:
             product_id = None
             
             # Try to find product ID in other places
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string and 'product_id' in script.string:
-                    match = re.search(r'product_id["\']?\s*:\s*["\']?(\d+)', script.string)
-                    if match:
-                        product_id = match.group(1)
-                        break
+            for script in page.product_id_scripts:
+                match = re.search(r'product_id["\']?\s*:\s*["\']?(\d+)', script.string)
+                if match:
+                    product_id = match.group(1)
+                    break
         
         return {
             'product_id': product_id,
             'form_id': form_id
         }
     
-    def _extract_options_comprehensive(self, soup: BeautifulSoup) -> Dict[str, List[Dict[str, str]]]:
+    def _extract_options_comprehensive(self, page: PageIndex) -> Dict[str, List[Dict[str, str]]]:
         """Extract options using multiple methods"""
         
         options = {}
         
         # Method 1: Dropdown containers
-        dropdown_containers = soup.find_all('div', class_='dropdown')
-        
-        for container in dropdown_containers:
-            option_data = self._extract_dropdown_options(container)
+        for container, label_elem in page.dropdowns:
+            option_data = self._extract_dropdown_options(container, label_elem)
             if option_data:
                 option_name, option_values = option_data
                 if option_values:
                     options[option_name] = option_values
         
         # Method 2: Select elements
-        select_elements = soup.find_all('select')
-        for select in select_elements:
-            option_data = self._extract_select_options(select)
+        for select, label_elem in page.selects:
+            option_data = self._extract_select_options(select, label_elem)
             if option_data:
                 option_name, option_values = option_data
                 if option_values:
                     options[option_name] = option_values
         
         # Method 3: Radio button groups
-        radio_groups = self._extract_radio_options(soup)
+        radio_groups = self._extract_radio_options(page)
         options.update(radio_groups)
         
         return options
     
-    def _extract_dropdown_options(self, container) -> Optional[Tuple[str, List[Dict[str, str]]]]:
-        """Extract options from dropdown container"""
+    def _extract_dropdown_options(self, container, label_elem) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+        """Extract options from dropdown container and its label (see ``PageIndex.dropdowns``)"""
         
         try:
-            # Find label
-            label_elem = container.find_previous('label')
-            if not label_elem:
-                label_elem = container.find('label')
-            
             if not label_elem:
                 return None
             
@@ -186,20 +356,10 @@ class ProductAnalyzer:
             logger.debug(f"Error extracting dropdown options: {e}")
             return None
     
-    def _extract_select_options(self, select_elem) -> Optional[Tuple[str, List[Dict[str, str]]]]:
-        """Extract options from select element"""
+    def _extract_select_options(self, select_elem, label_elem) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+        """Extract options from select element and its label (see ``PageIndex.selects``)"""
         
         try:
-            # Find associated label
-            select_id = select_elem.get('id', '')
-            label_elem = None
-            
-            if select_id:
-                label_elem = select_elem.find_previous('label', {'for': select_id})
-            
-            if not label_elem:
-                label_elem = select_elem.find_previous('label')
-            
             if not label_elem:
                 return None
             
@@ -225,38 +385,36 @@ class ProductAnalyzer:
             logger.debug(f"Error extracting select options: {e}")
             return None
     
-    def _extract_radio_options(self, soup: BeautifulSoup) -> Dict[str, List[Dict[str, str]]]:
+    def _extract_radio_options(self, page: PageIndex) -> Dict[str, List[Dict[str, str]]]:
         """Extract radio button options"""
         
         radio_groups = {}
         
         try:
-            radio_inputs = soup.find_all('input', type='radio')
-            
             # Group by name attribute
             groups = {}
-            for radio in radio_inputs:
+            for radio, next_label in page.radios:
                 name = radio.get('name', '')
                 if name:
                     if name not in groups:
                         groups[name] = []
-                    groups[name].append(radio)
+                    groups[name].append((radio, next_label))
             
             # Process each group
             for group_name, radios in groups.items():
                 option_values = []
                 
-                for radio in radios:
+                for radio, next_label in radios:
                     value = radio.get('value')
                     radio_id = radio.get('id', '')
                     
                     # Find associated label
                     label_elem = None
                     if radio_id:
-                        label_elem = soup.find('label', {'for': radio_id})
+                        label_elem = page.labels_by_for.get(radio_id)
                     
                     if not label_elem:
-                        label_elem = radio.find_next('label')
+                        label_elem = next_label
                     
                     if label_elem:
                         text = label_elem.get_text(strip=True)
@@ -279,20 +437,17 @@ class ProductAnalyzer:
         
         return radio_groups
     
-    def _extract_attribute_mappings(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extract attribute mappings from hidden inputs and data attributes"""
+    def _extract_attribute_mappings(self, page: PageIndex, options: Dict[str, List[Dict[str, str]]]) -> Dict[str, str]:
+        """Extract attribute mappings from hidden inputs, data attributes and the attribute registry"""
 
         mappings = {}
 
         try:
             # Method 1: Hidden inputs with default values
-            calculator_form = soup.find('form', {'id': re.compile(r'calculator_\d+')})
-            if calculator_form:
-                hidden_inputs = calculator_form.find_all('input', type='hidden')
-
+            if page.calculator_form:
                 # Create a mapping of attribute numbers to their default values
                 attr_defaults = {}
-                for hidden_input in hidden_inputs:
+                for hidden_input in page.hidden_inputs:
                     name = hidden_input.get('name', '')
                     value = hidden_input.get('value', '')
                     if name.startswith('attr') and value:
@@ -300,59 +455,37 @@ class ProductAnalyzer:
 
                 logger.info(f"Found default attributes: {attr_defaults}")
 
-            # Method 2: Data attributes on dropdown buttons
-            dropdown_buttons = soup.find_all('button', class_='dropdown-toggle')
-            for button in dropdown_buttons:
+            # Method 2: Data attributes on dropdown buttons (labelled like their dropdown)
+            for button, label_elem in page.dropdown_buttons:
                 data_attr = button.get('data-attr')
-                if data_attr:
-                    # Find associated label
-                    container = button.find_parent('div', class_='dropdown')
-                    if container:
-                        label_elem = container.find_previous('label')
-                        if label_elem:
-                            option_name = label_elem.get_text(strip=True).replace(':', '').strip()
-                            mappings[option_name] = f"attr{data_attr}"
-
-            # Method 3: Common UPrinting patterns (fallback)
-            if not mappings:
-                logger.warning("No attribute mappings found, using common patterns")
-                # These are common UPrinting attribute patterns
-                common_mappings = {
-                    'Size': 'attr3',
-                    'Paper': 'attr1',
-                    'Quantity': 'attr5',
-                    'Printing Time': 'attr6',
-                    'Pages': 'attr4',
-                    'Printed Side': 'attr4',
-                    'Bundling': 'attr400',
-                    'Binding': 'attr400'
-                }
+                if data_attr and label_elem:
+                    option_name = label_elem.get_text(strip=True).replace(':', '').strip()
+                    mappings[option_name] = f"attr{data_attr}"
 
-                # Try to match option names with common patterns
-                for option_name in mappings.keys():
-                    for pattern, attr in common_mappings.items():
-                        if pattern.lower() in option_name.lower():
-                            mappings[option_name] = attr
-                            break
+            # Method 3: Mappings confirmed by earlier computePrice calls (keyword guesses are applied later)
+            unmapped = [option_name for option_name in options if option_name not in mappings]
+            learned = attribute_registry.lookup(unmapped, options)
+            if learned:
+                logger.info(f"Using {len(learned)} learned attribute mappings: {learned}")
+                mappings.update(learned)
+
+            if not mappings:
+                logger.warning("No attribute mappings found, options will be mapped by keyword")
 
         except Exception as e:
             logger.debug(f"Error extracting attribute mappings: {e}")
 
         return mappings
 
-    def _extract_default_attribute_values(self, soup: BeautifulSoup) -> Dict[str, str]:
+    def _extract_default_attribute_values(self, page: PageIndex) -> Dict[str, str]:
         """Extract default attribute values from hidden form inputs"""
 
         default_values = {}
 
         try:
-            # Find calculator form
-            calculator_form = soup.find('form', {'id': re.compile(r'calculator_\d+')})
-            if calculator_form:
-                # Get all hidden inputs with attribute names
-                hidden_inputs = calculator_form.find_all('input', type='hidden')
-
-                for hidden_input in hidden_inputs:
+            # Hidden inputs of the calculator form with attribute names
+            if page.calculator_form:
+                for hidden_input in page.hidden_inputs:
                     name = hidden_input.get('name', '')
                     value = hidden_input.get('value', '')
 
@@ -361,8 +494,7 @@ class ProductAnalyzer:
                         logger.debug(f"Found default {name}: {value}")
 
             # Also check for data attributes on the page
-            elements_with_data_attrs = soup.find_all(attrs={'data-attr': True})
-            for element in elements_with_data_attrs:
+            for element in page.data_attr_elements:
                 data_attr = element.get('data-attr')
                 data_value = element.get('data-value') or element.get('value')
 
@@ -377,8 +509,8 @@ class ProductAnalyzer:
 
         return default_values
     
-    def _test_api_endpoint(self, product_id: str, options: Dict, attr_mappings: Dict, soup: BeautifulSoup = None) -> Dict[str, Any]:
-        """Test API endpoint with sample data"""
+    def _test_api_endpoint(self, product_id: str, options: Dict, attr_mappings: Dict, default_values: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Test API endpoint with sample data (``default_values`` from ``_extract_default_attribute_values``)"""
 
         if not product_id or not options:
             return {'success': False, 'error': 'Missing product ID or options'}
@@ -387,13 +519,18 @@ class ProductAnalyzer:
             # Create sample payload with enhanced validation and error handling
             payload = {'product_id': product_id}
 
-            # First, try to extract default values from the page
-            default_values = {}
-            if soup:
-                default_values = self._extract_default_attribute_values(soup)
+            # Default values found on the page fill attributes the options do not cover
+            if default_values is not None:
                 logger.info(f"Found default attribute values: {default_values}")
             else:
-                logger.warning("No soup provided for default values extraction")
+                default_values = {}
+                logger.warning("No default attribute values provided")
+
+            # Resolve every option to its attrN once, the same way the extractor does
+            resolved_mappings = resolve_attribute_mappings(list(options.keys()), attr_mappings, options)
+
+            # Option mapped to each attribute, recorded in the attribute registry on a real quote (fallback guesses are not)
+            attr_sources = {}
 
             # Add sample values for each option with better mapping and validation
             for option_name, option_list in options.items():
@@ -414,30 +551,17 @@ class ProductAnalyzer:
 
                 option_id = valid_option['id']
 
-                if attr_mappings.get(option_name):
-                    attr_name = attr_mappings[option_name]
+                attr_name = resolved_mappings.get(option_name)
+                if attr_name:
                     payload[attr_name] = str(option_id)
-                else:
-                    # Enhanced attribute guessing with validation - order matters!
-                    if 'time' in option_name.lower() or 'turnaround' in option_name.lower() or 'rush' in option_name.lower() or 'business' in option_name.lower():
-                        payload['attr6'] = str(option_id)
-                        logger.info(f"🕒 Printing time mapped: {option_name} = {option_id} → attr6")
-                    elif 'quantity' in option_name.lower():
+                    attr_sources[attr_name] = (option_name, str(option_id))
+                    if option_name not in attr_mappings:
+                        logger.info(f"{ATTRIBUTE_LABELS.get(attr_name, attr_name)} mapped: {option_name} = {option_id} → {attr_name}")
+                elif any(char.isdigit() for char in valid_option['text']):
+                    # Only assign to quantity if it's not already assigned and this looks like a quantity
+                    if 'attr5' not in payload:
                         payload['attr5'] = str(option_id)
-                        logger.info(f"📊 Quantity mapped: {option_name} = {option_id} → attr5")
-                    elif 'size' in option_name.lower() or 'format' in option_name.lower():
-                        payload['attr3'] = str(option_id)
-                    elif 'paper' in option_name.lower() or 'material' in option_name.lower() or 'stock' in option_name.lower():
-                        payload['attr1'] = str(option_id)
-                    elif 'page' in option_name.lower() or 'side' in option_name.lower() or 'print' in option_name.lower():
-                        payload['attr4'] = str(option_id)
-                    elif 'bundling' in option_name.lower() or 'binding' in option_name.lower() or 'finish' in option_name.lower():
-                        payload['attr400'] = str(option_id)
-                    elif any(char.isdigit() for char in valid_option['text']) and 'time' not in option_name.lower():
-                        # Only assign to quantity if it's not already assigned and this looks like a quantity
-                        if 'attr5' not in payload:
-                            payload['attr5'] = str(option_id)
-                            logger.info(f"📊 Fallback quantity mapped: {option_name} = {option_id} → attr5")
+                        logger.info(f"📊 Fallback quantity mapped: {option_name} = {option_id} → attr5")
 
             # Use default values for missing required attributes (but be careful not to mix them up)
             required_attrs = ['attr1', 'attr3', 'attr4', 'attr6']  # Don't auto-assign attr5 here
@@ -496,7 +620,14 @@ class ProductAnalyzer:
 
             for attempt in range(3):  # Try up to 3 times
                 try:
-                    response = self.session.post(api_url, json=payload, timeout=15)
+                    rate_limiter.acquire()
+                    request_start = time.monotonic()
+                    try:
+                        response = self.session.post(api_url, json=payload, timeout=15)
+                    except requests.exceptions.RequestException as e:
+                        rate_limiter.record(time.monotonic() - request_start, None, timed_out=isinstance(e, requests.exceptions.Timeout))
+                        raise
+                    rate_limiter.record(time.monotonic() - request_start, response.status_code)
 
                     logger.info(f"API Response Status: {response.status_code} (attempt {attempt + 1})")
                     logger.info(f"API Response: {response.text[:500]}")
@@ -506,6 +637,14 @@ class ProductAnalyzer:
                         price = data.get('price', 'N/A')
                         logger.success(f"API Test Success: Price = ${price}")
 
+                        # Attributes the fix-up removed were not confirmed
+                        confirmed = {attr: source for attr, source in attr_sources.items() if payload.get(attr) == source[1]}
+                        attribute_registry.confirm(
+                            [(option_name, attr) for attr, (option_name, _) in confirmed.items()],
+                            {option_name: option_id for option_name, option_id in confirmed.values()},
+                            data
+                        )
+
                         return {
                             'success': True,
                             'price': price,
@@ -617,19 +756,15 @@ class ProductAnalyzer:
         logger.info(f"Finding IDs for {option_name}: {option_values}")
 
         try:
-            # Re-fetch the product page
-            response = self.session.get(product_url, timeout=30)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Revalidate the product page; an unchanged page is searched from the cache
+            fetched = self._fetch_calculator(product_url)
+            page = PageIndex.build(self._parse_markup(fetched['markup'], fetched['targeted']))
 
             # Look for dropdown options that match the values
             found_ids = {}
 
             # Search in all dropdown menus
-            dropdown_containers = soup.find_all('div', class_='dropdown')
-
-            for container in dropdown_containers:
+            for container, _ in page.dropdowns:
                 dropdown_menu = container.find('ul', class_='dropdown-menu')
                 if not dropdown_menu:
                     continue
@@ -680,3 +815,8 @@ class ProductAnalyzer:
         
         logger.info(f"Saved analysis to: {filepath}")
         return filepath
+
+def parse_calculator(markup: str, targeted: bool) -> Dict[str, Any]:
+    """Parse calculator markup in a worker process (see ``ProductAnalyzer._parse_calculator``)"""
+
+    return ProductAnalyzer()._parse_calculator(markup, targeted)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Profiling Module
+===============
+
+Phase timers for the extractor and analyzer hot paths, and optional
+whole-run profiler dumps.
+
+``PhaseTimer.phase(name)`` times a block of code under a phase name
+(payload building, HTTP, JSON decoding, CSV writing, ...). With
+``PHASE_TIMING_ENABLED=false`` it returns a shared no-op context manager,
+so instrumented code pays one attribute lookup and call. ``breakdown()``
+reports total, wall-clock, mean and p99 per phase; the p99 comes from a
+bounded reservoir sample, so long runs do not keep every duration.
+
+In the async engine blocks of one phase overlap across concurrent
+requests (many requests wait on HTTP at once). ``total_seconds`` sums the
+per-block durations and can exceed the run time; ``wall_seconds`` counts
+only the time during which at least one block of the phase was running.
+
+``PROFILER=cprofile`` (or ``pyinstrument``, if installed) profiles each
+extraction run and writes the report to ``LOGS_DIRECTORY/profiles``.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import cProfile
+import functools
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Any
+from loguru import logger
+
+from config import config
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Durations kept per phase for the p99 estimate
+RESERVOIR_SIZE = 10000
+
+class _NullPhase:
+    """Context manager that does nothing (timing disabled)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class _Phase:
+    """Times one block and adds it to its phase"""
+
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer: 'PhaseTimer', name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.timer._begin(self.name, self.start)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer._end(self.name, self.start, time.perf_counter())
+        return False
+
+class PhaseTimer:
+    """Accumulates durations per named phase"""
+
+    def __init__(self, enabled: bool = False, reservoir_size: int = RESERVOIR_SIZE):
+        self.enabled = enabled
+        self.reservoir_size = reservoir_size
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'PhaseTimer':
+        """Create a timer from the framework configuration"""
+
+        return cls(enabled=config.phase_timing_enabled)
+
+    def phase(self, name: str):
+        """Context manager timing a block under ``name``"""
+
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def _stats(self, name: str) -> list:
+        """Accumulators of a phase (caller holds the lock)"""
+
+        stats = self._phases.get(name)
+        if stats is None:
+            # count, total, reservoir, blocks running, running since, wall-clock
+            stats = self._phases[name] = [0, 0.0, [], 0, 0.0, 0.0]
+        return stats
+
+    def _begin(self, name: str, start: float):
+        """A block of a phase started"""
+
+        with self._lock:
+            stats = self._stats(name)
+            if stats[3] == 0:
+                stats[4] = start
+            stats[3] += 1
+
+    def _end(self, name: str, start: float, end: float):
+        """A block of a phase finished; wall-clock only advances when no other block of it still runs"""
+
+        with self._lock:
+            stats = self._stats(name)
+            stats[3] -= 1
+            if stats[3] == 0:
+                stats[5] += end - stats[4]
+            self._add(stats, end - start)
+
+    def record(self, name: str, seconds: float):
+        """Add one duration to a phase, timed outside ``phase()`` and not overlapping other blocks of it"""
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            stats = self._stats(name)
+            stats[5] += seconds
+            self._add(stats, seconds)
+
+    def _add(self, stats: list, seconds: float):
+        """Count one duration (caller holds the lock)"""
+
+        stats[0] += 1
+        stats[1] += seconds
+
+        reservoir = stats[2]
+        if len(reservoir) < self.reservoir_size:
+            reservoir.append(seconds)
+        else:
+            # Reservoir sampling keeps a uniform sample of every duration seen
+            slot = random.randrange(stats[0])
+            if slot < self.reservoir_size:
+                reservoir[slot] = seconds
+
+    def reset(self):
+        """Forget every phase (start of a run)"""
+
+        self._phases = {}
+
+    def breakdown(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """``{phase: {count, total_seconds, wall_seconds, mean_ms, p99_ms}}`` by descending total, or None if disabled"""
+
+        if not self.enabled:
+            return None
+
+        breakdown = {}
+        for name, (count, total, reservoir, _, _, wall) in sorted(self._phases.items(), key=lambda item: -item[1][1]):
+            ordered = sorted(reservoir)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+            breakdown[name] = {
+                'count': count,
+                'total_seconds': round(total, 4),
+                'wall_seconds': round(wall, 4),
+                'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                'p99_ms': round(p99 * 1000, 3)
+            }
+        return breakdown
+
+    def log_breakdown(self, title: str):
+        """Log the breakdown as one line per phase (wall-clock, then summed over concurrent blocks)"""
+
+        breakdown = self.breakdown()
+        if not breakdown:
+            return
+        logger.info(f"⏱️ {title} phase timings (wall-clock / summed per-block time):")
+        for name, stats in breakdown.items():
+            logger.info(f"   {name:<16} {stats['wall_seconds']:>9.3f}s wall  {stats['total_seconds']:>9.3f}s summed  n={stats['count']:<8,} mean={stats['mean_ms']:.3f}ms  p99={stats['p99_ms']:.3f}ms")
+
+class RunProfiler:
+    """cProfile or pyinstrument profile of one run, written to ``LOGS_DIRECTORY/profiles``"""
+
+    def __init__(self, kind: str, output_dir: Path):
+        self.kind = kind
+        self.output_dir = Path(output_dir)
+        self._profiler = None
+
+    @classmethod
+    def from_config(cls) -> Optional['RunProfiler']:
+        """Profiler selected by ``config.profiler``, or None when profiling is off"""
+
+        kind = config.profiler
+        if kind in ('', 'none'):
+            return None
+        if kind == 'pyinstrument' and pyinstrument is None:
+            logger.warning("⚠️ pyinstrument is not installed; profiling with cProfile instead")
+            kind = 'cprofile'
+        if kind not in ('cprofile', 'pyinstrument'):
+            logger.warning(f"⚠️ Unknown profiler '{kind}'; profiling disabled")
+            return None
+        return cls(kind, config.logs_directory / 'profiles')
+
+    def __enter__(self):
+        if self.kind == 'pyinstrument':
+            self._profiler = pyinstrument.Profiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        return False
+
+    def dump(self, name: str) -> Path:
+        """Write the report: ``.prof`` for cProfile (open with pstats or snakeviz), ``.html`` for pyinstrument"""
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        safe_name = re.sub(r'[^\w\-]+', '_', name).strip('_') or 'run'
+        stem = f"{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        if self.kind == 'pyinstrument':
+            path = self.output_dir / f"{stem}.html"
+            path.write_text(self._profiler.output_html(), encoding='utf-8')
+        else:
+            path = self.output_dir / f"{stem}.prof"
+            self._profiler.dump_stats(str(path))
+
+        logger.info(f"⏱️ Profile written to {path}")
+        return path
+
+def profiled(method):
+    """Profile a ``(self, analysis_result, ...)`` method returning a result dict, when ``PROFILER`` is set
+
+    The report path is added to the result as ``profile_path``.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, analysis_result, *args, **kwargs):
+        profiler = RunProfiler.from_config()
+        if profiler is None:
+            return method(self, analysis_result, *args, **kwargs)
+
+        with profiler:
+            result = method(self, analysis_result, *args, **kwargs)
+        result['profile_path'] = str(profiler.dump(analysis_result.get('product_name', 'run')))
+        return result
+
+    return wrapper
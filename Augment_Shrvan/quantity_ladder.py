@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Quantity Ladder Module
+=====================
+
+Helpers for sparse extraction of the quantity ladder.
+
+Within one option row the price across the quantity ladder (10 … 10,000)
+is close to piecewise linear. A few anchor quantities are fetched, the
+remaining ones are interpolated between anchors, and random verification
+points decide whether the interpolation can be trusted.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+def parse_quantity(label: str) -> Optional[int]:
+    """Numeric quantity from an option label such as '1,000' or '250 pcs'"""
+
+    match = re.search(r'\d[\d,]*', str(label))
+    if not match:
+        return None
+    return int(match.group(0).replace(',', ''))
+
+def parse_price(price) -> Optional[float]:
+    """Numeric price from a computePrice value such as '11.25' or '1,250.00'"""
+
+    try:
+        return float(str(price).replace(',', '').replace('$', ''))
+    except (TypeError, ValueError):
+        return None
+
+def choose_anchors(quantities: Dict[int, int], anchor_count: int) -> List[int]:
+    """Pick anchor positions spread evenly in log-quantity, always including both ends
+
+    ``quantities`` maps option position to numeric quantity.
+    """
+
+    ordered = sorted(quantities, key=quantities.get)
+    if len(ordered) <= anchor_count:
+        return ordered
+
+    low, high = math.log(quantities[ordered[0]]), math.log(quantities[ordered[-1]])
+    anchors = []
+    for step in range(anchor_count):
+        target = low + (high - low) * step / (anchor_count - 1)
+        candidates = [position for position in ordered if position not in anchors]
+        anchors.append(min(candidates, key=lambda position: abs(math.log(quantities[position]) - target)))
+
+    return sorted(anchors, key=quantities.get)
+
+def interpolate_price(points: List[Tuple[int, float]], quantity: int) -> float:
+    """Piecewise-linear price at ``quantity`` from (quantity, price) points sorted by quantity"""
+
+    if quantity <= points[0][0]:
+        return points[0][1]
+    if quantity >= points[-1][0]:
+        return points[-1][1]
+
+    for (q0, p0), (q1, p1) in zip(points, points[1:]):
+        if q0 <= quantity <= q1:
+            if q1 == q0:
+                return p0
+            return p0 + (p1 - p0) * (quantity - q0) / (q1 - q0)
+
+    return points[-1][1]
+
+def within_tolerance(predicted: float, actual: float, tolerance: float) -> bool:
+    """Whether a predicted price is within a relative tolerance of the actual one"""
+
+    if actual == 0:
+        return abs(predicted) < 0.005
+    return abs(predicted - actual) / abs(actual) <= tolerance
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Module
+==================
+
+Adaptive token-bucket rate limiter shared by every computePrice caller.
+
+The request rate follows an AIMD (additive increase, multiplicative decrease)
+policy: while p95 latency and the error rate stay under their targets the
+rate grows by a fixed step, and every 429, 5xx or timeout cuts it by a factor.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Any
+from loguru import logger
+
+from config import config
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate adapts to computePrice latency and errors"""
+
+    def __init__(self,
+                 initial_rate: float,
+                 min_rate: float = 1.0,
+                 max_rate: float = 100.0,
+                 burst: int = 1,
+                 additive_increase: float = 1.0,
+                 decrease_factor: float = 0.5,
+                 target_p95_latency: float = 1.5,
+                 target_error_rate: float = 0.05,
+                 window_size: int = 100,
+                 adaptive: bool = True):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.capacity = max(1, burst)
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.target_p95_latency = target_p95_latency
+        self.target_error_rate = target_error_rate
+        self.adaptive = adaptive
+
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._samples = deque(maxlen=window_size)
+        self._last_adjustment = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.increase_count = 0
+        self.decrease_count = 0
+
+        # Cross-process ceiling for batch runs (see SharedRequestBudget)
+        self.shared_budget = None
+
+    @classmethod
+    def from_config(cls) -> 'AdaptiveRateLimiter':
+        """Create a limiter from the framework configuration
+
+        The floor is lowered to the starting rate when ``REQUEST_DELAY_SECONDS``
+        asks for fewer requests per second than ``RATE_LIMIT_MIN_RPS``.
+        """
+
+        if config.request_delay_seconds > 0:
+            initial_rate = 1.0 / config.request_delay_seconds
+        else:
+            initial_rate = config.rate_limit_max_rps
+
+        return cls(
+            initial_rate=initial_rate,
+            min_rate=min(config.rate_limit_min_rps, initial_rate),
+            max_rate=config.rate_limit_max_rps,
+            burst=config.max_concurrent_requests,
+            additive_increase=config.rate_limit_increase_rps,
+            decrease_factor=config.rate_limit_decrease_factor,
+            target_p95_latency=config.rate_limit_target_p95_seconds,
+            target_error_rate=config.rate_limit_target_error_rate,
+            adaptive=config.adaptive_rate_limit
+        )
+
+    @property
+    def current_rate(self) -> float:
+        """Current allowed request rate in requests per second"""
+        return self.rate
+
+    def _refill(self, now: float):
+        """Add tokens accrued since the last refill (caller holds the lock)"""
+
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def _try_take(self) -> float:
+        """Take a token if available, otherwise return the seconds to wait"""
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent"""
+
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+
+        if self.shared_budget:
+            wait = self.shared_budget.reserve()
+            if wait > 0:
+                time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+
+        if self.shared_budget:
+            wait = self.shared_budget.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    def record(self, latency: Optional[float], status_code: Optional[int] = None, timed_out: bool = False):
+        """Record the outcome of one request and adapt the rate
+
+        ``status_code`` is ``None`` for network errors; those count as
+        congestion signals just like 429, 5xx and timeouts.
+        """
+
+        congested = timed_out or status_code is None or status_code == 429 or status_code >= 500
+
+        with self._lock:
+            self._samples.append((latency or 0.0, congested))
+
+            if not self.adaptive:
+                return
+
+            now = time.monotonic()
+            # Adjust at most once per second so one burst of failures only cuts once
+            if now - self._last_adjustment < 1.0:
+                return
+
+            if congested:
+                self._set_rate(self.rate * self.decrease_factor, now)
+                self.decrease_count += 1
+                logger.warning(f"🐢 Rate limiter backing off to {self.rate:.2f} req/s (status: {status_code}, timeout: {timed_out})")
+                return
+
+            if len(self._samples) < 10:
+                return
+
+            p95_latency, error_rate = self._window_stats()
+            if p95_latency <= self.target_p95_latency and error_rate <= self.target_error_rate and self.rate < self.max_rate:
+                self._set_rate(self.rate + self.additive_increase, now)
+                self.increase_count += 1
+                logger.debug(f"Rate limiter raised to {self.rate:.2f} req/s (p95: {p95_latency:.3f}s, errors: {error_rate:.1%})")
+
+    def _set_rate(self, rate: float, now: float):
+        """Clamp and apply a new rate (caller holds the lock)"""
+
+        self._refill(now)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self._last_adjustment = now
+
+    def _window_stats(self):
+        """p95 latency and congestion error rate over the sample window (caller holds the lock)"""
+
+        latencies = sorted(sample[0] for sample in self._samples)
+        p95_latency = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        error_rate = sum(1 for sample in self._samples if sample[1]) / len(self._samples)
+        return p95_latency, error_rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of the limiter state"""
+
+        with self._lock:
+            if self._samples:
+                p95_latency, error_rate = self._window_stats()
+            else:
+                p95_latency, error_rate = 0.0, 0.0
+
+            return {
+                'current_rate': round(self.rate, 2),
+                'p95_latency': round(p95_latency, 4),
+                'error_rate': round(error_rate, 4),
+                'increases': self.increase_count,
+                'decreases': self.decrease_count,
+                'adaptive': self.adaptive
+            }
+
+class SharedRequestBudget:
+    """Requests-per-second ceiling shared by several worker processes
+
+    Each request reserves the next free send slot in shared memory, so the
+    combined rate of all processes stays under ``rate`` however the work is
+    spread between them. Pass it to workers when they are started (pool
+    initializer) and attach it to their ``rate_limiter``.
+    """
+
+    def __init__(self, rate: float):
+        import multiprocessing
+
+        self.rate = rate
+        self._interval = 1.0 / rate
+        self._next_slot = multiprocessing.Value('d', 0.0, lock=False)
+        self._lock = multiprocessing.Lock()
+
+    def reserve(self) -> float:
+        """Reserve a send slot; returns the seconds to wait for it"""
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self._interval
+        return slot - now
+
+# Global rate limiter shared by the analyzer and extractor
+rate_limiter = AdaptiveRateLimiter.from_config()
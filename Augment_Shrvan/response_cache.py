@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Response Cache Module
+====================
+
+Persistent SQLite cache of computePrice responses.
+
+Entries are keyed by ``product_id`` plus the sorted ``attrN`` payload, so the
+same combination is served locally across runs and across different
+exclusion settings until its TTL expires.
+
+Hits do not write to the database: their access times are buffered and
+written in one transaction every ``ACCESS_FLUSH_SIZE`` hits, before
+eviction and on ``flush()``, so a cache-heavy run does not commit (and
+sync) once per combination.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Any
+from loguru import logger
+
+from config import config
+
+# Buffered hit access times written per transaction
+ACCESS_FLUSH_SIZE = 1000
+
+def canonical_payload_key(payload: Dict[str, Any]) -> str:
+    """Canonical string for a computePrice payload: product ID plus sorted attrN pairs"""
+
+    attrs = sorted((key, str(value)) for key, value in payload.items() if key.startswith('attr'))
+    return f"{payload.get('product_id')}|" + '&'.join(f"{key}={value}" for key, value in attrs)
+
+class ResponseCache:
+    """SQLite-backed computePrice response cache with TTL and size-bounded eviction"""
+
+    def __init__(self, db_path: Path, ttl_seconds: float, max_entries: int, enabled: bool = True):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+        self._puts_since_eviction = 0
+        # cache_key -> last access time not yet written
+        self._accessed = {}
+
+    @classmethod
+    def from_config(cls) -> 'ResponseCache':
+        """Create a cache from the framework configuration"""
+
+        return cls(
+            db_path=config.temp_directory / 'compute_price_cache.sqlite',
+            ttl_seconds=config.response_cache_ttl_hours * 3600,
+            max_entries=config.response_cache_max_entries,
+            enabled=config.response_cache_enabled
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily, once per process (caller holds the lock)"""
+
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    cache_key TEXT PRIMARY KEY,
+                    product_id TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)')
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a payload, or None if missing or expired"""
+
+        if not self.enabled:
+            return None
+
+        key = canonical_payload_key(payload)
+        now = time.time()
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    'SELECT response, created_at FROM responses WHERE cache_key = ?', (key,)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                response, created_at = row
+                if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                    return None  # Deleted by the next eviction
+
+                self._accessed[key] = now
+                if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                    self._write_access_times(connection)
+
+            return json.loads(response)
+
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def put(self, payload: Dict[str, Any], response: Dict[str, Any]):
+        """Store a successful computePrice response"""
+
+        if not self.enabled:
+            return
+
+        key = canonical_payload_key(payload)
+        now = time.time()
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    'INSERT OR REPLACE INTO responses (cache_key, product_id, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                    (key, str(payload.get('product_id')), json.dumps(response), now, now)
+                )
+                connection.commit()
+
+                self._puts_since_eviction += 1
+                if self._puts_since_eviction >= 1000:
+                    self._evict(connection)
+
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _write_access_times(self, connection: sqlite3.Connection):
+        """Write buffered hit access times in one transaction (caller holds the lock)"""
+
+        if not self._accessed:
+            return
+        connection.executemany(
+            'UPDATE responses SET last_access = ? WHERE cache_key = ?',
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()]
+        )
+        connection.commit()
+        self._accessed = {}
+
+    def flush(self):
+        """Write buffered access times (end of a run)"""
+
+        if not self.enabled or not self._accessed:
+            return
+
+        try:
+            with self._lock:
+                self._write_access_times(self._connect())
+
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _evict(self, connection: sqlite3.Connection):
+        """Drop expired entries and the least recently used ones beyond max_entries (caller holds the lock)"""
+
+        self._puts_since_eviction = 0
+        self._write_access_times(connection)
+
+        if self.ttl_seconds > 0:
+            connection.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+
+        count = connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            connection.execute(
+                'DELETE FROM responses WHERE cache_key IN (SELECT cache_key FROM responses ORDER BY last_access LIMIT ?)',
+                (overflow,)
+            )
+            logger.info(f"Response cache evicted {overflow:,} least recently used entries")
+
+        connection.commit()
+
+    def clear(self, product_id: Optional[str] = None):
+        """Remove cached responses, optionally only for one product"""
+
+        with self._lock:
+            connection = self._connect()
+            if product_id is None:
+                connection.execute('DELETE FROM responses')
+            else:
+                connection.execute('DELETE FROM responses WHERE product_id = ?', (str(product_id),))
+            connection.commit()
+            self._accessed = {}
+
+# Global response cache
+response_cache = ResponseCache.from_config()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Result Writer Module
+===================
+
+Streams extraction rows to the Raw CSV in fixed-size batches.
+
+Rows may complete out of order (async engine, resumed runs), so the writer
+keeps a small reorder buffer and only writes the contiguous prefix of
+combination indices. The file on disk is therefore always in combination
+order and grows while the extraction runs. Rows recovered after their index
+was already passed (dead-letter retries) are merged into place on close.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import csv
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+from loguru import logger
+
+class RawCsvWriter:
+    """Ordered, batched CSV writer for Raw extraction rows"""
+
+    def __init__(self, path: Path, columns: List[str], batch_size: int = 100, first_index: int = 1, index_column: str = 'combination_id'):
+        self.path = Path(path)
+        self.columns = columns
+        self.batch_size = max(1, batch_size)
+        self.rows_written = 0
+
+        self._index_position = columns.index(index_column)
+        self._next_index = first_index
+        self._pending = {}
+        self._ready = []
+        self._late = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def add(self, index: int, row: Optional[Dict[str, Any]]):
+        """Register the outcome of one combination (``None`` for a failed one)"""
+
+        with self._lock:
+            self._pending[index] = row
+
+            # Move the contiguous run of completed indices to the write batch
+            while self._next_index in self._pending:
+                ready_row = self._pending.pop(self._next_index)
+                if ready_row is not None:
+                    self._ready.append([ready_row.get(column) for column in self.columns])
+                self._next_index += 1
+
+            if len(self._ready) >= self.batch_size:
+                self._flush()
+
+    def add_late(self, index: int, row: Dict[str, Any]):
+        """Register a row for an index already reported as failed; it is merged into place on close"""
+
+        with self._lock:
+            if index in self._pending:
+                self._pending[index] = row
+            else:
+                self._late[index] = row
+
+    def _flush(self):
+        """Write the ready batch to disk (caller holds the lock)"""
+
+        if self._ready:
+            self._writer.writerows(self._ready)
+            self._file.flush()
+            self.rows_written += len(self._ready)
+            self._ready = []
+
+    def close(self) -> int:
+        """Write everything still buffered and close the file; returns rows written"""
+
+        with self._lock:
+            if self._file is None:
+                return self.rows_written
+
+            if self._pending:
+                # Indices that never completed (aborted run) leave gaps; keep order anyway
+                for index in sorted(self._pending):
+                    row = self._pending[index]
+                    if row is not None:
+                        self._ready.append([row.get(column) for column in self.columns])
+                self._pending = {}
+
+            self._flush()
+            self._file.close()
+            self._file = None
+
+            if self._late:
+                self._merge_late_rows()
+
+        logger.info(f"Created raw CSV: {self.path} ({self.rows_written:,} rows)")
+        return self.rows_written
+
+    def _merge_late_rows(self):
+        """Rewrite the file with late rows inserted in index order (caller holds the lock)"""
+
+        late_rows = sorted(self._late.items())
+        self._late = {}
+        merged_path = self.path.with_name(self.path.name + '.merging')
+
+        with open(self.path, 'r', newline='', encoding='utf-8') as source, \
+             open(merged_path, 'w', newline='', encoding='utf-8') as target:
+            reader = csv.reader(source)
+            writer = csv.writer(target)
+            writer.writerow(next(reader))
+
+            position = 0
+            for row in reader:
+                row_index = int(row[self._index_position])
+                while position < len(late_rows) and late_rows[position][0] < row_index:
+                    writer.writerow([late_rows[position][1].get(column) for column in self.columns])
+                    position += 1
+                writer.writerow(row)
+
+            for _, late_row in late_rows[position:]:
+                writer.writerow([late_row.get(column) for column in self.columns])
+
+        os.replace(merged_path, self.path)
+        self.rows_written += len(late_rows)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Retry Policy Module
+==================
+
+Retry, backoff and circuit breaking for computePrice calls.
+
+Transient failures (network errors, timeouts, 429 and 5xx) are retried up to
+``config.max_retries`` times with full-jitter exponential backoff, honoring
+``Retry-After``. A shared circuit breaker opens when the failure rate over
+recent calls spikes and holds every caller until a cooldown has passed and
+a trial call succeeds.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Any
+from loguru import logger
+
+from config import config
+
+class RetryPolicy:
+    """Which failed calls to retry, and how long to wait before each attempt"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_config(cls) -> 'RetryPolicy':
+        """Create a policy from the framework configuration"""
+
+        return cls(
+            max_retries=config.max_retries,
+            base_delay=config.retry_base_delay_seconds,
+            max_delay=config.retry_max_delay_seconds
+        )
+
+    @staticmethod
+    def is_retryable(api_result: Dict[str, Any]) -> bool:
+        """Whether a failed result is transient (network error, timeout, 429 or 5xx)
+
+        Network errors and timeouts are flagged ``transient`` by the caller.
+        Validation failures, other 4xx responses and 200s whose body did not
+        decode fail the same way on an immediate retry, so they are not
+        retried.
+        """
+
+        if api_result.get('success'):
+            return False
+        if api_result.get('transient'):
+            return True
+        status_code = api_result.get('status_code')
+        return status_code is not None and (status_code == 429 or status_code >= 500)
+
+    @classmethod
+    def is_dead_letter(cls, api_result: Dict[str, Any]) -> bool:
+        """Whether a failed result gets one more try after the run: transient, or an undecodable 200"""
+
+        return cls.is_retryable(api_result) or bool(api_result.get('decode_error'))
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry ``attempt`` (1-based): full jitter, at least Retry-After"""
+
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after:
+            backoff = max(backoff, min(retry_after, self.max_delay))
+        return backoff
+
+class CircuitBreaker:
+    """Pauses all computePrice callers while the failure rate is too high
+
+    Closed: calls flow and outcomes are tracked over a sliding window. When
+    at least ``min_requests`` outcomes are in the window and the failure rate
+    reaches ``failure_rate``, the breaker opens. Open: callers wait until
+    ``cooldown`` has passed, then one trial call is let through (half-open).
+    A successful trial closes the breaker; a failed one opens it again.
+    """
+
+    def __init__(self,
+                 failure_rate: float = 0.5,
+                 min_requests: int = 20,
+                 cooldown: float = 30.0,
+                 window_size: int = 50,
+                 enabled: bool = True):
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.enabled = enabled
+
+        self.state = 'closed'
+        self.open_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._outcomes = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'CircuitBreaker':
+        """Create a breaker from the framework configuration"""
+
+        return cls(
+            failure_rate=config.circuit_breaker_failure_rate,
+            min_requests=config.circuit_breaker_min_requests,
+            cooldown=config.circuit_breaker_cooldown_seconds,
+            enabled=config.circuit_breaker_enabled
+        )
+
+    def _try_pass(self) -> float:
+        """Let a call through, or return the seconds to wait"""
+
+        if not self.enabled:
+            return 0.0
+
+        with self._lock:
+            if self.state == 'closed':
+                return 0.0
+
+            now = time.monotonic()
+            if self.state == 'open':
+                remaining = self._opened_at + self.cooldown - now
+                if remaining > 0:
+                    return remaining
+                self.state = 'half_open'
+                self._trial_in_flight = False
+                logger.info("🔌 Circuit breaker half-open: sending a trial request")
+
+            # Half-open: only one trial call at a time
+            if self._trial_in_flight:
+                return 0.5
+            self._trial_in_flight = True
+            return 0.0
+
+    def before_call(self):
+        """Block while the breaker is open"""
+
+        while True:
+            wait = self._try_pass()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def before_call_async(self):
+        """Wait without blocking the event loop while the breaker is open"""
+
+        while True:
+            wait = self._try_pass()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def record(self, success: bool):
+        """Record the outcome of a call that passed the breaker"""
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self.state == 'half_open':
+                self._trial_in_flight = False
+                if success:
+                    self.state = 'closed'
+                    self._outcomes.clear()
+                    logger.info("🔌 Circuit breaker closed: trial request succeeded")
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(success)
+            if self.state == 'closed' and len(self._outcomes) >= self.min_requests:
+                failures = sum(1 for outcome in self._outcomes if not outcome)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self):
+        """Open the breaker (caller holds the lock)"""
+
+        self.state = 'open'
+        self.open_count += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        logger.warning(f"🔌 Circuit breaker open: pausing computePrice calls for {self.cooldown:.0f}s")
+
+    def reset(self):
+        """Close the breaker and forget past outcomes (start of a run)"""
+
+        with self._lock:
+            self.state = 'closed'
+            self.open_count = 0
+            self._opened_at = 0.0
+            self._trial_in_flight = False
+            self._outcomes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of the breaker state"""
+
+        return {'state': self.state, 'open_count': self.open_count, 'enabled': self.enabled}
+
+# Global retry policy and circuit breaker shared by all computePrice callers
+retry_policy = RetryPolicy.from_config()
+circuit_breaker = CircuitBreaker.from_config()
@@ -20,6 +20,7 @@ from loguru import logger
 from difflib import SequenceMatcher
 import google.generativeai as genai
 from config import config
+from parquet_output import read_prices_parquet
 
 class SheetMapper:
     """Intelligent mapper for CSV and Excel sheets"""
@@ -45,7 +46,7 @@ class SheetMapper:
         
         try:
             # Load extracted CSV data
-            df_extracted = pd.read_csv(extracted_csv_path)
+            df_extracted = self._load_extracted(extracted_csv_path)
             
             # Load target sheet (Excel or CSV) with smart header detection
             if target_sheet_path.endswith('.xlsx') or target_sheet_path.endswith('.xls'):
@@ -80,6 +81,14 @@ class SheetMapper:
             logger.error(f"Error analyzing sheets: {e}")
             return {'error': str(e)}
 
+    def _load_extracted(self, file_path: str) -> pd.DataFrame:
+        """Load extracted prices from a CSV or a Parquet file written by PriceExtractor"""
+
+        if str(file_path).endswith('.parquet'):
+            # Option columns as plain strings so the column heuristics below apply
+            return read_prices_parquet(file_path, categorical=False)
+        return pd.read_csv(file_path)
+
     def _load_excel_with_smart_headers(self, file_path: str) -> pd.DataFrame:
         """Load Excel file with smart header detection"""
 
@@ -445,7 +454,7 @@ class SheetMapper:
         
         try:
             # Load data
-            df_extracted = pd.read_csv(extracted_csv_path)
+            df_extracted = self._load_extracted(extracted_csv_path)
             
             if target_sheet_path.endswith('.xlsx') or target_sheet_path.endswith('.xls'):
                 df_target = self._load_excel_with_smart_headers(target_sheet_path)
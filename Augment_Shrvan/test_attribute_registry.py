@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test Attribute Registry
+======================
+
+Only real quotes may teach the registry option → attrN mappings; the
+calculator's default $20.00 answer to a payload it did not understand
+must not.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+from attribute_registry import AttributeRegistry, is_default_quote
+
+OPTIONS = {
+    'Paper Type': [{'id': '2488', 'text': '17 pt. Magnet'}],
+    'Quantity': [{'id': '1772', 'text': '25'}]
+}
+SLOTS = [('Paper Type', 'attr1'), ('Quantity', 'attr5')]
+OPTION_IDS = {'Paper Type': '2488', 'Quantity': '1772'}
+
+def test_default_quote_records_nothing(tmp_path):
+    registry = AttributeRegistry(tmp_path / 'registry.sqlite')
+
+    registry.confirm(SLOTS, OPTION_IDS, {'price': '20.00', 'total_price': '20.00', 'qty': '0', 'turnaround': '0'})
+    registry.confirm(SLOTS, OPTION_IDS, {'price': '$20.00', 'qty': 250})
+
+    assert registry.lookup(list(OPTIONS), OPTIONS) == {}
+
+def test_real_quote_is_recorded(tmp_path):
+    registry = AttributeRegistry(tmp_path / 'registry.sqlite')
+
+    registry.confirm(SLOTS, OPTION_IDS, {'price': '31.50', 'total_price': '31.50', 'qty': '25', 'turnaround': '6'})
+
+    assert registry.lookup(list(OPTIONS), OPTIONS) == {'Paper Type': 'attr1', 'Quantity': 'attr5'}
+    # Known by name as well, for products with other value IDs
+    assert registry.lookup(['paper type:']) == {'paper type:': 'attr1'}
+
+def test_is_default_quote():
+    assert is_default_quote({'price': '20.00', 'qty': '0'})
+    assert is_default_quote({'price': '45.00', 'qty': '0'})
+    assert is_default_quote({'price': 'N/A', 'qty': '100'})
+    assert not is_default_quote({'price': '1,250.00', 'qty': '1,000'})
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test Payload Template
+====================
+
+The compiled template must send exactly the payloads the original
+per-combination builder sent, flag the IDs that can fail validation, and
+only deduplicate payloads over options that cannot change the price.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import itertools
+
+import payload_template
+from attribute_registry import AttributeRegistry
+from payload_template import PayloadTemplate, validate_payload
+
+PRODUCT_ID = '4545'
+
+OPTIONS = {
+    'Paper Type': [{'id': '2488', 'text': '14 pt. Cardstock'}, {'id': '2489', 'text': '16 pt. Cardstock'}],
+    'Size': [{'id': '11', 'text': '2" x 3.5"'}, {'id': '12', 'text': '2.5" x 2.5"'}],
+    # ID 31 is also a printing time value, so attr4 and attr6 can collide
+    'Printed Side': [{'id': '31', 'text': 'Front Only'}, {'id': '32', 'text': 'Front and Back'}],
+    'Printing Time': [{'id': '41', 'text': '3 Business Days'}, {'id': '31', 'text': 'Next Business Day'}],
+    'Shape': [{'id': '51', 'text': 'Rectangle'}, {'id': '52', 'text': 'Rounded'}],
+    'Quantity': [{'id': '61', 'text': '100'}, {'id': '62', 'text': '250'}]
+}
+
+# Shape maps to nothing; Lamination overwrites Printed Side's attr4 from the excluded options
+ATTR_MAPPINGS = {'Paper Type': 'attr1'}
+EXCLUDED_DEFAULTS = {'Bundling': {'id': '71', 'text': 'No Bundling'}, 'Lamination': {'id': '81', 'text': 'None'}}
+EXCLUDED_MAPPINGS = {**ATTR_MAPPINGS, 'Lamination': 'attr4'}
+
+def _baseline_payload(product_id, options_dict, attr_mappings):
+    """Payload as built per combination before the template existed (logging removed)"""
+
+    payload = {'product_id': product_id}
+    for option_name, option_id in options_dict.items():
+        name = option_name.lower()
+        attr_name = attr_mappings.get(option_name)
+        if attr_name:
+            payload[attr_name] = option_id
+        elif 'time' in name or 'turnaround' in name or 'rush' in name or 'day' in name:
+            payload['attr6'] = option_id
+        elif 'quantity' in name:
+            payload['attr5'] = option_id
+        elif 'size' in name or 'format' in name:
+            payload['attr3'] = option_id
+        elif 'paper' in name or 'material' in name or 'stock' in name:
+            payload['attr1'] = option_id
+        elif ('page' in name or 'side' in name or 'print' in name) and 'time' not in name:
+            payload['attr4'] = option_id
+        elif 'bundling' in name or 'binding' in name:
+            payload['attr400'] = option_id
+    return payload
+
+def _combinations(options):
+    names = list(options)
+    for values in itertools.product(*options.values()):
+        yield {name: value['id'] for name, value in zip(names, values)}
+
+def _disable_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(payload_template, 'attribute_registry', AttributeRegistry(tmp_path / 'registry.sqlite', enabled=False))
+
+def test_payloads_match_baseline_builder(tmp_path, monkeypatch):
+    _disable_registry(tmp_path, monkeypatch)
+    template = PayloadTemplate(PRODUCT_ID, OPTIONS, ATTR_MAPPINGS)
+
+    assert template.inert_options == ['Shape']
+    for options_dict in _combinations(OPTIONS):
+        assert template.build(options_dict) == _baseline_payload(PRODUCT_ID, options_dict, ATTR_MAPPINGS)
+
+def test_excluded_defaults_match_baseline_builder(tmp_path, monkeypatch):
+    _disable_registry(tmp_path, monkeypatch)
+    template = PayloadTemplate(PRODUCT_ID, OPTIONS, EXCLUDED_MAPPINGS, EXCLUDED_DEFAULTS, list(EXCLUDED_DEFAULTS))
+
+    assert template.base_payload == {'product_id': PRODUCT_ID, 'attr400': '71', 'attr4': '81'}
+    assert sorted(template.inert_options) == ['Printed Side', 'Shape']
+    for options_dict in _combinations(OPTIONS):
+        complete_options_dict = {**options_dict, **{name: default['id'] for name, default in EXCLUDED_DEFAULTS.items()}}
+        assert template.build(options_dict) == _baseline_payload(PRODUCT_ID, complete_options_dict, EXCLUDED_MAPPINGS)
+
+def test_suspect_ids_validate_like_baseline(tmp_path, monkeypatch):
+    _disable_registry(tmp_path, monkeypatch)
+    template = PayloadTemplate(PRODUCT_ID, OPTIONS, ATTR_MAPPINGS)
+
+    assert template.suspect_ids == {'31'}
+    rejected = 0
+    for options_dict in _combinations(OPTIONS):
+        payload = template.build(options_dict)
+        expected = validate_payload(payload, options_dict)['valid']
+        assert template.validate(payload, options_dict)['valid'] == expected
+        rejected += not expected
+    # Only combinations sending 31 as both attr4 and attr6 are rejected
+    assert rejected == 16
+
+def test_memo_key_ignores_only_price_invariant_options(tmp_path, monkeypatch):
+    _disable_registry(tmp_path, monkeypatch)
+    template = PayloadTemplate(PRODUCT_ID, OPTIONS, ATTR_MAPPINGS)
+    first = {'Paper Type': '2488', 'Size': '11', 'Printed Side': '32', 'Printing Time': '41', 'Shape': '51', 'Quantity': '61'}
+    other_shape = {**first, 'Shape': '52'}
+    other_size = {**first, 'Size': '12'}
+
+    # Shape never reaches the payload, so its values already share one
+    assert template.memo_key(template.build(first)) == template.memo_key(template.build(other_shape))
+    assert template.memo_key(template.build(first)) != template.memo_key(template.build(other_size))
+    assert template.unique_payload_count(OPTIONS) == 32
+
+    template.mark_price_invariant(['Size', 'Shape'])
+    assert template.invariant_options == ['Size']
+    assert template.ignored_attrs == {'attr3'}
+    assert template.memo_key(template.build(first)) == template.memo_key(template.build(other_size))
+    assert template.unique_payload_count(OPTIONS) == 16
+    # The payload itself still carries the size
+    assert template.build(other_size)['attr3'] == '12'
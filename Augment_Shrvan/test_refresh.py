@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test Refresh Mode
+================
+
+A refresh run must see prices that changed since the previous run, even
+when the previous responses are still in the response cache.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import price_extractor
+import payload_template
+from config import config
+from price_extractor import PriceExtractor
+from response_cache import ResponseCache, canonical_payload_key
+from price_history import PriceHistory
+from attribute_registry import AttributeRegistry
+
+ANALYSIS = {
+    'product_name': 'Refresh Test Cards',
+    'product_id': '4242',
+    'options': {
+        'Size': [{'id': '11', 'text': '2" x 3.5"'}, {'id': '12', 'text': '2.5" x 2.5"'}],
+        'Quantity': [{'id': '21', 'text': '100'}, {'id': '22', 'text': '250'}, {'id': '23', 'text': '500'}]
+    },
+    'attribute_mappings': {'Size': 'attr3', 'Quantity': 'attr5'}
+}
+
+def test_refresh_detects_changed_prices_despite_response_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_extractor, 'OUTPUT_DIR', tmp_path)
+    monkeypatch.setattr(config, 'temp_directory', tmp_path / 'temp')
+    monkeypatch.setattr(config, 'parquet_output_enabled', False)
+    monkeypatch.setattr(price_extractor, 'response_cache', ResponseCache(tmp_path / 'cache.sqlite', ttl_seconds=3600, max_entries=1000))
+    monkeypatch.setattr(price_extractor, 'price_history', PriceHistory(tmp_path / 'history.sqlite'))
+    registry = AttributeRegistry(tmp_path / 'registry.sqlite', enabled=False)
+    monkeypatch.setattr(price_extractor, 'attribute_registry', registry)
+    monkeypatch.setattr(payload_template, 'attribute_registry', registry)
+
+    surcharge = {'amount': 0.0}
+    requests_sent = []
+
+    async def post_price(self, http_session, payload, combo_key):
+        # Stands in for computePrice: price depends on size and quantity, plus the current surcharge
+        requests_sent.append(canonical_payload_key(payload))
+        price = int(payload['attr3']) + int(payload['attr5']) + surcharge['amount']
+        data = {'price': f"{price:.2f}", 'total_price': f"{price:.2f}", 'unit_price': '0.10', 'qty': payload['attr5'], 'turnaround': '3'}
+        price_extractor.response_cache.put(payload, data)
+        return self._parse_price_response(data, payload, combo_key)
+
+    monkeypatch.setattr(PriceExtractor, '_post_price_async', post_price)
+
+    first = PriceExtractor().extract_all_prices(ANALYSIS, mode='async', probe_invariance=False, sparse_quantity=False)
+    assert first['total_extracted'] == 6
+
+    surcharge['amount'] = 5.0
+    requests_sent.clear()
+    refreshed = PriceExtractor().extract_all_prices(ANALYSIS, mode='async', probe_invariance=False, sparse_quantity=False, refresh=True)
+
+    assert refreshed['refresh']
+    assert refreshed['cache_hits'] == 0
+    assert refreshed['refreshed_slices'] == 2
+    assert refreshed['carried_forward_combinations'] == 0
+    assert refreshed['total_extracted'] == 6
+    assert len(requests_sent) == 6
+    assert refreshed['price_history']['changed'] == 6
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test Raw CSV Writer
+==================
+
+Rows reported out of order, failed combinations and late dead-letter
+retries must all end up in combination order, each row exactly once.
+
+Author: AI Assistant
+Date: 2026-10-16
+"""
+
+import csv
+import random
+
+from result_writer import RawCsvWriter
+
+COLUMNS = ['combination_id', 'price']
+
+def _row(index):
+    return {'combination_id': index, 'price': f"{index * 1.5:.2f}"}
+
+def _written_ids(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [int(row['combination_id']) for row in csv.DictReader(f)]
+
+def test_out_of_order_rows_are_written_in_combination_order(tmp_path):
+    path = tmp_path / 'raw.csv'
+    writer = RawCsvWriter(path, COLUMNS, batch_size=7)
+
+    indices = list(range(1, 201))
+    random.Random(5).shuffle(indices)
+    for index in indices:
+        writer.add(index, _row(index))
+
+    assert writer.close() == 200
+    assert _written_ids(path) == list(range(1, 201))
+
+def test_late_retries_are_merged_into_place(tmp_path):
+    path = tmp_path / 'raw.csv'
+    writer = RawCsvWriter(path, COLUMNS, batch_size=3)
+    failed = {2, 9, 10, 20}
+
+    indices = list(range(1, 21))
+    random.Random(11).shuffle(indices)
+    for index in indices:
+        writer.add(index, None if index in failed else _row(index))
+
+    # Retries succeed after the failed indices were passed, in any order
+    for index in sorted(failed, reverse=True):
+        writer.add_late(index, _row(index))
+
+    assert writer.close() == 20
+    assert _written_ids(path) == list(range(1, 21))
+
+def test_failed_rows_leave_gaps_without_duplicates(tmp_path):
+    path = tmp_path / 'raw.csv'
+    writer = RawCsvWriter(path, COLUMNS, batch_size=2, first_index=11)
+
+    for index in [14, 11, 13, 12, 16, 15]:
+        writer.add(index, None if index in (12, 15) else _row(index))
+    writer.add_late(12, _row(12))
+    # Aborted run: 18 completed but 17 was never reported
+    writer.add(18, _row(18))
+
+    assert writer.close() == 6
+    assert _written_ids(path) == [11, 12, 13, 14, 16, 18]
@@ -11,7 +11,7 @@ Date: 2025-08-30
 
 import json
 import pandas as pd
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from pathlib import Path
@@ -21,8 +21,10 @@ from datetime import datetime
 
 from config import config, OUTPUT_DIR
 from product_analyzer import ProductAnalyzer
-from price_extractor import PriceExtractor
+from price_extractor import PriceExtractor, EXTRACTION_MODES
 from sheet_mapper import SheetMapper
+from rate_limiter import rate_limiter
+from metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from loguru import logger
 
 app = Flask(__name__)
@@ -40,7 +42,8 @@ progress_data = {
     'total': 0,
     'message': 'Ready',
     'errors': [],
-    'is_paused': False
+    'is_paused': False,
+    'request_rate': 0
 }
 
 @app.route('/')
@@ -384,6 +387,16 @@ def start_extraction():
         data = request.get_json()
         options_to_exclude = data.get('exclude_options', [])
         suboptions_to_exclude = data.get('exclude_suboptions', {})
+        extraction_mode = data.get('mode')
+        if extraction_mode is not None and extraction_mode not in EXTRACTION_MODES:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown extraction mode '{extraction_mode}', expected one of {', '.join(EXTRACTION_MODES)}"
+            }), 400
+        resume = bool(data.get('resume', False))
+        probe_invariance = data.get('probe_invariance')
+        sparse_quantity = data.get('sparse_quantity')
+        refresh = bool(data.get('refresh', False))
 
         # Start extraction in background
         def run_extraction():
@@ -406,7 +419,8 @@ def start_extraction():
                     'progress': current,
                     'total': total,
                     'message': message,
-                    'is_paused': current_extractor.is_paused if current_extractor else False
+                    'is_paused': current_extractor.is_paused if current_extractor else False,
+                    'request_rate': round(rate_limiter.current_rate, 2)
                 })
                 socketio.emit('progress_update', progress_data)
 
@@ -414,7 +428,12 @@ def start_extraction():
                 current_analysis,
                 exclude_options=options_to_exclude,
                 suboptions_to_exclude=suboptions_to_exclude,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                mode=extraction_mode,
+                resume=resume,
+                probe_invariance=probe_invariance,
+                sparse_quantity=sparse_quantity,
+                refresh=refresh
             )
 
             current_extraction = result
@@ -538,6 +557,13 @@ def get_progress():
     """Get current progress status"""
     return jsonify(progress_data)
 
+@app.route('/metrics')
+def get_metrics():
+    """Extraction and analysis metrics in the Prometheus text format"""
+    if not metrics.enabled:
+        return Response('Metrics are disabled (METRICS_ENABLED=false)\n', status=404, mimetype='text/plain')
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/mapper/analyze', methods=['POST'])
 def analyze_sheets_for_mapping():
     """Analyze sheets for intelligent mapping"""